@@ -0,0 +1,229 @@
+"""End-to-end load test of the ai-service with local stand-ins for its dependencies.
+
+The FastAPI app runs in-process (ASGI transport, real startup/shutdown). Ollama
+and the crawler are replaced by `FakeBackend`, Gemini by `FakeGeminiChatModel`,
+Postgres by a temporary SQLite database and the crawler-ingested index by
+`FixtureIndex`. Results are printed (and optionally saved) as JSON.
+
+    python -m benchmarks.e2e --endpoint ask_legacy --concurrency 16 --requests 200
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import contextlib
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "src" / "inference"))
+
+QUESTIONS = [
+    "Come funziona l'ammissione ai corsi ad accesso programmato?",
+    "Quali sono le scadenze per le tasse universitarie?",
+    "Chi è esonerato dal contributo in base all'ISEE?",
+    "Come si partecipa al bando Erasmus+ per studio?",
+    "Quali requisiti servono per la laurea magistrale LM-32?",
+    "Mostrami una dashboard degli studenti iscritti",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2) if values else 0.0,
+        "mean": round(statistics.fmean(values), 2) if values else 0.0,
+    }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task sleeping `interval_ms`."""
+
+    def __init__(self, interval_ms: float = 10.0):
+        self.interval = interval_ms / 1000
+        self.lags: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append((loop.time() - start - self.interval) * 1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def configure_environment(args, backend_url: str, workdir: str) -> str:
+    """Points the service at the stand-ins; must run before importing the app modules."""
+    database_url = f"sqlite:///{workdir}/bench.sqlite"
+    os.environ.update({
+        "OLLAMA_URL": backend_url,
+        "CRAWLER_URL": backend_url,
+        "DATABASE_URL": database_url,
+        "GEMINI_API_KEY": "benchmark",
+        "LEGACY_SUMMARY_MODE": args.summary_mode,
+        "LEGACY_QA_MODE": args.qa_mode,
+        # The FAQ store needs Postgres: every question goes through the pipeline
+        "LEGACY_FAQ": "false",
+        "LEGACY_LIVE_CRAWL": "true" if args.live_crawl else "false",
+        "EMBEDDING_CACHE_PATH": f"{workdir}/embeddings.sqlite",
+        # Retrieval is served by FixtureIndex: no backfill against the SQLite stand-in
+        "EMBEDDING_MODEL": "",
+    })
+    return database_url
+
+
+async def run_load(client, endpoint: str, total: int, concurrency: int, debug: bool):
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            payload = {"question": QUESTIONS[i % len(QUESTIONS)], "debug": debug}
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"/{endpoint}", json=payload)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+                if response.status_code != 200:
+                    errors += 1
+                elif debug:
+                    for stage, ms in (response.json().get("timings") or {}).items():
+                        stages.setdefault(stage, []).append(ms)
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, stages, statuses, errors, time.perf_counter() - start
+
+
+async def benchmark(args) -> Dict:
+    from benchmarks.fakes import FakeBackend, FakeGeminiChatModel, FixtureIndex, seed_sqlite
+
+    backend = FakeBackend(
+        token_latency_ms=args.token_latency_ms,
+        prompt_latency_ms=args.prompt_latency_ms,
+        response_tokens=args.response_tokens,
+        embed_latency_ms=args.embed_latency_ms,
+        crawl_latency_ms=args.crawl_latency_ms,
+        grounded_ratio=args.grounded_ratio,
+    )
+    backend.start()
+    workdir = tempfile.mkdtemp(prefix="ai-bench-")
+    database_url = configure_environment(args, backend.url, workdir)
+    seed_sqlite(database_url)
+
+    import httpx
+    import main
+
+    # Classifier from the local models/ directory, if it has been trained
+    main.MODEL_PATH = str(ROOT_DIR / "models" / "logistic_regression.pkl")
+    main.VECTORIZER_PATH = str(ROOT_DIR / "models" / "vectorizer.pkl")
+
+    try:
+        async with main.app.router.lifespan_context(main.app):
+            index = FixtureIndex(empty=args.live_crawl)
+            main.document_repo = index
+            main.retriever = index
+            if main.rag_sql_service:
+                main.rag_sql_service.llm = FakeGeminiChatModel(latency_ms=args.gemini_latency_ms)
+                main.rag_sql_service.llm_creative = FakeGeminiChatModel(latency_ms=args.gemini_latency_ms)
+
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                if args.warmup:
+                    await run_load(client, args.endpoint, args.warmup, args.concurrency, False)
+                monitor = LoopLagMonitor()
+                monitor.start()
+                latencies, stages, statuses, errors, duration = await run_load(
+                    client, args.endpoint, args.requests, args.concurrency, args.debug
+                )
+                await monitor.stop()
+    finally:
+        backend.stop()
+
+    return {
+        "endpoint": f"/{args.endpoint}",
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "errors": errors,
+        # 429/503 are admission control rejections (overload)
+        "status_codes": statuses,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(args.requests / duration, 2) if duration else 0.0,
+        "latency_ms": summarize(latencies),
+        "event_loop_lag_ms": summarize(monitor.lags),
+        "stages_ms": {stage: summarize(values) for stage, values in stages.items()},
+        "config": {
+            "summary_mode": args.summary_mode,
+            "qa_mode": args.qa_mode,
+            "grounded_ratio": args.grounded_ratio,
+            "live_crawl": args.live_crawl,
+            "token_latency_ms": args.token_latency_ms,
+            "prompt_latency_ms": args.prompt_latency_ms,
+            "response_tokens": args.response_tokens,
+            "embed_latency_ms": args.embed_latency_ms,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "warmup": args.warmup,
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end ai-service benchmark")
+    parser.add_argument("--endpoint", choices=["ask", "ask_legacy"], default="ask_legacy")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10, help="Requests sent before measuring")
+    parser.add_argument("--summary-mode", choices=["cached", "direct"], default="cached")
+    parser.add_argument("--qa-mode", choices=["single", "cascade"], default="single")
+    parser.add_argument("--grounded-ratio", type=float, default=0.8, help="Share of fake answer tokens taken from the prompt")
+    parser.add_argument("--live-crawl", action="store_true", help="Empty index: every request hits the fake crawler")
+    parser.add_argument("--token-latency-ms", type=float, default=5.0)
+    parser.add_argument("--prompt-latency-ms", type=float, default=50.0)
+    parser.add_argument("--response-tokens", type=int, default=32)
+    parser.add_argument("--embed-latency-ms", type=float, default=10.0)
+    parser.add_argument("--crawl-latency-ms", type=float, default=500.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=200.0)
+    parser.add_argument("--debug", action="store_true", help="Request per-stage timings from the service")
+    parser.add_argument("--output", type=str, help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # The service logs to stdout, through a handler created when main is imported
+    # (inside the redirect): keep stdout for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(benchmark(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
@@ -0,0 +1,283 @@
+"""Deterministic local stand-ins for the ai-service dependencies.
+
+- `FakeBackend`: HTTP server speaking the subset of the Ollama API used by the
+  service (`/api/chat`, `/api/embed`) with configurable latencies and token
+  log-probs, plus the crawler `/crawl` endpoint serving the fixture markdown pages.
+- `FakeGeminiChatModel`: LangChain chat model replacing Gemini in `RAGSQLService`.
+- `FixtureIndex`: in-memory replacement of `DocumentRepository` + `HybridRetriever`.
+- `seed_sqlite`: SQLite database with the tables used by the SQL/dashboard path
+  (the statistics views of init.sql are plain views here).
+"""
+import json
+import time
+import asyncio
+import hashlib
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from sqlalchemy import create_engine, text
+
+from utils.chunking import MarkdownChunker
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "pages"
+FIXTURE_BASE_URL = "https://www.univpm.it/"
+EMBEDDING_DIM = 768
+
+
+def load_fixture_pages() -> List[Dict[str, str]]:
+    return [
+        {"url": FIXTURE_BASE_URL + path.stem, "content": path.read_text(encoding="utf-8")}
+        for path in sorted(FIXTURES_DIR.glob("*.md"))
+    ]
+
+
+def fake_embedding(text_value: str) -> List[float]:
+    """Deterministic unit vector derived from the text hash."""
+    seed = hashlib.sha256(text_value.encode("utf-8")).digest()
+    values = [(seed[i % len(seed)] - 127.5) / 127.5 for i in range(EMBEDDING_DIM)]
+    norm = sum(v * v for v in values) ** 0.5 or 1.0
+    return [v / norm for v in values]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeBackend:
+    """Fake Ollama + crawler server running in a background thread.
+
+    Generation costs `prompt_latency_ms` once (prefill) plus `token_latency_ms`
+    per generated token; responses are always `response_tokens` tokens long.
+    A `grounded_ratio` share of the tokens are words of the prompt (the rest are
+    made up), which drives the support score of the cascade mode.
+    """
+
+    def __init__(
+        self,
+        token_latency_ms: float = 5.0,
+        prompt_latency_ms: float = 50.0,
+        response_tokens: int = 32,
+        embed_latency_ms: float = 10.0,
+        crawl_latency_ms: float = 500.0,
+        grounded_ratio: float = 0.8,
+        token_logprob: float = -0.1,
+    ):
+        self.token_latency = token_latency_ms / 1000
+        self.prompt_latency = prompt_latency_ms / 1000
+        self.response_tokens = response_tokens
+        self.embed_latency = embed_latency_ms / 1000
+        self.crawl_latency = crawl_latency_ms / 1000
+        self.grounded_ratio = grounded_ratio
+        self.token_logprob = token_logprob
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _tokens(self, prompt: str) -> List[str]:
+        words = prompt.split() or ["tok"]
+        grounded = round(self.response_tokens * self.grounded_ratio)
+        return [
+            f"{words[i * 7 % len(words)]} " if i < grounded else f"tok{i} "
+            for i in range(self.response_tokens)
+        ]
+
+    def _chunk(self, model: str, content: str, done: bool, prompt_tokens: int = 0, logprobs: bool = False) -> Dict[str, Any]:
+        chunk = {"model": model, "message": {"role": "assistant", "content": content}, "done": done}
+        if logprobs and content:
+            chunk["logprobs"] = [{"token": token, "logprob": self.token_logprob} for token in content.split()]
+        if done:
+            chunk.update(done_reason="stop", prompt_eval_count=prompt_tokens, eval_count=self.response_tokens)
+        return chunk
+
+    def build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/api/chat")
+        async def chat(request: Request):
+            body = await request.json()
+            model = body.get("model", "fake")
+            prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+            prompt_tokens = len(prompt.split())
+            tokens = self._tokens(prompt)
+            logprobs = bool(body.get("logprobs"))
+
+            if not body.get("stream", True):
+                await asyncio.sleep(self.prompt_latency + self.token_latency * len(tokens))
+                return self._chunk(model, "".join(tokens), True, prompt_tokens, logprobs)
+
+            async def stream():
+                await asyncio.sleep(self.prompt_latency)
+                for token in tokens:
+                    await asyncio.sleep(self.token_latency)
+                    yield json.dumps(self._chunk(model, token, False, logprobs=logprobs)) + "\n"
+                yield json.dumps(self._chunk(model, "", True, prompt_tokens)) + "\n"
+
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        @app.post("/api/generate")
+        async def generate(request: Request):
+            # Only used by the startup warmup: an empty prompt just "loads" the model
+            body = await request.json()
+            await asyncio.sleep(self.prompt_latency)
+            return {"model": body.get("model"), "response": "", "done": True}
+
+        @app.post("/api/embed")
+        async def embed(request: Request):
+            body = await request.json()
+            inputs = body.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            await asyncio.sleep(self.embed_latency)
+            return {"model": body.get("model"), "embeddings": [fake_embedding(t) for t in inputs]}
+
+        @app.post("/crawl")
+        async def crawl():
+            await asyncio.sleep(self.crawl_latency)
+            return {"results": [{"success": True, **page} for page in load_fixture_pages()]}
+
+        return app
+
+    def start(self):
+        config = uvicorn.Config(self.build_app(), host="127.0.0.1", port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake backend did not start")
+            time.sleep(0.01)
+
+    def stop(self):
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+
+class FakeGeminiChatModel(BaseChatModel):
+    """Answers the RAG SQL prompts (router, planner, SQL, chart) with canned outputs."""
+
+    latency_ms: float = 200.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def _respond(self, prompt: str) -> str:
+        question = prompt.rsplit("Domanda:", 1)[-1]
+        if "destinazione" in prompt:
+            return '{"destination": "sql"}'
+        if "Data Analyst" in prompt:
+            return json.dumps([
+                "Quanti studenti sono iscritti per corso di laurea?",
+                "Quanti studenti si sono iscritti per anno?",
+            ])
+        if "esperto SQL" in prompt:
+            # Same shape as Gemini's output once the pre-aggregated views are in the prompt
+            if "per anno" in question:
+                return "SELECT anno_iscrizione, SUM(studenti) AS studenti FROM mv_iscrizioni GROUP BY anno_iscrizione ORDER BY anno_iscrizione"
+            return "SELECT corso_laurea AS corso, SUM(studenti) AS studenti FROM mv_iscrizioni GROUP BY corso_laurea ORDER BY corso_laurea"
+        return json.dumps({"type": "bar", "data": {"labels": [], "datasets": []}, "options": {}})
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # Blocking on purpose: RAGSQLService invokes the chains synchronously
+        time.sleep(self.latency_ms / 1000)
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = self._respond(prompt)
+        message = AIMessage(
+            content=content,
+            response_metadata={"model_name": "fake-gemini"},
+            usage_metadata={
+                "input_tokens": len(prompt.split()),
+                "output_tokens": len(content.split()),
+                "total_tokens": len(prompt.split()) + len(content.split()),
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FixtureIndex:
+    """Chunks the fixture pages and ranks them by query-term overlap.
+
+    Exposes the methods of `DocumentRepository` and `HybridRetriever` used by the
+    legacy endpoint. With `empty=True` nothing is indexed, so the service falls
+    back to a live crawl (if `LEGACY_LIVE_CRAWL` is enabled).
+    """
+
+    def __init__(self, empty: bool = False):
+        self.pages = [] if empty else load_fixture_pages()
+        chunker = MarkdownChunker()
+        self.chunks: List[Dict[str, Any]] = []
+        for page in self.pages:
+            for chunk in chunker.iter_chunks(page["content"], source_url=page["url"]):
+                self.chunks.append({"id": len(self.chunks), "url": page["url"], **chunk})
+
+    def load_pages(self, urls: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        return [page for page in self.pages if urls is None or page["url"] in urls]
+
+    async def retrieve(self, question: str, top_k: int = 5, **kwargs) -> List[Dict[str, Any]]:
+        terms = {term.lower() for term in question.split() if len(term) > 2}
+        scored = [
+            (sum(term in chunk["content"].lower() for term in terms), chunk)
+            for chunk in self.chunks
+        ]
+        ranked = [chunk for score, chunk in sorted(scored, key=lambda s: -s[0]) if score > 0]
+        return ranked[:top_k]
+
+
+def seed_sqlite(database_url: str, students: int = 2000):
+    """Creates the dashboard tables (subset of init.sql) with deterministic data."""
+    engine = create_engine(database_url)
+    courses = ["Ingegneria Informatica", "Economia e Commercio", "Medicina e Chirurgia", "Scienze Agrarie"]
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE corsi_laurea (id INTEGER PRIMARY KEY, nome TEXT, tipo_laurea TEXT)"))
+        conn.execute(text("""
+            CREATE TABLE studenti (
+                id INTEGER PRIMARY KEY, matricola TEXT, nome TEXT, cognome TEXT,
+                corso_laurea_id INTEGER, anno_iscrizione INTEGER, status TEXT
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE dashboard_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, user_query TEXT, generated_sql TEXT,
+                context_json TEXT, generated_ejs TEXT, sql_template TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE page_summaries (
+                content_hash TEXT NOT NULL, model TEXT NOT NULL, source_url TEXT, summary TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (content_hash, model)
+            )
+        """))
+        conn.execute(text("""
+            CREATE VIEW mv_iscrizioni AS
+            SELECT s.anno_iscrizione, c.id AS corso_laurea_id, c.nome AS corso_laurea, c.tipo_laurea, s.status,
+                   COUNT(*) AS studenti
+            FROM studenti s JOIN corsi_laurea c ON c.id = s.corso_laurea_id
+            GROUP BY s.anno_iscrizione, c.id, s.status
+        """))
+        conn.execute(
+            text("INSERT INTO corsi_laurea (id, nome, tipo_laurea) VALUES (:id, :nome, 'Triennale')"),
+            [{"id": i + 1, "nome": name} for i, name in enumerate(courses)]
+        )
+        conn.execute(
+            text("""
+                INSERT INTO studenti (id, matricola, nome, cognome, corso_laurea_id, anno_iscrizione, status)
+                VALUES (:id, :matricola, 'Nome', 'Cognome', :corso, :anno, 'ATTIVO')
+            """),
+            [
+                {"id": i, "matricola": f"S{i:06d}", "corso": i % len(courses) + 1, "anno": 2018 + i % 7}
+                for i in range(1, students + 1)
+            ]
+        )
+    engine.dispose()
@@ -0,0 +1,94 @@
+"""Import-time budget for the shared utilities, the CLI scripts and the ai-service.
+
+Each module is imported in a fresh interpreter with `python -X importtime` and
+the cumulative time of the imports it triggers (interpreter startup excluded) is
+compared with its budget. The best of `--repeat` runs is kept; the command exits
+with code 1 when a module is over budget.
+
+    python -m benchmarks.importtime
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent
+INFERENCE_DIR = ROOT_DIR / "src" / "inference"
+
+# Budgets in ms. Heavy dependencies (NLTK, scikit-learn, gensim, matplotlib,
+# LangChain) must be imported on first use, not by these modules.
+BUDGETS_MS = {
+    "utils.config": 100,
+    "utils.logger": 100,
+    "utils.utils": 150,
+    "utils.feature_extraction": 250,
+    "utils.model_trainer": 250,
+    "utils.text_preprocessing": 500,
+    "utils.chunking": 100,
+    "scripts.predict": 150,
+    "scripts.train_pipeline": 150,
+    # ai-service entry point (FastAPI, SQLAlchemy, httpx, prometheus_client)
+    "main": 1000,
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Top-level imports -> cumulative microseconds."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        # Nested imports are indented below the module that triggered them
+        if not package.startswith("  "):
+            imports[package.strip()] = int(cumulative)
+    return imports
+
+
+def run_importtime(statement: str) -> Dict[str, int]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT_DIR), str(INFERENCE_DIR)])}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def measure(module: str, startup: Set[str], repeat: int) -> Tuple[Optional[float], Optional[str]]:
+    try:
+        run_importtime(f"import {module}")  # compiles the .pyc files
+        runs = [run_importtime(f"import {module}") for _ in range(repeat)]
+    except RuntimeError as e:
+        return None, str(e)
+    best = min(sum(us for name, us in imports.items() if name not in startup) for imports in runs)
+    return round(best / 1000, 1), None
+
+
+def main(args) -> int:
+    startup = set(run_importtime("pass"))
+    modules = args.modules or list(BUDGETS_MS)
+
+    results, over_budget = {}, []
+    for module in modules:
+        ms, error = measure(module, startup, args.repeat)
+        budget = BUDGETS_MS.get(module)
+        results[module] = {"ms": ms, "budget_ms": budget}
+        if error:
+            results[module]["error"] = error
+        elif budget is not None and ms > budget:
+            over_budget.append(f"{module}: {ms}ms > {budget}ms")
+
+    print(json.dumps({"results": results, "over_budget": over_budget}, indent=2))
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("modules", nargs="*", help="Modules to check (default: all budgeted modules)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module (best is kept)")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+"""Microbenchmarks for the NLP utilities used by training and classification.
+
+Every benchmark is timed over `--repeat` runs (best time kept) and run once more
+under tracemalloc for its peak memory. Results are compared with the baselines
+in `benchmarks/baselines/micro.json`: the run fails (exit code 1) when a time or
+peak memory grows beyond the threshold. `--update` records the current results
+as the new baselines.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only tfidf --update
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import pandas as pd
+
+from utils.text_preprocessing import TextPreprocessor
+from utils.feature_extraction import FeatureExtractor
+from utils.model_trainer import ModelTrainer
+
+CORPUS_PATH = ROOT_DIR / "data" / "raw" / "Sentiment" / "Generic_Text" / "train.txt"
+BASELINES_PATH = Path(__file__).parent / "baselines" / "micro.json"
+TFIDF_MAX_FEATURES = [500, 1000, 5000]
+MODEL_TYPES = ["naive_bayes", "logistic_regression", "svm", "random_forest"]
+
+
+def load_corpus(sample: int) -> pd.DataFrame:
+    """First `sample` lines of the bundled sentiment corpus (`text;label`)."""
+    df = pd.read_csv(CORPUS_PATH, sep=";", names=["text", "label"], nrows=sample)
+    return df.dropna()
+
+
+def build_benchmarks(df: pd.DataFrame, language: str) -> List[Tuple[str, Callable[[], Any]]]:
+    # Stemming instead of lemmatization: no WordNet data needed, same code path as the service
+    preprocessor = TextPreprocessor(language=language, use_lemmatization=False)
+    texts = df["text"].tolist()
+    cleaned = [preprocessor.clean_text(t) for t in texts]
+    processed = preprocessor.preprocess_dataframe(df, "text")
+
+    extractor = FeatureExtractor()
+    X, _ = extractor.extract_tfidf(processed["processed_text"].tolist(), max_features=1000)
+    y = processed["label"].values
+    tokens = processed["tokens"].tolist()
+    extractor.train_word2vec(tokens, workers=1, seed=42)
+
+    benchmarks = [
+        ("clean_text", lambda: [preprocessor.clean_text(t) for t in texts]),
+        ("tokenize", lambda: [preprocessor.tokenize(t) for t in cleaned]),
+        ("preprocess", lambda: [preprocessor.preprocess(t) for t in texts]),
+        ("preprocess_dataframe", lambda: preprocessor.preprocess_dataframe(df, "text")),
+    ]
+    for max_features in TFIDF_MAX_FEATURES:
+        benchmarks.append((
+            f"extract_tfidf[max_features={max_features}]",
+            lambda m=max_features: FeatureExtractor().extract_tfidf(processed["processed_text"].tolist(), max_features=m),
+        ))
+    benchmarks.append(("get_document_vector", lambda: [extractor.get_document_vector(t) for t in tokens]))
+    for model_type in MODEL_TYPES:
+        benchmarks.append((f"train[{model_type}]", lambda m=model_type: ModelTrainer(m).train(X, y)))
+    return benchmarks
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time_s": round(min(times), 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def compare(name: str, result: Dict[str, float], baseline: Dict[str, float], time_threshold: float, memory_threshold: float) -> List[str]:
+    regressions = []
+    for metric, threshold in (("time_s", time_threshold), ("peak_mb", memory_threshold)):
+        reference = baseline.get(metric)
+        if reference and result[metric] > reference * (1 + threshold):
+            regressions.append(f"{name}: {metric} {result[metric]} > baseline {reference} (+{threshold:.0%})")
+    return regressions
+
+
+def main(args) -> int:
+    logging.getLogger("allmand").setLevel(logging.WARNING)
+    df = load_corpus(args.sample)
+    benchmarks = [
+        (name, fn) for name, fn in build_benchmarks(df, args.language)
+        if not args.only or any(pattern in name for pattern in args.only)
+    ]
+
+    stored = json.loads(BASELINES_PATH.read_text(encoding="utf-8")) if BASELINES_PATH.exists() else {}
+    baselines = stored.get("results", {})
+
+    results, regressions = {}, []
+    for name, fn in benchmarks:
+        results[name] = measure(fn, args.repeat)
+        if name in baselines:
+            regressions += compare(name, results[name], baselines[name], args.time_threshold, args.memory_threshold)
+        print(f"{name:45s} {results[name]['time_s']:9.4f}s {results[name]['peak_mb']:9.2f}MB", file=sys.stderr)
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()},
+        "config": {"sample": args.sample, "repeat": args.repeat, "language": args.language},
+        "results": results,
+        "regressions": regressions,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.update:
+        BASELINES_PATH.parent.mkdir(parents=True, exist_ok=True)
+        stored_results = {**baselines, **results}
+        BASELINES_PATH.write_text(
+            json.dumps({"machine": report["machine"], "config": report["config"], "results": stored_results}, indent=2) + "\n",
+            encoding="utf-8"
+        )
+        return 0
+    if stored and stored.get("config") != report["config"]:
+        print("WARN: baselines were recorded with a different configuration", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NLP utilities microbenchmarks")
+    parser.add_argument("--sample", type=int, default=4000, help="Corpus lines used")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument("--language", type=str, default="english", help="Language of the bundled corpus")
+    parser.add_argument("--only", nargs="*", help="Run only benchmarks whose name contains one of these")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed relative peak memory growth")
+    parser.add_argument("--update", action="store_true", help="Store the results as the new baselines")
+    sys.exit(main(parser.parse_args()))
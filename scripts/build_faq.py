@@ -0,0 +1,96 @@
+"""Builds the precomputed FAQ answers served by the ai-service (`faq_answers`).
+
+The canonical questions of every intent in `generate_dataset.INTENT_TEMPLATES`
+(except "irrelevant"), plus `--paraphrases` rewordings generated by the small
+Ollama model, go through the legacy RAG pipeline, `--concurrency` at a time.
+Run it in the ai-service container once the crawler has ingested the pages:
+
+    docker-compose exec ai-service python scripts/build_faq.py --paraphrases 2
+
+Afterwards the service regenerates the answers whose source pages change.
+"""
+import os
+import sys
+from pathlib import Path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+# main.py is in /app in the container, in src/inference in the repository
+sys.path.insert(0, str(ROOT_DIR / "src" / "inference"))
+
+import asyncio
+import argparse
+from typing import List, Tuple
+
+from scripts.generate_dataset import INTENT_TEMPLATES
+from utils.logger import LOG_FILE, configure_logging, logger
+
+
+async def collect_questions(main, intents: List[str], paraphrases: int) -> List[Tuple[str, str]]:
+    questions = [(intent, question) for intent in intents for question in INTENT_TEMPLATES[intent]]
+    if not paraphrases:
+        return questions
+
+    async def expand(intent: str, question: str) -> List[Tuple[str, str]]:
+        try:
+            rewordings = await main.ollama_client.paraphrase(question, paraphrases)
+        except Exception as e:
+            logger.warning(f"Paraphrasing failed for '{question}': {e}")
+            rewordings = []
+        return [(intent, question)] + [(intent, rewording) for rewording in rewordings]
+
+    expanded = await asyncio.gather(*(expand(intent, question) for intent, question in questions))
+    return [item for group in expanded for item in group]
+
+
+async def build(args) -> int:
+    # The FAQ refresher of the service is not needed in this process
+    os.environ["LEGACY_FAQ"] = "false"
+    import main
+    from faq_store import FaqStore
+
+    store = FaqStore()
+    async with main.app.router.lifespan_context(main.app):
+        if not main.ollama_client:
+            logger.error("Ollama is not available")
+            return 1
+
+        if args.stale_only:
+            await asyncio.to_thread(store.refresh)
+            questions = [(entry["intent"], entry["question"]) for entry in store.stale]
+        else:
+            intents = args.intents or [intent for intent in INTENT_TEMPLATES if intent != "irrelevant"]
+            questions = await collect_questions(main, intents, args.paraphrases)
+        logger.info(f"Answering {len(questions)} questions...")
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        stored, skipped = 0, 0
+
+        async def answer(intent: str, question: str):
+            nonlocal stored, skipped
+            async with semaphore:
+                try:
+                    result = await main.build_faq_answer(question)
+                except Exception as e:
+                    logger.warning(f"Failed '{question}': {e}")
+                    result = None
+            if result is None:
+                skipped += 1
+                return
+            answer_text, source_urls = result
+            await asyncio.to_thread(store.put, intent, question, answer_text, source_urls, main.QA_MODEL)
+            stored += 1
+
+        await asyncio.gather(*(answer(intent, question) for intent, question in questions))
+
+    logger.info(f"FAQ answers stored: {stored}, skipped (nothing retrieved or failed): {skipped}")
+    return 0
+
+
+if __name__ == "__main__":
+    configure_logging(log_file=LOG_FILE)
+    parser = argparse.ArgumentParser(description="Build the precomputed FAQ answers")
+    parser.add_argument("--intents", nargs="*", help="Intents to build (default: all but 'irrelevant')")
+    parser.add_argument("--paraphrases", type=int, default=2, help="Generated rewordings per canonical question")
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions answered in parallel")
+    parser.add_argument("--stale-only", action="store_true", help="Only regenerate the answers whose sources changed")
+    sys.exit(asyncio.run(build(parser.parse_args())))
@@ -30,6 +30,8 @@ pull_model() {
 # Note: If 'qwen3' is not available in the registry, this will return an error JSON.
 pull_model "qwen3:0.6b"
 pull_model "qwen3:1.7b"
+# Embedding model for rag_documents (768-dim vectors)
+pull_model "nomic-embed-text"
 
 echo "----------------------------------------------------------------"
 echo "All operations finished."
@@ -2,8 +2,8 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.config import config
-from src.logger import logger
+from utils.config import config
+from utils.logger import LOG_FILE, configure_logging, logger
 
 
 def create_directory_structure():
@@ -119,4 +119,5 @@ def main():
 
 
 if __name__ == "__main__":
+    configure_logging(log_file=LOG_FILE)
     main()
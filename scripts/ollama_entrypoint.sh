@@ -19,6 +19,9 @@ ollama pull qwen3:0.6b
 echo "Pulling qwen3:1.7b..."
 ollama pull qwen3:1.7b
 
+echo "Pulling nomic-embed-text..."
+ollama pull nomic-embed-text
+
 echo "🟢 Models ready!"
 
 # Wait for Ollama process to finish.
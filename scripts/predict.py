@@ -2,27 +2,164 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import os
+import time
 import argparse
-import pandas as pd
+from typing import Iterator, List
 
-from src.config import config
-from src.logger import logger
-from src.text_preprocessing import TextPreprocessor
-from src.model_trainer import ModelTrainer
-from src.utils import load_object
+from utils.config import config
+from utils.logger import LOG_FILE, configure_logging, logger
+
+
+# Per-process preprocessor of the pool workers (see _init_worker)
+_preprocessor = None
+
+
+def _init_worker(language: str):
+    global _preprocessor
+    from utils.text_preprocessing import TextPreprocessor
+    _preprocessor = TextPreprocessor(language=language)
+
+
+def _preprocess_batch(texts: List[str]) -> List[str]:
+    return [_preprocessor.preprocess(text) for text in texts]
+
+
+def file_format(path: Path) -> str:
+    suffix = path.suffix.lower().lstrip(".")
+    formats = {"csv": "csv", "parquet": "parquet", "pq": "parquet", "jsonl": "jsonl", "ndjson": "jsonl"}
+    if suffix not in formats:
+        raise ValueError(f"Unsupported file format: {path} (use .csv, .parquet or .jsonl)")
+    return formats[suffix]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise ImportError("Parquet files require pyarrow: pip install pyarrow")
+
+
+def iter_texts(path: Path, column: str, chunk_size: int) -> Iterator[List[str]]:
+    """Texts of the input file, `chunk_size` at a time (only `column` is read)."""
+    from utils.data_loader import DataLoader
+
+    file_format(path)
+    for chunk in DataLoader.iter_chunks(path, chunk_size, columns=[column]):
+        yield chunk[column].tolist()
+
+
+class PredictionWriter:
+    """Appends the predictions of each chunk to the output file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.format = file_format(path)
+        self._parquet = None
+        self._started = False
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, df):
+        if self.format == "csv":
+            df.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        elif self.format == "jsonl":
+            with open(self.path, "a" if self._started else "w", encoding="utf-8") as f:
+                df.to_json(f, orient="records", lines=True, force_ascii=False)
+        else:
+            pyarrow = _pyarrow()
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def predict_chunk(model, vectorizer, texts: List[str], processed: List[str]):
+    import pandas as pd
+
+    X = vectorizer.transform(processed)
+    output_df = pd.DataFrame({"text": texts, "prediction": model.predict(X)})
+    if hasattr(model, "predict_proba"):
+        probabilities = model.predict_proba(X)
+        for i in range(probabilities.shape[1]):
+            output_df[f"prob_class_{i}"] = probabilities[:, i]
+    return output_df
+
+
+def predict_bulk(args, model, vectorizer) -> int:
+    """Streams the input file through the model, in constant memory.
+
+    Chunks are preprocessed by a process pool (NLTK tokenization and stemming
+    are the bottleneck) while the main process vectorizes, predicts and writes
+    the previous chunk, so at most two chunks are in memory.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = args.workers or os.cpu_count() or 1
+    writer = PredictionWriter(args.output_file)
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(args.language,)) if workers > 1 else None
+    if pool is None:
+        _init_worker(args.language)
+
+    def submit(texts: List[str]):
+        if pool is None:
+            return texts, [_preprocess_batch(texts)]
+        # One batch per worker, so the whole chunk is processed in parallel
+        size = -(-len(texts) // workers)
+        return texts, [pool.submit(_preprocess_batch, texts[i:i + size]) for i in range(0, len(texts), size)]
+
+    def finish(pending) -> int:
+        texts, batches = pending
+        processed = [text for batch in batches for text in (batch if pool is None else batch.result())]
+        writer.write(predict_chunk(model, vectorizer, texts, processed))
+        return len(texts)
+
+    total, start = 0, time.perf_counter()
+    pending = None
+    try:
+        for texts in iter_texts(args.input_file, args.text_column, args.chunk_size):
+            current = submit(texts)
+            if pending:
+                total += finish(pending)
+                logger.info(f"Scored {total} rows ({total / (time.perf_counter() - start):.0f} rows/s)")
+            pending = current
+        if pending:
+            total += finish(pending)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    logger.info(f"Predictions for {total} rows saved to {args.output_file} in {time.perf_counter() - start:.1f}s")
+    return total
 
 
 def main(args):
+    # Imported here so that --help and argument errors return immediately
+    from utils.text_preprocessing import TextPreprocessor
+    from utils.model_trainer import ModelTrainer
+    from utils.utils import load_object
+
     logger.info("Loading model and vectorizer...")
     
     model = ModelTrainer.load_model(args.model_path)
     vectorizer = load_object(args.vectorizer_path)
+
+    # Bulk scoring: stream the file to the output, no per-row console output
+    if args.input_file and args.output_file:
+        predict_bulk(args, model, vectorizer)
+        return
     
     if args.input_text:
         texts = [args.input_text]
     elif args.input_file:
-        df = pd.read_csv(args.input_file)
-        texts = df[args.text_column].tolist()
+        texts = [text for chunk in iter_texts(args.input_file, args.text_column, args.chunk_size) for text in chunk]
     else:
         raise ValueError("Either --input-text or --input-file must be provided")
     
@@ -56,16 +193,7 @@ def main(args):
     print("=" * 50)
     
     if args.output_file:
-        output_df = pd.DataFrame({
-            'text': texts,
-            'prediction': predictions
-        })
-        
-        if probabilities is not None:
-            for i in range(probabilities.shape[1]):
-                output_df[f'prob_class_{i}'] = probabilities[:, i]
-        
-        output_df.to_csv(args.output_file, index=False)
+        PredictionWriter(args.output_file).write(predict_chunk(model, vectorizer, texts, processed_texts))
         logger.info(f"Predictions saved to {args.output_file}")
 
 
@@ -92,7 +220,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "--input-file",
         type=Path,
-        help="CSV file with texts to predict"
+        help="File with texts to predict (.csv, .parquet or .jsonl)"
     )
     parser.add_argument(
         "--text-column",
@@ -103,7 +231,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "--output-file",
         type=Path,
-        help="Output CSV file for predictions"
+        help="Output file for predictions (.csv, .parquet or .jsonl); with --input-file, rows are streamed to it chunk by chunk"
     )
     parser.add_argument(
         "--language",
@@ -111,6 +239,19 @@ if __name__ == "__main__":
         default="italian",
         help="Language for preprocessing"
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=50000,
+        help="Rows read, preprocessed and scored at a time"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Preprocessing processes for bulk scoring (default: CPU count)"
+    )
     
     args = parser.parse_args()
+    configure_logging(log_file=LOG_FILE)
     main(args)
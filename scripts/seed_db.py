@@ -152,6 +152,16 @@ def seed_data():
                 conn.commit()
 
     conn.commit()
+
+    # 6. Statistiche pre-aggregate (viste materializzate di init.sql)
+    try:
+        cur.execute("SELECT refresh_statistiche();")
+        conn.commit()
+        print("Viste statistiche aggiornate.")
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Viste statistiche non aggiornate (database creato con un init.sql precedente?): {e}")
+
     cur.close()
     conn.close()
     print("Seeding completato con successo!")
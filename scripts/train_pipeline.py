@@ -15,9 +15,7 @@ from pathlib import Path
 # Let's check where we are.
 sys.path.append("/app")
 
-import pandas as pd
 import argparse
-from sklearn.model_selection import train_test_split
 
 # Adjust imports based on the actual structure in the container.
 # The utils folder contains the modules directly (config.py, logger.py, etc.)
@@ -31,15 +29,19 @@ from sklearn.model_selection import train_test_split
 # So the correct import is 'from utils.config import config'
 
 from utils.config import config
-from utils.logger import logger
-from utils.data_loader import DataLoader
-from utils.text_preprocessing import TextPreprocessor
-from utils.feature_extraction import FeatureExtractor
-from utils.model_trainer import ModelTrainer
-from utils.utils import save_object
+from utils.logger import LOG_FILE, configure_logging, logger
 
 
 def main(args):
+    # Heavy dependencies (pandas, NLTK, scikit-learn) are imported here so that
+    # --help and argument errors return immediately
+    from sklearn.model_selection import train_test_split
+    from utils.data_loader import DataLoader
+    from utils.text_preprocessing import TextPreprocessor
+    from utils.feature_extraction import FeatureExtractor
+    from utils.model_trainer import ModelTrainer
+    from utils.utils import save_object
+
     config.ensure_directories()
     
     logger.info("=" * 50)
@@ -48,7 +50,8 @@ def main(args):
     
     logger.info(f"Loading data from {args.input_file}")
     loader = DataLoader()
-    df = loader.load_csv(args.input_file)
+    # Labels as categories: one small integer per row instead of a string object
+    df = loader.load(args.input_file, dtype={args.label_column: "category"})
     
     logger.info(f"Preprocessing text (language: {args.language})")
     preprocessor = TextPreprocessor(
@@ -127,7 +130,7 @@ if __name__ == "__main__":
         "--input-file",
         type=str,
         required=True,
-        help="Path to input CSV file"
+        help="Path to input file (CSV, JSON Lines, Parquet or Feather)"
     )
     parser.add_argument(
         "--text-column",
@@ -194,4 +197,5 @@ if __name__ == "__main__":
     parser.set_defaults(lemmatization=True, remove_stopwords=True)
     
     args = parser.parse_args()
+    configure_logging(log_file=LOG_FILE)
     main(args)
@@ -0,0 +1,350 @@
+import os
+import json
+import time
+import math
+import base64
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+from utils.scraper import WebScraper
+
+logger = logging.getLogger(__name__)
+
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "2"))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "5000"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_DEFAULT_DELAY = float(os.getenv("CRAWL_DEFAULT_DELAY", "0.5"))
+CRAWL_STATE_PATH = os.getenv("CRAWL_STATE_PATH", "/app/data/processed/crawl_state.json")
+# Above this many URLs the exact seen-set is replaced by a Bloom filter
+SEEN_SET_EXACT_LIMIT = int(os.getenv("SEEN_SET_EXACT_LIMIT", "100000"))
+USER_AGENT = "ALLMondCrawler"
+# Responses meaning the page no longer exists (its chunks are removed from the index)
+GONE_STATUS_CODES = (404, 410)
+
+SKIPPED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".zip", ".rar", ".7z", ".mp3", ".mp4", ".avi", ".doc", ".docx", ".xls", ".xlsx", ".pdf",
+)
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """Canonical form used for dedup: lowercase host, no fragment/default port/tracking params."""
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if parts.port and not (
+        (parts.scheme == "http" and parts.port == 80) or (parts.scheme == "https" and parts.port == 443)
+    ):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((parts.scheme.lower(), host, parts.path or "/", query, ""))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on sha256)."""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001, bits: Optional[bytes] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos // 8] |= 1 << (pos % 8)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+
+class SeenSet:
+    """Exact set of visited URLs that switches to a Bloom filter once it grows large."""
+
+    def __init__(self, exact_limit: int = SEEN_SET_EXACT_LIMIT):
+        self.exact_limit = exact_limit
+        self.exact: Optional[Set[str]] = set()
+        self.bloom: Optional[BloomFilter] = None
+        self.count = 0
+
+    def add(self, url: str):
+        self.count += 1
+        if self.bloom is not None:
+            self.bloom.add(url)
+            return
+        self.exact.add(url)
+        if len(self.exact) > self.exact_limit:
+            self.bloom = BloomFilter(capacity=self.exact_limit * 10)
+            for seen in self.exact:
+                self.bloom.add(seen)
+            self.exact = None
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.bloom if self.bloom is not None else url in self.exact
+
+    def to_dict(self) -> Dict:
+        if self.bloom is not None:
+            return {
+                "count": self.count,
+                "bloom": base64.b64encode(bytes(self.bloom.bits)).decode("ascii"),
+                "capacity": self.bloom.capacity,
+                "error_rate": self.bloom.error_rate,
+            }
+        return {"count": self.count, "exact": sorted(self.exact)}
+
+    @classmethod
+    def from_dict(cls, data: Dict, exact_limit: int = SEEN_SET_EXACT_LIMIT) -> "SeenSet":
+        seen = cls(exact_limit)
+        seen.count = data.get("count", 0)
+        if "bloom" in data:
+            seen.bloom = BloomFilter(data["capacity"], data["error_rate"], base64.b64decode(data["bloom"]))
+            seen.exact = None
+        else:
+            seen.exact = set(data.get("exact", []))
+        return seen
+
+
+class RobotsCache:
+    """robots.txt rules and crawl-delay per host, fetched once per crawl."""
+
+    def __init__(self, user_agent: str = USER_AGENT):
+        self.user_agent = user_agent
+        self._parsers: Dict[str, Optional[RobotFileParser]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def _parser(self, url: str) -> Optional[RobotFileParser]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            if origin not in self._parsers:
+                parser = RobotFileParser(f"{origin}/robots.txt")
+                try:
+                    await asyncio.to_thread(parser.read)
+                except Exception as e:
+                    logger.warning(f"robots.txt unavailable for {origin}: {e}")
+                    parser = None
+                self._parsers[origin] = parser
+        return self._parsers[origin]
+
+    async def can_fetch(self, url: str) -> bool:
+        parser = await self._parser(url)
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    async def crawl_delay(self, url: str) -> Optional[float]:
+        parser = await self._parser(url)
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+
+class FrontierCrawler:
+    """Breadth-first crawler over a URL frontier.
+
+    Follows links up to `max_depth` within `allowed_domains`, dedups normalized
+    URLs, honors robots.txt and crawl-delay per host, and periodically persists
+    the queue and seen-set to `state_path` so an interrupted crawl resumes where
+    it stopped instead of starting over.
+
+    After a crawl, `gone` holds the URLs found deleted (404/410) or disallowed
+    by robots.txt, `failed` the ones that could not be fetched this time, and
+    `complete` tells whether the crawl covered the whole frontier from the
+    seeds (not resumed, not cut by `max_pages`).
+    """
+
+    def __init__(
+        self,
+        seeds: List[str],
+        max_depth: int = CRAWL_MAX_DEPTH,
+        allowed_domains: Optional[List[str]] = None,
+        max_pages: int = CRAWL_MAX_PAGES,
+        concurrency: int = CRAWL_CONCURRENCY,
+        state_path: Optional[str] = CRAWL_STATE_PATH,
+    ):
+        self.seeds = seeds
+        self.max_depth = max_depth
+        self.allowed_domains = allowed_domains or sorted({urlsplit(u).hostname for u in seeds if urlsplit(u).hostname})
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.state_path = Path(state_path) if state_path else None
+        self.robots = RobotsCache()
+        self.queue: deque = deque()
+        self.seen = SeenSet()
+        self.pages_crawled = 0
+        self.gone: Set[str] = set()
+        self.failed: Set[str] = set()
+        self.complete = False
+        self._in_flight: Dict[str, int] = {}
+        self._next_fetch: Dict[str, float] = {}
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+
+    def in_scope(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        if not any(host == d or host.endswith("." + d) for d in self.allowed_domains):
+            return False
+        return not urlsplit(url).path.lower().endswith(SKIPPED_EXTENSIONS)
+
+    def _enqueue(self, url: str, depth: int):
+        normalized = normalize_url(url)
+        if normalized and normalized not in self.seen and self.in_scope(normalized):
+            self.seen.add(normalized)
+            self.queue.append((normalized, depth))
+
+    def reset(self):
+        self.queue.clear()
+        self._in_flight.clear()
+        self.seen = SeenSet()
+        self.pages_crawled = 0
+        for url in self.seeds:
+            self._enqueue(url, 0)
+
+    def status(self) -> Dict:
+        return {
+            "queued": len(self.queue),
+            "in_flight": len(self._in_flight),
+            "seen": self.seen.count,
+            "pages_crawled": self.pages_crawled,
+            "max_depth": self.max_depth,
+            "allowed_domains": self.allowed_domains,
+        }
+
+    def load_state(self) -> bool:
+        """Restores an unfinished crawl; returns False if there is nothing to resume."""
+        if not self.state_path or not self.state_path.exists():
+            return False
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable crawl state {self.state_path}: {e}")
+            return False
+        if not state.get("queue"):
+            return False
+        self._in_flight.clear()
+        self.queue = deque((url, depth) for url, depth in state["queue"])
+        self.seen = SeenSet.from_dict(state["seen"])
+        self.pages_crawled = state.get("pages_crawled", 0)
+        logger.info(f"Resuming crawl: {len(self.queue)} URLs queued, {self.pages_crawled} already crawled")
+        return True
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        # In-flight URLs go back to the head of the queue: they were not crawled yet
+        state = {
+            "queue": list(self._in_flight.items()) + list(self.queue),
+            "seen": self.seen.to_dict(),
+            "pages_crawled": self.pages_crawled,
+            "saved_at": time.time(),
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        tmp_path.replace(self.state_path)
+
+    async def _wait_turn(self, url: str):
+        """Spaces out requests to the same host by its crawl-delay."""
+        host = urlsplit(url).netloc
+        delay = await self.robots.crawl_delay(url)
+        delay = CRAWL_DEFAULT_DELAY if delay is None else delay
+        async with self._host_locks.setdefault(host, asyncio.Lock()):
+            wait = self._next_fetch.get(host, 0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_fetch[host] = time.monotonic() + delay
+
+    def extract_links(self, url: str, html: str) -> List[str]:
+        scraper = WebScraper(base_url=url)
+        return scraper.extract_links(scraper.parse_html(html))
+
+    async def crawl(self, crawler, save_every: int = 50) -> AsyncIterator[Tuple[str, str, int]]:
+        """Yields (url, markdown, depth) for every successfully crawled page."""
+        resumed = self.load_state()
+        if not resumed:
+            self.reset()
+        self.gone = set()
+        self.failed = set()
+        self.complete = False
+
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def fetch(url: str, depth: int):
+            try:
+                if not await self.robots.can_fetch(url):
+                    logger.debug(f"Blocked by robots.txt: {url}")
+                    self.gone.add(url)
+                    await results.put((url, None, depth, []))
+                    return
+                await self._wait_turn(url)
+                result = await crawler.arun(url=url)
+                if getattr(result, "status_code", None) in GONE_STATUS_CODES:
+                    logger.info(f"Page gone ({result.status_code}): {url}")
+                    self.gone.add(url)
+                    await results.put((url, None, depth, []))
+                    return
+                if not result.success:
+                    raise ValueError(result.error_message)
+                links = []
+                if depth < self.max_depth:
+                    # BeautifulSoup parsing is CPU-bound: keep it off the event loop
+                    links = await asyncio.to_thread(self.extract_links, url, result.html or "")
+                await results.put((url, str(result.markdown or ""), depth, links))
+            except Exception as e:
+                logger.warning(f"Crawl failed for {url}: {e}")
+                self.failed.add(url)
+                await results.put((url, None, depth, []))
+
+        tasks = set()
+        try:
+            while self.queue or self._in_flight:
+                while (
+                    self.queue
+                    and len(self._in_flight) < self.concurrency
+                    and self.pages_crawled + len(self._in_flight) < self.max_pages
+                ):
+                    url, depth = self.queue.popleft()
+                    self._in_flight[url] = depth
+                    tasks.add(asyncio.create_task(fetch(url, depth)))
+                if not self._in_flight:
+                    break
+
+                url, markdown, depth, links = await results.get()
+                self._in_flight.pop(url, None)
+                tasks = {t for t in tasks if not t.done()}
+                for link in links:
+                    self._enqueue(link, depth + 1)
+                if markdown is None:
+                    continue
+
+                self.pages_crawled += 1
+                if self.pages_crawled % save_every == 0:
+                    self.save_state()
+                yield url, markdown, depth
+        except BaseException:
+            # Interrupted (shutdown, error): persist what is left to resume later
+            self.save_state()
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # Crawl completed: clear the queue so the next run starts from the seeds
+        self.complete = not resumed and not self.queue
+        self.queue.clear()
+        self.save_state()
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import create_engine, text
+from crawl4ai import AsyncWebCrawler
+from frontier import FrontierCrawler
+from utils.chunking import MarkdownChunker
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+CRAWL_INTERVAL_SECONDS = int(os.getenv("CRAWL_INTERVAL_SECONDS", "3600"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    """Writes crawled pages into `rag_documents`, one row per chunk."""
+
+    def __init__(self, database_url: str = DATABASE_URL):
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+
+    def get_page_hashes(self) -> Dict[str, str]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT DISTINCT ON (source_url) source_url, metadata->>'content_hash'
+                FROM rag_documents
+                WHERE source_url IS NOT NULL
+                ORDER BY source_url, id
+            """)).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def delete_pages(self, urls: List[str]) -> int:
+        """Removes every chunk of the given pages; returns the number of chunks removed."""
+        if not urls:
+            return 0
+        with self.engine.begin() as conn:
+            return conn.execute(
+                text("DELETE FROM rag_documents WHERE source_url = ANY(CAST(:urls AS TEXT[]))"), {"urls": urls}
+            ).rowcount
+
+    def replace_page(self, url: str, page_hash: str, chunks: Iterable[Dict]) -> int:
+        # Delete + insert in one transaction: readers never see a half-updated page.
+        # New rows have a NULL embedding, computed later only for these chunks.
+        # Chunks are consumed as they are generated, never materialized as a list.
+        crawled_at = datetime.utcnow().isoformat()
+        written = 0
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM rag_documents WHERE source_url = :u"), {"u": url})
+            for chunk in chunks:
+                metadata = {
+                    **chunk["metadata"],
+                    "content_hash": page_hash,
+                    "chunk_hash": content_hash(chunk["content"]),
+                    "crawled_at": crawled_at,
+                }
+                conn.execute(
+                    text("""
+                        INSERT INTO rag_documents (source_url, content, metadata)
+                        VALUES (:u, :c, CAST(:m AS JSONB))
+                    """),
+                    {"u": url, "c": chunk["content"], "m": json.dumps(metadata, ensure_ascii=False)}
+                )
+                written += 1
+        return written
+
+
+class IngestScheduler:
+    """Periodically crawls the URL frontier and upserts changed pages into `rag_documents`.
+
+    The frontier starts from the seed URLs and follows links breadth-first (see
+    `FrontierCrawler`). Pages whose content hash matches the stored one are
+    skipped, so only changed pages are re-chunked (and re-embedded).
+
+    Stored pages that dropped out of the crawl are removed: after a complete
+    crawl every stored page that was neither crawled nor failed with a
+    transient error, otherwise (page limit, resumed crawl) only the pages
+    found gone (404/410, robots.txt). A crawl that yields no page at all
+    removes nothing.
+    """
+
+    def __init__(self, urls: List[str], interval: int = CRAWL_INTERVAL_SECONDS, store: Optional[DocumentStore] = None):
+        self.urls = urls
+        self.interval = interval
+        self.store = store or DocumentStore()
+        self.frontier = FrontierCrawler(urls)
+        self.chunker = MarkdownChunker(CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+        self._task: Optional[asyncio.Task] = None
+        # Run started on demand (POST /ingest/run): referenced so it is not garbage-collected
+        self._manual_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.status = {
+            "running": False,
+            "runs": 0,
+            "interval_seconds": interval,
+            "seeds": len(urls),
+            "last_run_started": None,
+            "last_run_finished": None,
+            "last_run_duration_seconds": None,
+            "next_run_at": None,
+            "pages_changed": 0,
+            "pages_unchanged": 0,
+            "pages_failed": 0,
+            "pages_removed": 0,
+            "chunks_written": 0,
+            "last_error": None,
+        }
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def trigger(self) -> bool:
+        """Starts a run in the background; False if one is already in progress."""
+        if self.status["running"] or (self._manual_task and not self._manual_task.done()):
+            return False
+        self._manual_task = asyncio.create_task(self.run_once())
+        self._manual_task.add_done_callback(self._manual_run_done)
+        return True
+
+    def _manual_run_done(self, task: asyncio.Task):
+        if task.cancelled():
+            logger.info("Manual ingest run cancelled")
+        elif task.exception():
+            logger.error(f"Manual ingest run failed: {task.exception()}")
+        else:
+            status = task.result()
+            logger.info(
+                f"Manual ingest run finished: {status['pages_changed']} pages changed, "
+                f"{status['chunks_written']} chunks written, error: {status['last_error']}"
+            )
+
+    async def stop(self):
+        for task in (self._task, self._manual_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._manual_task = None
+
+    async def _loop(self):
+        while True:
+            await self.run_once()
+            self.status["next_run_at"] = datetime.fromtimestamp(time.time() + self.interval).isoformat()
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Dict:
+        if self._lock.locked():
+            return self.status
+        async with self._lock:
+            started = time.perf_counter()
+            self.status.update({
+                "running": True,
+                "last_run_started": datetime.utcnow().isoformat(),
+                "pages_changed": 0,
+                "pages_unchanged": 0,
+                "pages_failed": 0,
+                "pages_removed": 0,
+                "chunks_written": 0,
+                "last_error": None,
+            })
+            try:
+                await self._ingest()
+            except Exception as e:
+                logger.error(f"Ingest run failed: {e}")
+                self.status["last_error"] = str(e)
+            finally:
+                self.status["running"] = False
+                self.status["runs"] += 1
+                self.status["last_run_finished"] = datetime.utcnow().isoformat()
+                self.status["last_run_duration_seconds"] = round(time.perf_counter() - started, 2)
+            return self.status
+
+    async def _ingest(self):
+        known_hashes = await asyncio.to_thread(self.store.get_page_hashes)
+        crawled = set()
+
+        async with AsyncWebCrawler(verbose=False) as crawler:
+            async for url, content, depth in self.frontier.crawl(crawler):
+                crawled.add(url)
+                if not content.strip():
+                    self.status["pages_failed"] += 1
+                    continue
+
+                page_hash = content_hash(content)
+                if known_hashes.get(url) == page_hash:
+                    self.status["pages_unchanged"] += 1
+                    continue
+
+                chunks = self.chunker.iter_chunks(content, source_url=url)
+                written = await asyncio.to_thread(self.store.replace_page, url, page_hash, chunks)
+                self.status["pages_changed"] += 1
+                self.status["chunks_written"] += written
+                logger.info(f"Ingested {url} (depth {depth}): {written} chunks")
+
+        await self._remove_dropped(set(known_hashes), crawled)
+
+    async def _remove_dropped(self, known: Set[str], crawled: Set[str]):
+        if not crawled:
+            # Site down, network error: an empty crawl must not wipe the index
+            logger.warning("No page crawled, no page removed")
+            return
+        # A timeout is not a deletion: those pages are kept until the next run
+        dropped = known - crawled - self.frontier.failed
+        if not self.frontier.complete:
+            # The pages not reached this run may still exist
+            dropped &= self.frontier.gone
+        removed = await asyncio.to_thread(self.store.delete_pages, sorted(dropped))
+        self.status["pages_removed"] = len(dropped)
+        if dropped:
+            logger.info(f"Removed {len(dropped)} pages no longer crawled ({removed} chunks)")
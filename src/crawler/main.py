@@ -1,11 +1,26 @@
-from fastapi import FastAPI, HTTPException
+import os
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 from typing import List, Optional
 import asyncio
 from crawl4ai import AsyncWebCrawler
+from ingest import IngestScheduler
+from utils.logger import REQUEST_ID_HEADER, configure_logging, get_request_id, set_request_id, reset_request_id
 
+configure_logging()
 app = FastAPI()
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Same request ID as the ai-service call that triggered the crawl
+    token = set_request_id(request.headers.get(REQUEST_ID_HEADER))
+    try:
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = get_request_id()
+        return response
+    finally:
+        reset_request_id(token)
+
 # Hardcoded UnivPM URLs
 UNIVPM_URLS = [
     "https://www.univpm.it/Entra/",
@@ -14,6 +29,24 @@ UNIVPM_URLS = [
     "https://www.univpm.it/Entra/Ricerca"
 ]
 
+# URL frontier of the background ingestion (comma-separated), defaults to the UnivPM pages
+CRAWL_FRONTIER = [u.strip() for u in os.getenv("CRAWL_FRONTIER", "").split(",") if u.strip()] or UNIVPM_URLS
+INGEST_ENABLED = os.getenv("INGEST_ENABLED", "true").lower() == "true"
+
+ingest_scheduler = None
+
+@app.on_event("startup")
+async def startup_event():
+    global ingest_scheduler
+    ingest_scheduler = IngestScheduler(CRAWL_FRONTIER)
+    if INGEST_ENABLED:
+        ingest_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if ingest_scheduler:
+        await ingest_scheduler.stop()
+
 class CrawlRequest(BaseModel):
     urls: Optional[List[str]] = None
 
@@ -42,6 +75,17 @@ async def crawl(request: CrawlRequest):
                 
     return {"results": results}
 
+@app.get("/ingest/status")
+def ingest_status():
+    return {**ingest_scheduler.status, "frontier": ingest_scheduler.frontier.status()}
+
+@app.post("/ingest/run")
+async def ingest_run():
+    """Triggers an ingestion run in the background, unless one is already in progress."""
+    if not ingest_scheduler.trigger():
+        return {"started": False, "status": ingest_scheduler.status}
+    return {"started": True}
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
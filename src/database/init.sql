@@ -54,20 +54,125 @@ CREATE TABLE esami (
     CONSTRAINT unique_esame_appello UNIQUE (studente_id, appello_id)
 );
 
+-- Indici sulle chiavi esterne usate dai JOIN (query generate e refresh delle viste)
+CREATE INDEX idx_studenti_corso_laurea ON studenti (corso_laurea_id);
+CREATE INDEX idx_insegnamenti_corso_laurea ON insegnamenti (corso_laurea_id);
+CREATE INDEX idx_appelli_insegnamento ON appelli (insegnamento_id);
+CREATE INDEX idx_esami_appello ON esami (appello_id);
+
+-- =========================================================
+-- 2. STATISTICHE PRE-AGGREGATE (Viste materializzate)
+-- =========================================================
+-- Le statistiche richieste più spesso alle dashboard (iscritti per anno e corso,
+-- media voti per insegnamento, esiti degli appelli) sono lette da queste viste
+-- invece di aggregare esami/appelli/insegnamenti/studenti a ogni richiesta.
+-- Aggiornate con refresh_statistiche(): dopo il seeding e periodicamente dal
+-- servizio AI (STATS_REFRESH_INTERVAL). L'indice UNIQUE serve al refresh CONCURRENTLY.
+
+-- Studenti per anno di iscrizione, corso di laurea e stato
+CREATE MATERIALIZED VIEW mv_iscrizioni AS
+SELECT s.anno_iscrizione,
+       c.id AS corso_laurea_id,
+       c.nome AS corso_laurea,
+       c.tipo_laurea,
+       s.status,
+       COUNT(*) AS studenti
+FROM studenti s
+JOIN corsi_laurea c ON c.id = s.corso_laurea_id
+GROUP BY s.anno_iscrizione, c.id, s.status;
+
+CREATE UNIQUE INDEX idx_mv_iscrizioni_key ON mv_iscrizioni (anno_iscrizione, corso_laurea_id, status) NULLS NOT DISTINCT;
+CREATE INDEX idx_mv_iscrizioni_corso ON mv_iscrizioni (corso_laurea_id);
+
+-- Esiti e media voti per insegnamento (la media considera solo gli esami superati)
+CREATE MATERIALIZED VIEW mv_voti_insegnamento AS
+SELECT i.id AS insegnamento_id,
+       i.nome AS insegnamento,
+       i.cfu,
+       i.anno_corso,
+       c.id AS corso_laurea_id,
+       c.nome AS corso_laurea,
+       COUNT(e.id) FILTER (WHERE e.stato IN ('SUPERATO', 'RESPINTO')) AS esami_sostenuti,
+       COUNT(e.id) FILTER (WHERE e.stato = 'SUPERATO') AS superati,
+       COUNT(e.id) FILTER (WHERE e.stato = 'RESPINTO') AS respinti,
+       COUNT(e.id) FILTER (WHERE e.lode) AS lodi,
+       ROUND(AVG(e.voto) FILTER (WHERE e.stato = 'SUPERATO'), 2) AS voto_medio,
+       ROUND(
+           COUNT(e.id) FILTER (WHERE e.stato = 'SUPERATO')::numeric
+           / NULLIF(COUNT(e.id) FILTER (WHERE e.stato IN ('SUPERATO', 'RESPINTO')), 0), 4
+       ) AS tasso_superamento
+FROM insegnamenti i
+JOIN corsi_laurea c ON c.id = i.corso_laurea_id
+LEFT JOIN appelli a ON a.insegnamento_id = i.id
+LEFT JOIN esami e ON e.appello_id = a.id
+GROUP BY i.id, c.id;
+
+CREATE UNIQUE INDEX idx_mv_voti_insegnamento_key ON mv_voti_insegnamento (insegnamento_id);
+CREATE INDEX idx_mv_voti_insegnamento_corso ON mv_voti_insegnamento (corso_laurea_id);
+
+-- Esiti per appello (tasso di superamento = superati / (superati + respinti))
+CREATE MATERIALIZED VIEW mv_esiti_appelli AS
+SELECT a.id AS appello_id,
+       a.data_appello,
+       EXTRACT(YEAR FROM a.data_appello)::int AS anno,
+       i.id AS insegnamento_id,
+       i.nome AS insegnamento,
+       c.id AS corso_laurea_id,
+       c.nome AS corso_laurea,
+       COUNT(e.id) AS iscritti,
+       COUNT(e.id) FILTER (WHERE e.stato = 'SUPERATO') AS superati,
+       COUNT(e.id) FILTER (WHERE e.stato = 'RESPINTO') AS respinti,
+       COUNT(e.id) FILTER (WHERE e.stato = 'ASSENTE') AS assenti,
+       ROUND(AVG(e.voto) FILTER (WHERE e.stato = 'SUPERATO'), 2) AS voto_medio,
+       ROUND(
+           COUNT(e.id) FILTER (WHERE e.stato = 'SUPERATO')::numeric
+           / NULLIF(COUNT(e.id) FILTER (WHERE e.stato IN ('SUPERATO', 'RESPINTO')), 0), 4
+       ) AS tasso_superamento
+FROM appelli a
+JOIN insegnamenti i ON i.id = a.insegnamento_id
+JOIN corsi_laurea c ON c.id = i.corso_laurea_id
+LEFT JOIN esami e ON e.appello_id = a.id
+GROUP BY a.id, i.id, c.id;
+
+CREATE UNIQUE INDEX idx_mv_esiti_appelli_key ON mv_esiti_appelli (appello_id);
+CREATE INDEX idx_mv_esiti_appelli_insegnamento ON mv_esiti_appelli (insegnamento_id, data_appello);
+CREATE INDEX idx_mv_esiti_appelli_corso_anno ON mv_esiti_appelli (corso_laurea_id, anno);
+CREATE INDEX idx_mv_esiti_appelli_anno ON mv_esiti_appelli (anno);
+
+-- CONCURRENTLY: le dashboard continuano a leggere le viste durante il refresh
+CREATE FUNCTION refresh_statistiche() RETURNS void AS
+$fn$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_iscrizioni;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_voti_insegnamento;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_esiti_appelli;
+END
+$fn$ LANGUAGE plpgsql;
+
 -- =========================================================
--- 2. SUPPORTO RAG & AI (Dati vettoriali e Metadata)
+-- 3. SUPPORTO RAG & AI (Dati vettoriali e Metadata)
 -- =========================================================
 
 -- Tabella per i documenti testuali (PDF bandi, pagine web, ecc.)
 CREATE TABLE rag_documents (
     id SERIAL PRIMARY KEY,
-    source_url VARCHAR(255),
+    source_url TEXT,
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
     embedding vector(768), -- Dimensione standard per modelli come nomic-embed-text o simili
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('italian', content)) STORED, -- Full-text (retrieval ibrido)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Il crawler sostituisce i chunk di una pagina per URL
+CREATE INDEX idx_rag_documents_source_url ON rag_documents (source_url);
+-- Retrieval ibrido: full-text (termini esatti come "ISEE", "LM-32") + similarità vettoriale
+CREATE INDEX idx_rag_documents_content_tsv ON rag_documents USING GIN (content_tsv);
+-- Indice HNSW su halfvec (float16): metà della memoria dell'indice su vector(768).
+-- Il retriever interroga l'espressione embedding::halfvec(768) (VECTOR_INDEX_TYPE=halfvec);
+-- con VECTOR_INDEX_TYPE=vector usare invece: USING hnsw (embedding vector_cosine_ops)
+CREATE INDEX idx_rag_documents_embedding ON rag_documents USING hnsw ((embedding::halfvec(768)) halfvec_cosine_ops);
+
 -- Tabella per descrivere lo schema database all'AI (Semantic Router)
 CREATE TABLE db_schema_info (
     id SERIAL PRIMARY KEY,
@@ -84,9 +189,35 @@ CREATE TABLE dashboard_history (
     generated_sql TEXT,
     generated_ejs TEXT,
     context_json JSONB, -- I dati grezzi ritornati dalla query SQL
+    sql_template VARCHAR(40), -- Template SQL che ha servito la query (NULL se generata da Gemini)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Riassunti delle pagine crawlate, riusati finché il contenuto (hash) non cambia
+CREATE TABLE page_summaries (
+    content_hash CHAR(64) NOT NULL, -- sha256 del contenuto della pagina
+    model VARCHAR(100) NOT NULL,    -- Modello che ha generato il riassunto
+    source_url TEXT,
+    summary TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (content_hash, model)
+);
+
+-- Risposte precalcolate alle domande frequenti (scripts/build_faq.py)
+CREATE TABLE faq_answers (
+    id SERIAL PRIMARY KEY,
+    intent VARCHAR(50) NOT NULL,          -- Intent del template (tasse, corsi, iscrizione, ...)
+    question TEXT NOT NULL,
+    question_norm TEXT NOT NULL UNIQUE,   -- Domanda normalizzata (minuscole, spazi, punteggiatura finale)
+    answer TEXT NOT NULL,
+    source_urls TEXT[] NOT NULL DEFAULT '{}',
+    source_hashes TEXT[] NOT NULL DEFAULT '{}', -- sha256 dei chunk delle pagine sorgente: se cambiano la risposta va rigenerata
+    model VARCHAR(100),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_faq_answers_intent ON faq_answers (intent);
+
 -- Utente readonly per l'AI (da usare nel servizio Python per sicurezza)
 DO
 $do$
@@ -0,0 +1,135 @@
+import os
+import math
+import time
+import asyncio
+from contextvars import Context, ContextVar
+from typing import Any, Awaitable, Callable, Optional
+from metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT, ADMISSION_REJECTIONS
+
+# Requests processed at the same time per endpoint (per worker)
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "8"))
+# Requests allowed to wait for a free slot; beyond this they get 429
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+# Longest wait in the queue before giving up with 503
+ADMISSION_MAX_WAIT_S = float(os.getenv("ADMISSION_MAX_WAIT_S", "30"))
+# End-to-end budget of an admitted request, queue wait included
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "120"))
+MAX_RETRY_AFTER_S = 60
+
+# Absolute deadline (time.monotonic) of the request being processed. Context
+# variables follow the tasks and the asyncio.to_thread calls it spawns.
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline (None without a deadline)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def deadline_timeout(default: float) -> float:
+    """Timeout for an upstream call: the configured one, capped by the deadline."""
+    left = remaining()
+    return default if left is None else max(0.0, min(default, left))
+
+
+def create_background_task(coro: Awaitable[Any]) -> asyncio.Task:
+    """Starts a task that outlives the current request, without its deadline.
+
+    Tasks copy the context they are created in: a long-lived worker started from
+    a request would otherwise fail every wait once that request's deadline passed.
+    """
+    return Context().run(asyncio.create_task, coro)
+
+
+class Overloaded(Exception):
+    """The request was not served; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Overloaded):
+    def __init__(self, retry_after: int = 1):
+        super().__init__(503, "deadline", retry_after)
+
+
+def check_deadline():
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
+
+
+class AdmissionController:
+    """Bounded admission in front of an LLM-bound endpoint.
+
+    At most `max_concurrency` requests run at once; up to `queue_size` more wait
+    for a slot, each for at most `max_wait` seconds. Anything beyond is rejected
+    immediately (429) and waits that time out are rejected with 503, both with a
+    Retry-After estimated from the recent service time. Admitted requests carry a
+    deadline (`remaining()`) that the upstream limiters and HTTP calls honour, so
+    under overload latency stays bounded instead of every request timing out.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = ADMISSION_CONCURRENCY,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        max_wait: float = ADMISSION_MAX_WAIT_S,
+        deadline: float = REQUEST_DEADLINE_S,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.deadline = deadline
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        # Moving average of the time an admitted request holds its slot
+        self._service_time = 1.0
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has probably drained."""
+        estimate = self._service_time * (self._waiting + 1) / self.max_concurrency
+        return max(1, min(MAX_RETRY_AFTER_S, math.ceil(estimate)))
+
+    def _reject(self, status_code: int, reason: str):
+        ADMISSION_REJECTIONS.labels(endpoint=self.name, reason=reason).inc()
+        raise Overloaded(status_code, reason, self.retry_after())
+
+    async def _enter(self, deadline: float):
+        if self._slots.locked() and self._waiting >= self.queue_size:
+            self._reject(429, "queue_full")
+
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(endpoint=self.name).inc()
+        start = time.monotonic()
+        try:
+            timeout = min(self.max_wait, deadline - start)
+            await asyncio.wait_for(self._slots.acquire(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            self._reject(503, "queue_timeout")
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(endpoint=self.name).dec()
+            ADMISSION_WAIT.labels(endpoint=self.name).observe(time.monotonic() - start)
+
+    async def run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        deadline = time.monotonic() + self.deadline
+        token = _deadline.set(deadline)
+        try:
+            await self._enter(deadline)
+            start = time.monotonic()
+            try:
+                return await asyncio.wait_for(fn(), timeout=max(0.0, deadline - start))
+            except asyncio.TimeoutError:
+                self._reject(503, "deadline")
+            finally:
+                self._slots.release()
+                self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - start)
+        finally:
+            _deadline.reset(token)
@@ -0,0 +1,92 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+class RequestDAG:
+    """Runs the stages of a request as a DAG of asyncio tasks.
+
+    A stage starts as soon as the stages it depends on have finished (and gets
+    their results as arguments), so independent stages run in parallel and a
+    stage whose outcome is not needed yet can start speculatively. Once a
+    decision makes a branch useless it is cancelled with `cancel`; `close`
+    cancels whatever is still running and records the critical path (the chain
+    of dependencies that finished last) in the request timer.
+
+    Stages run in a task of their own, with a copy of the caller's context
+    (request ID, deadline). Work already handed to a thread is not interrupted
+    by a cancellation: its result is discarded.
+    """
+
+    def __init__(self, timer: Optional[StageTimer] = None):
+        self.timer = timer
+        self._origin = time.perf_counter()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._deps: Dict[str, Tuple[str, ...]] = {}
+        # Start and end of each finished stage, in seconds since the DAG was created
+        self._spans: Dict[str, Tuple[float, float]] = {}
+
+    def add(self, name: str, fn: Callable[..., Awaitable[Any]], *deps: str) -> "RequestDAG":
+        """Schedules `fn(*results of deps)`; the dependencies must already be added."""
+        missing = [dep for dep in deps if dep not in self._tasks]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+        self._deps[name] = deps
+        self._tasks[name] = asyncio.create_task(self._run(name, fn, deps), name=f"dag:{name}")
+        return self
+
+    async def _run(self, name: str, fn: Callable[..., Awaitable[Any]], deps: Tuple[str, ...]) -> Any:
+        inputs = [await self._tasks[dep] for dep in deps]
+        start = time.perf_counter()
+        try:
+            result = await fn(*inputs)
+        except asyncio.CancelledError:
+            # A cancelled stage did not contribute to the answer: no span, so it
+            # cannot end up on the critical path by finishing (cancelled) last
+            raise
+        except BaseException:
+            self._spans[name] = (start - self._origin, time.perf_counter() - self._origin)
+            raise
+        self._spans[name] = (start - self._origin, time.perf_counter() - self._origin)
+        return result
+
+    async def get(self, name: str) -> Any:
+        return await self._tasks[name]
+
+    def cancel(self, *names: str):
+        for name in names:
+            task = self._tasks.get(name)
+            if task and not task.done():
+                task.cancel()
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """Stages on the longest chain (ending with the last stage to finish) and its length in ms."""
+        if not self._spans:
+            return [], 0.0
+        node = max(self._spans, key=lambda name: self._spans[name][1])
+        end = self._spans[node][1]
+        path = [node]
+        while True:
+            finished = [dep for dep in self._deps[node] if dep in self._spans]
+            if not finished:
+                break
+            node = max(finished, key=lambda name: self._spans[name][1])
+            path.append(node)
+        return path[::-1], round(end * 1000, 2)
+
+    async def close(self):
+        pending = [task for task in self._tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+        path, elapsed = self.critical_path()
+        if self.timer and path:
+            self.timer.record("critical_path", elapsed / 1000)
+        if pending:
+            logger.debug(f"Cancelled stages: {[task.get_name() for task in pending]}")
+        logger.debug(f"Critical path: {' -> '.join(path)} ({elapsed:.0f} ms)")
@@ -0,0 +1,45 @@
+import os
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+
+
+class DocumentRepository:
+    """Read access to the pages ingested by the crawler into `rag_documents`."""
+
+    def __init__(self, database_url: str = DATABASE_URL):
+        try:
+            self.engine = create_engine(database_url, pool_pre_ping=True)
+        except Exception as e:
+            logger.error(f"Document repository DB unavailable: {e}")
+            self.engine = None
+
+    def load_pages(self, urls: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Returns the ingested pages (url + content), rebuilt from their chunks.
+
+        With `urls`, only those pages are returned.
+        """
+        if not self.engine:
+            return []
+        try:
+            with self.engine.connect() as conn:
+                # Each chunk starts with `overlap_chars` repeated from the previous one
+                rows = conn.execute(text("""
+                    SELECT source_url, string_agg(
+                        substr(content, COALESCE((metadata->>'overlap_chars')::int, 0) + 1),
+                        E'\\n\\n' ORDER BY (metadata->>'chunk_index')::int, id
+                    )
+                    FROM rag_documents
+                    WHERE source_url IS NOT NULL
+                      AND (CAST(:urls AS TEXT[]) IS NULL OR source_url = ANY(CAST(:urls AS TEXT[])))
+                    GROUP BY source_url
+                    ORDER BY source_url
+                """), {"urls": urls}).fetchall()
+        except Exception as e:
+            logger.error(f"Failed to load documents: {e}")
+            return []
+        return [{"url": row[0], "content": row[1]} for row in rows]
@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import httpx
+from sqlalchemy import create_engine, text
+from metrics import record_cache
+from limiter import UpstreamLimiter
+from admission import create_background_task
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBEDDING_DIM = 768  # rag_documents.embedding vector(768)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "/app/data/processed/embeddings.sqlite")
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "32"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "20"))
+EMBEDDING_BACKFILL_INTERVAL = int(os.getenv("EMBEDDING_BACKFILL_INTERVAL", "300"))
+# Backfill rounds a chunk may fail (rejected by Ollama, wrong dimension) before it is skipped
+EMBEDDING_MAX_ATTEMPTS = int(os.getenv("EMBEDDING_MAX_ATTEMPTS", "3"))
+# nomic-embed-text expects task prefixes on queries and documents
+EMBEDDING_QUERY_PREFIX = os.getenv("EMBEDDING_QUERY_PREFIX", "search_query: ")
+EMBEDDING_DOCUMENT_PREFIX = os.getenv("EMBEDDING_DOCUMENT_PREFIX", "search_document: ")
+
+
+class EmbeddingCache:
+    """On-disk cache of embeddings keyed by hash of (model, text), stored as float32 blobs."""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Shared by all uvicorn workers: wait for the writer lock instead of failing
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        return {key: array("f", blob).tolist() for key, blob in rows}
+
+    def put_many(self, items: Dict[str, List[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+
+class EmbeddingService:
+    """Embeds texts with a local Ollama embedding model.
+
+    Concurrent requests are coalesced into batches of up to `max_batch` texts or
+    `max_wait_ms`, whichever comes first, and sent to `/api/embed` in one call.
+    Vectors are cached on disk by content hash, so unchanged chunks are never
+    embedded twice.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str = EMBEDDING_MODEL,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch: int = EMBEDDING_MAX_BATCH,
+        max_wait_ms: float = EMBEDDING_MAX_WAIT_MS,
+        keep_alive: str = "30m",
+        limiter: Optional[UpstreamLimiter] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.keep_alive = keep_alive
+        self.limiter = limiter
+        self.client = httpx.AsyncClient(timeout=120.0, limits=httpx.Limits(max_connections=4))
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    async def close(self):
+        if self._worker:
+            self._worker.cancel()
+        await self.client.aclose()
+
+    async def _call_ollama(self, texts: List[str]) -> List[List[float]]:
+        async with self.limiter.slot() if self.limiter else nullcontext():
+            response = await self.client.post(
+                f"{self.base_url}/api/embed",
+                json={"model": self.model, "input": texts, "keep_alive": self.keep_alive}
+            )
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    async def _batch_worker(self):
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                vectors = await self._call_ollama([text for text, _ in batch])
+                if len(vectors) != len(batch):
+                    raise ValueError(f"Ollama returned {len(vectors)} embeddings for {len(batch)} texts")
+                for (_, future), vector in zip(batch, vectors):
+                    if not future.done():
+                        future.set_result(vector)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _embed_uncached(self, text: str) -> List[float]:
+        if self._worker is None or self._worker.done():
+            # Shared by every request: it must not inherit the deadline of the first one
+            self._worker = create_background_task(self._batch_worker())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        cached = await asyncio.to_thread(self.cache.get_many, keys) if self.cache else {}
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        record_cache("embedding", True, len(keys) - len(missing))
+        record_cache("embedding", False, len(missing))
+        if missing:
+            vectors = await asyncio.gather(*(self._embed_uncached(texts[i]) for i in missing))
+            fresh = {keys[i]: vector for i, vector in zip(missing, vectors)}
+            if self.cache:
+                await asyncio.to_thread(self.cache.put_many, fresh)
+            cached.update(fresh)
+        return [cached[key] for key in keys]
+
+    async def embed_query(self, question: str) -> List[float]:
+        return (await self.embed_many([EMBEDDING_QUERY_PREFIX + question]))[0]
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embed_many([EMBEDDING_DOCUMENT_PREFIX + t for t in texts])
+
+
+class EmbeddingBackfill:
+    """Fills `rag_documents.embedding` for the chunks written by the crawler.
+
+    Only rows with a NULL embedding are processed: the crawler replaces the rows
+    of changed pages only, so unchanged chunks are never re-embedded. With a
+    `leader` lock (limit 1) only one worker runs each round.
+
+    A batch that fails is retried one chunk at a time, so a single bad chunk
+    (empty, too long, rejected) does not block the others; the round pages past
+    it and retries it in the next rounds, up to `max_attempts` times. Chunk ids
+    are never reused, so a page re-ingested with new content is tried afresh.
+    """
+
+    def __init__(
+        self,
+        service: EmbeddingService,
+        database_url: str = DATABASE_URL,
+        batch_size: int = 64,
+        leader: Optional[UpstreamLimiter] = None,
+        max_attempts: int = EMBEDDING_MAX_ATTEMPTS,
+    ):
+        self.service = service
+        self.batch_size = batch_size
+        self.leader = leader
+        self.max_attempts = max_attempts
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self._task: Optional[asyncio.Task] = None
+        # Failed rounds per chunk id (kept in memory: a restart retries them)
+        self._attempts: Dict[int, int] = {}
+
+    def _pending(self, after_id: int = 0) -> List[Tuple[int, str]]:
+        with self.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(
+                text("""
+                    SELECT id, content FROM rag_documents
+                    WHERE embedding IS NULL AND id > :after
+                    ORDER BY id LIMIT :n
+                """),
+                {"after": after_id, "n": self.batch_size}
+            ).fetchall()]
+
+    def _store(self, rows: List[Tuple[int, List[float]]]):
+        with self.engine.begin() as conn:
+            for row_id, vector in rows:
+                conn.execute(
+                    text("UPDATE rag_documents SET embedding = CAST(:e AS vector) WHERE id = :id"),
+                    {"e": json.dumps(vector), "id": row_id}
+                )
+
+    async def run_once(self) -> int:
+        if not self.leader:
+            return await self._run()
+        # The leader lock may be a DB round trip: keep it off the event loop
+        slot = await asyncio.to_thread(self.leader.try_acquire)
+        if slot is None:
+            return 0  # another worker is backfilling
+        try:
+            return await self._run()
+        finally:
+            await asyncio.to_thread(self.leader.release, slot)
+
+    def _fail(self, row_id: int, reason):
+        attempts = self._attempts[row_id] = self._attempts.get(row_id, 0) + 1
+        if attempts >= self.max_attempts:
+            logger.error(f"Chunk {row_id} not embedded after {attempts} attempts, skipped: {reason}")
+        else:
+            logger.warning(f"Chunk {row_id} not embedded (attempt {attempts}): {reason}")
+
+    async def _embed_one(self, content: str, row_id: int) -> Optional[List[float]]:
+        try:
+            return (await self.service.embed_documents([content]))[0]
+        except httpx.TransportError:
+            raise  # Ollama unreachable: not the chunk's fault, the round stops
+        except Exception as e:
+            self._fail(row_id, e)
+            return None
+
+    async def _embed(self, pending: List[Tuple[int, str]]) -> List[Optional[List[float]]]:
+        try:
+            return await self.service.embed_documents([content for _, content in pending])
+        except httpx.TransportError:
+            raise
+        except Exception as e:
+            logger.warning(f"Embedding batch of {len(pending)} chunks failed, retrying one at a time: {e}")
+            return [await self._embed_one(content, row_id) for row_id, content in pending]
+
+    async def _run(self) -> int:
+        total, last_id = 0, 0
+        while True:
+            rows = await asyncio.to_thread(self._pending, last_id)
+            if not rows:
+                return total
+            last_id = rows[-1][0]
+            pending = [row for row in rows if self._attempts.get(row[0], 0) < self.max_attempts]
+            if not pending:
+                continue
+
+            embedded = []
+            for (row_id, _), vector in zip(pending, await self._embed(pending)):
+                if vector is None:
+                    continue
+                if len(vector) != EMBEDDING_DIM:
+                    self._fail(row_id, f"model {self.service.model} returned a {len(vector)}-dim vector, not {EMBEDDING_DIM}")
+                    continue
+                embedded.append((row_id, vector))
+                self._attempts.pop(row_id, None)
+            if embedded:
+                await asyncio.to_thread(self._store, embedded)
+            total += len(embedded)
+
+    async def _loop(self, interval: int):
+        while True:
+            try:
+                embedded = await self.run_once()
+                if embedded:
+                    logger.info(f"Embedded {embedded} new chunks")
+            except Exception as e:
+                logger.error(f"Embedding backfill failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: int = EMBEDDING_BACKFILL_INTERVAL):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,204 @@
+import os
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, text
+from keywords import content_words
+from limiter import UpstreamLimiter
+from singleflight import normalize_question
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+# Seconds between reloads of the FAQ table (and regeneration of the stale answers)
+FAQ_REFRESH_INTERVAL = int(os.getenv("FAQ_REFRESH_INTERVAL", "300"))
+# Consecutive rounds a stale answer may retrieve nothing before it is deleted
+FAQ_MAX_MISSES = int(os.getenv("FAQ_MAX_MISSES", "3"))
+
+# sha256 of the chunks currently ingested for the pages an answer was built from.
+# Same expression as summary_store.content_hash, computed by Postgres.
+CHUNK_HASH_SQL = "encode(sha256(convert_to(d.content, 'UTF8')), 'hex')"
+SOURCE_HASHES_SQL = f"""
+    COALESCE((
+        SELECT array_agg({CHUNK_HASH_SQL} ORDER BY {CHUNK_HASH_SQL})
+        FROM rag_documents d WHERE d.source_url = ANY({{urls}})
+    ), '{{{{}}}}')
+"""
+
+# Generates an answer for a question: (answer, source urls), None if nothing was retrieved
+FaqGenerator = Callable[[str], Awaitable[Optional[Tuple[str, List[str]]]]]
+
+
+class FaqStore:
+    """Precomputed answers to the frequent questions, stored in `faq_answers`.
+
+    Answers are generated offline (`scripts/build_faq.py`) with the hashes of
+    the chunks of their source pages. An answer whose sources were re-ingested
+    with different content is stale: it is not served and gets regenerated.
+    A question is served only when it has the same content words as a stored
+    question (or paraphrase): articles, prepositions and the like may differ,
+    any other word or a negation may not ("cancello" for "iscrivo", "triennale"
+    for "magistrale"). Near misses go through the RAG pipeline.
+    """
+
+    def __init__(self, database_url: str = DATABASE_URL):
+        self.stale: List[Dict[str, Any]] = []
+        # Content words (sorted) -> fresh entries with those words
+        self._index: Optional[Dict[Tuple[str, ...], List[Dict[str, Any]]]] = None
+        try:
+            self.engine = create_engine(database_url, pool_pre_ping=True)
+        except Exception as e:
+            logger.error(f"FAQ store DB unavailable: {e}")
+            self.engine = None
+
+    def _load(self) -> List[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(f"""
+                SELECT f.intent, f.question, f.answer, f.source_urls,
+                       f.source_hashes = {SOURCE_HASHES_SQL.format(urls="f.source_urls")} AS fresh
+                FROM faq_answers f
+                ORDER BY f.id
+            """)).fetchall()
+        return [
+            {"intent": row[0], "question": row[1], "answer": row[2], "source_urls": list(row[3]), "fresh": row[4]}
+            for row in rows
+        ]
+
+    def refresh(self) -> int:
+        """Reloads the table and rebuilds the matcher over the fresh answers."""
+        if not self.engine:
+            return 0
+        entries = self._load()
+        fresh = [entry for entry in entries if entry["fresh"]]
+        self.stale = [entry for entry in entries if not entry["fresh"]]
+        index = defaultdict(list)
+        for entry in fresh:
+            index[self.key(entry["question"])].append(entry)
+        self._index = dict(index) if index else None
+        return len(fresh)
+
+    @staticmethod
+    def key(question: str) -> Tuple[str, ...]:
+        return tuple(sorted(content_words(normalize_question(question))))
+
+    def match(self, question: str) -> Optional[Dict[str, Any]]:
+        """Returns the FAQ entry answering `question`, if any."""
+        index = self._index
+        if index is None:
+            return None
+        entries = index.get(self.key(question))
+        if not entries:
+            return None
+        if len({entry["intent"] for entry in entries}) > 1:
+            # The same words stored under different intents: ambiguous
+            return None
+        return entries[0]
+
+    def put(self, intent: str, question: str, answer: str, source_urls: List[str], model: Optional[str] = None):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"""
+                    INSERT INTO faq_answers (intent, question, question_norm, answer, source_urls, source_hashes, model)
+                    VALUES (:intent, :question, :norm, :answer, CAST(:urls AS TEXT[]),
+                            {SOURCE_HASHES_SQL.format(urls="CAST(:urls AS TEXT[])")}, :model)
+                    ON CONFLICT (question_norm) DO UPDATE SET
+                        intent = EXCLUDED.intent, answer = EXCLUDED.answer, source_urls = EXCLUDED.source_urls,
+                        source_hashes = EXCLUDED.source_hashes, model = EXCLUDED.model, updated_at = CURRENT_TIMESTAMP
+                """),
+                {
+                    "intent": intent, "question": question, "norm": normalize_question(question),
+                    "answer": answer, "urls": source_urls, "model": model,
+                }
+            )
+
+    def delete(self, question: str):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM faq_answers WHERE question_norm = :norm"),
+                {"norm": normalize_question(question)}
+            )
+
+
+class FaqRefresher:
+    """Periodically reloads the FAQ store and regenerates its stale answers.
+
+    With a `leader` lock (limit 1) only one worker regenerates; every worker
+    reloads its own matcher. A stale answer that retrieves nothing for
+    `max_misses` rounds in a row (its pages are gone) is deleted instead of
+    being retried forever.
+    """
+
+    def __init__(
+        self,
+        store: FaqStore,
+        generate: FaqGenerator,
+        model: Optional[str] = None,
+        leader: Optional[UpstreamLimiter] = None,
+        max_misses: int = FAQ_MAX_MISSES,
+    ):
+        self.store = store
+        self.generate = generate
+        self.model = model
+        self.leader = leader
+        self.max_misses = max_misses
+        self._task: Optional[asyncio.Task] = None
+        # Question -> consecutive rounds that retrieved nothing
+        self._misses: Dict[str, int] = {}
+
+    async def regenerate(self, entries: List[Dict[str, Any]]) -> int:
+        updated = 0
+        for entry in entries:
+            try:
+                result = await self.generate(entry["question"])
+            except Exception as e:
+                # Not a miss (Ollama may be down): retried next round, the others go on
+                logger.error(f"FAQ answer to '{entry['question']}' not regenerated: {e}")
+                continue
+            if result is None:
+                # Nothing retrieved: a one-off (e.g. a missed retrieval budget) or sources gone for good
+                misses = self._misses[entry["question"]] = self._misses.get(entry["question"], 0) + 1
+                if misses >= self.max_misses:
+                    logger.info(f"FAQ answer to '{entry['question']}' retrieved nothing {misses} times, deleted")
+                    await asyncio.to_thread(self.store.delete, entry["question"])
+                    self._misses.pop(entry["question"], None)
+                continue
+            self._misses.pop(entry["question"], None)
+            answer, source_urls = result
+            await asyncio.to_thread(self.store.put, entry["intent"], entry["question"], answer, source_urls, self.model)
+            updated += 1
+        return updated
+
+    async def run_once(self) -> int:
+        await asyncio.to_thread(self.store.refresh)
+        if not self.store.stale:
+            return 0
+        slot = await asyncio.to_thread(self.leader.try_acquire) if self.leader else False
+        if slot is None:
+            return 0  # another worker is regenerating
+        try:
+            updated = await self.regenerate(self.store.stale)
+        finally:
+            if self.leader:
+                await asyncio.to_thread(self.leader.release, slot)
+        await asyncio.to_thread(self.store.refresh)
+        return updated
+
+    async def _loop(self, interval: int):
+        while True:
+            try:
+                updated = await self.run_once()
+                if updated:
+                    logger.info(f"Regenerated {updated} stale FAQ answers")
+            except Exception as e:
+                logger.error(f"FAQ refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: int = FAQ_REFRESH_INTERVAL):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
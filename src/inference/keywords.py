@@ -0,0 +1,29 @@
+import re
+from typing import Tuple
+
+WORD = re.compile(r"\w+")
+
+# Negations flip the meaning of a question: they always count as content words
+NEGATIONS = frozenset({"non", "né", "ne", "nessun", "nessuno", "nessuna", "mai", "senza", "niente", "nulla"})
+
+# Italian function words: articles, (articulated) prepositions, clitics, auxiliaries.
+# Conjunctions, interrogatives and quantifiers are left out on purpose ("quanti" and
+# "quali", "e" and "o" ask different things).
+STOPWORDS = frozenset({
+    "il", "lo", "la", "i", "gli", "le", "l", "un", "uno", "una",
+    "di", "a", "ad", "da", "in", "con", "su", "per", "tra", "fra",
+    "del", "dello", "della", "dei", "degli", "delle", "dell", "d",
+    "al", "allo", "alla", "ai", "agli", "alle", "all",
+    "dal", "dallo", "dalla", "dai", "dagli", "dalle", "dall",
+    "nel", "nello", "nella", "nei", "negli", "nelle", "nell",
+    "sul", "sullo", "sulla", "sui", "sugli", "sulle", "sull",
+    "col", "coi", "mi", "ti", "si", "ci", "vi", "c",
+    "è", "sono", "siamo", "siete",
+    "ho", "hai", "ha", "abbiamo", "avete", "hanno",
+    "che", "cosa",
+}) - NEGATIONS
+
+
+def content_words(text: str) -> Tuple[str, ...]:
+    """The words of a (normalized) question that carry its meaning, in order."""
+    return tuple(word for word in WORD.findall(text.lower()) if word not in STOPWORDS)
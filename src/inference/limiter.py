@@ -0,0 +1,186 @@
+import os
+import time
+import fcntl
+import random
+import asyncio
+import logging
+import threading
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import create_engine, text
+from admission import DeadlineExceeded, check_deadline, remaining
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+# "process" (per worker), "file" (all workers of a host) or "postgres" (all replicas)
+LIMITER_BACKEND = os.getenv("LIMITER_BACKEND", "file")
+LIMITER_DIR = os.getenv("LIMITER_DIR", "/tmp/ai-service-limits")
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "4"))
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+# Embedding calls get their own slots: a query embedding must not queue behind long generations
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "2"))
+LIMITER_POLL_MS = 20
+
+
+class _ProcessSlots:
+    def __init__(self, name: str, limit: int):
+        self.limit = limit
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> Optional[object]:
+        with self._lock:
+            if self._used >= self.limit:
+                return None
+            self._used += 1
+            return True
+
+    def release(self, slot):
+        with self._lock:
+            self._used -= 1
+
+
+class _FileSlots:
+    """One lock file per slot: flock is released by the OS if the worker dies."""
+
+    def __init__(self, name: str, limit: int, directory: str = LIMITER_DIR):
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self.paths = [Path(directory) / f"{name}.{i}.lock" for i in range(limit)]
+
+    def try_acquire(self) -> Optional[object]:
+        for path in random.sample(self.paths, len(self.paths)):
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class _PostgresSlots:
+    """One advisory lock per slot, held on a dedicated connection until release."""
+
+    def __init__(self, name: str, limit: int, database_url: str = DATABASE_URL):
+        self.key = zlib.crc32(name.encode("utf-8")) & 0x7FFFFFFF
+        self.limit = limit
+        self.engine = create_engine(database_url, pool_pre_ping=True, pool_size=limit, max_overflow=limit)
+
+    def try_acquire(self) -> Optional[object]:
+        conn = self.engine.connect()
+        try:
+            for slot in random.sample(range(self.limit), self.limit):
+                if conn.execute(text("SELECT pg_try_advisory_lock(:k, :s)"), {"k": self.key, "s": slot}).scalar():
+                    return conn, slot
+        except Exception:
+            conn.close()
+            raise
+        conn.close()
+        return None
+
+    def release(self, held):
+        conn, slot = held
+        try:
+            conn.execute(text("SELECT pg_advisory_unlock(:k, :s)"), {"k": self.key, "s": slot})
+        finally:
+            conn.close()
+
+
+class UpstreamLimiter:
+    """Caps the concurrent calls to an upstream (Ollama, Gemini).
+
+    With the "file" or "postgres" backend the cap is shared by every uvicorn
+    worker (or replica), so scaling out does not multiply the load on the LLM
+    host. Waiters poll for a free slot until the request deadline (see
+    `admission`) expires; in each worker at most `limit` coroutines poll, the
+    others wait on a local semaphore. `slot()` is for coroutines, `slot_sync()`
+    for the Gemini chains invoked from worker threads.
+    """
+
+    def __init__(self, name: str, limit: int, backend: str = LIMITER_BACKEND):
+        self.name = name
+        self.max_concurrency = limit
+        # Acquiring a Postgres slot is a DB round trip: keep it off the event loop
+        self._blocking = backend == "postgres"
+        slots = {"process": _ProcessSlots, "file": _FileSlots, "postgres": _PostgresSlots}
+        if backend not in slots:
+            raise ValueError(f"Unknown limiter backend: {backend}")
+        self._slots = slots[backend](name, limit)
+        # A worker never holds more than `limit` slots: more pollers only add load
+        self._local = asyncio.Semaphore(limit)
+
+    def try_acquire(self) -> Optional[object]:
+        try:
+            return self._slots.try_acquire()
+        except Exception as e:
+            # A broken limiter must not take the service down: run unlimited
+            logger.error(f"Limiter '{self.name}' unavailable: {e}")
+            return False
+
+    def release(self, slot):
+        if slot is not False:
+            self._slots.release(slot)
+
+    def _delay(self) -> float:
+        return LIMITER_POLL_MS / 1000 * (0.5 + random.random())
+
+    async def _acquire_local(self):
+        left = remaining()
+        try:
+            await asyncio.wait_for(self._local.acquire(), timeout=None if left is None else max(0.0, left))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+
+    async def acquire(self) -> object:
+        """Waits for a slot; pair with `release_async`."""
+        await self._acquire_local()
+        try:
+            while True:
+                slot = await asyncio.to_thread(self.try_acquire) if self._blocking else self.try_acquire()
+                if slot is not None:
+                    return slot
+                check_deadline()
+                await asyncio.sleep(self._delay())
+        except BaseException:
+            self._local.release()
+            raise
+
+    async def release_async(self, slot):
+        try:
+            if self._blocking:
+                await asyncio.to_thread(self.release, slot)
+            else:
+                self.release(slot)
+        finally:
+            self._local.release()
+
+    def acquire_sync(self) -> object:
+        while True:
+            slot = self.try_acquire()
+            if slot is not None:
+                return slot
+            check_deadline()
+            time.sleep(self._delay())
+
+    @asynccontextmanager
+    async def slot(self):
+        slot = await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release_async(slot)
+
+    @contextmanager
+    def slot_sync(self):
+        slot = self.acquire_sync()
+        try:
+            yield
+        finally:
+            self.release(slot)
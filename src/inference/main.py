@@ -1,95 +1,365 @@
 import os
 import sys
-from typing import Optional, List, Dict, Any
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import joblib
+import time
+from typing import Optional, List, Dict, Any, Tuple
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from prometheus_client import CONTENT_TYPE_LATEST
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
 import httpx
-# LangChain imports
-from langchain_ollama import ChatOllama 
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from sqlalchemy import text
 
 # Add /app to path to import utils
 sys.path.append("/app")
-from utils.text_preprocessing import TextPreprocessor
+from utils.chunking import MarkdownChunker
+from utils.logger import REQUEST_ID_HEADER, configure_logging, get_request_id, set_request_id, reset_request_id
 
-# Import new RAG SQL Service
-from rag_sql import RAGSQLService
+configure_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# NLTK, joblib/scikit-learn and the LangChain model clients are imported inside
+# the init functions below, which run concurrently at startup. The imports
+# themselves are serialized: concurrent imports of packages with circular
+# imports (LangChain) can fail with a module lock deadlock.
+IMPORT_LOCK = threading.Lock()
+from summary_store import SummaryStore, content_hash
+from faq_store import FaqStore, FaqRefresher
+from rollups import RollupRefresher
+from documents import DocumentRepository
+from retriever import HybridRetriever, RETRIEVAL_CANDIDATES
+from embeddings import EmbeddingService, EmbeddingCache, EmbeddingBackfill, EMBEDDING_MODEL
+from reranker import Reranker, RERANK_CANDIDATES, RERANK_TOP_K
+from timing import StageTimer
+from metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, CASCADE_ANSWERS, record_cache, render_latest
+from limiter import UpstreamLimiter, OLLAMA_CONCURRENCY, GEMINI_CONCURRENCY, EMBEDDING_CONCURRENCY
+from singleflight import SingleFlight, normalize_question
+from admission import AdmissionController, Overloaded, deadline_timeout
+from dag import RequestDAG
 
 # Configuration
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://host.docker.internal:11434") # Default to host for Mac/Windows
 CRAWLER_URL = os.getenv("CRAWLER_URL", "http://crawler:8001")
+CRAWLER_TIMEOUT = 300.0
 MODEL_PATH = "/app/models/logistic_regression.pkl"
 VECTORIZER_PATH = "/app/models/vectorizer.pkl"
+# Memory-mappable copies of the models, shared by all uvicorn workers
+MODEL_MMAP_DIR = os.getenv("MODEL_MMAP_DIR", "/tmp/ai-service-models")
 
 # Model names
 SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "qwen3:0.6b")
 QA_MODEL = os.getenv("QA_MODEL", "qwen3:1.7b")
 
+# Legacy summary stage: "cached" reuses per-page summaries keyed by content hash,
+# "direct" skips summarization and sends the retrieved text straight to QA.
+LEGACY_SUMMARY_MODE = os.getenv("LEGACY_SUMMARY_MODE", "cached")
+MAX_CONTEXT_CHARS = 15000
+# Legacy QA: "single" always answers with QA_MODEL, "cascade" answers with the
+# small model first and escalates to QA_MODEL only when its confidence is low
+LEGACY_QA_MODE = os.getenv("LEGACY_QA_MODE", "single")
+# Serve the frequent questions from the precomputed answers (scripts/build_faq.py)
+LEGACY_FAQ = os.getenv("LEGACY_FAQ", "true").lower() == "true"
+# Answer the questions the relevance classifier rejects with IRRELEVANT_ANSWER
+# (retrieval, started in parallel with the classifier, is cancelled)
+LEGACY_CLASSIFIER_GATE = os.getenv("LEGACY_CLASSIFIER_GATE", "false").lower() == "true"
+IRRELEVANT_ANSWER = "La domanda non sembra riguardare l'Università Politecnica delle Marche: prova a riformularla."
+# Plan the dashboard while the router decides between SQL and text: saves a Gemini
+# round trip on SQL questions, but every question routed to text pays for a plan that
+# is thrown away (a call already running in its thread cannot be stopped)
+SQL_SPECULATIVE_PLANNING = os.getenv("SQL_SPECULATIVE_PLANNING", "false").lower() == "true"
+# Pages come from rag_documents (populated by the crawler's ingestion scheduler).
+# Calling the crawler on the request path is only a fallback for questions that
+# retrieve nothing (e.g. an empty index).
+LEGACY_LIVE_CRAWL = os.getenv("LEGACY_LIVE_CRAWL", "false").lower() == "true"
+# Number of chunks retrieved per question
+LEGACY_TOP_K = int(os.getenv("LEGACY_TOP_K", "8"))
+# Attach the per-stage timing breakdown to every response (otherwise only with `debug`)
+DEBUG_TIMINGS = os.getenv("DEBUG_TIMINGS", "false").lower() == "true"
+# Endpoints with latency / in-flight metrics (fixed set to bound label cardinality)
+INSTRUMENTED_PATHS = {"/ask", "/ask_legacy", "/summaries/refresh"}
+# Load the Ollama models and open the DB pools right after startup
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
 # Models DTOs
 class AskRequest(BaseModel):
     question: str
+    # Hybrid retrieval tuning (legacy path): 0 disables a branch
+    top_k: Optional[int] = Field(None, ge=1, le=RETRIEVAL_CANDIDATES)
+    keyword_weight: float = Field(1.0, ge=0)
+    vector_weight: float = Field(1.0, ge=0)
+    # Return the per-stage timings (ms) in the response
+    debug: bool = False
 
 class AskResponse(BaseModel):
     answer: str
     relevant: bool
     context_used: bool
     dashboard_data: Optional[Dict[str, Any]] = None
+    timings: Optional[Dict[str, float]] = None
 
 # Global variables
 classifier = None
 vectorizer = None
 preprocessor = None
-llm_summary = None 
-llm_qa = None      
+ollama_client = None
+crawler_client = None
+summary_store = None
+document_repo = None
+embedding_service = None
+embedding_backfill = None
+faq_store = None
+faq_refresher = None
+stats_refresher = None
+retriever = None
+reranker = None
 rag_sql_service = None
+ollama_limiter = None
+gemini_limiter = None
+embedding_limiter = None
+warmup_task = None
+# Identical questions (and crawls, page summaries) in flight at the same time
+# are computed once and the result is fanned out to every caller
+question_flight = SingleFlight("question")
+crawl_flight = SingleFlight("crawl")
+summary_flight = SingleFlight("summary")
+# Bounded concurrency + wait queue per LLM-bound endpoint: overload gets a fast
+# 429/503 with Retry-After instead of piling up requests until they time out
+legacy_admission = AdmissionController("/ask_legacy")
+# Answers served by the draft model vs escalated to QA_MODEL (LEGACY_QA_MODE=cascade)
+cascade_stats = {"draft": 0, "escalated": 0}
+sql_admission = AdmissionController("/ask")
+# Liveness is /health; readiness tracks startup and the warmup checks
+readiness: Dict[str, str] = {"startup": "pending"}
 
-@app.on_event("startup")
-async def startup_event():
-    global classifier, vectorizer, preprocessor, llm_summary, llm_qa, rag_sql_service
-    
-    # 1. Load Scikit-Learn Models (Classification)
+def load_shared_model(path: str):
+    """Loads a pickled model through a joblib copy with memory-mapped numpy arrays.
+
+    Only the numpy arrays (e.g. the classifier coefficients, the vectorizer's
+    idf weights) are mapped read-only from the same file and shared by every
+    worker. The rest of the object is unpickled per worker as usual: that
+    includes the vectorizer's `vocabulary_` dict, most of its memory.
+    """
+    import joblib
+    name = os.path.basename(path)
+    mmap_path = os.path.join(MODEL_MMAP_DIR, f"{name}.{os.stat(path).st_mtime_ns}.joblib")
+    if not os.path.exists(mmap_path):
+        os.makedirs(MODEL_MMAP_DIR, exist_ok=True)
+        tmp_path = f"{mmap_path}.{os.getpid()}.tmp"
+        joblib.dump(joblib.load(path), tmp_path)
+        # Atomic: concurrent workers never map a partially written file
+        os.replace(tmp_path, mmap_path)
+        # Copies of older versions of the model (workers still mapping one keep their pages)
+        for entry in os.scandir(MODEL_MMAP_DIR):
+            if entry.name.startswith(f"{name}.") and entry.name.endswith(".joblib") and entry.path != mmap_path:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass  # removed by another worker
+    return joblib.load(mmap_path, mmap_mode="r")
+
+def load_classifier():
+    global classifier, vectorizer
     try:
-        if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
-            classifier = joblib.load(MODEL_PATH)
-            vectorizer = joblib.load(VECTORIZER_PATH)
-            print("Classifier and Vectorizer loaded successfully.")
-        else:
-            print(f"Models not found. Classification will be skipped.")
+        # Unpickling imports scikit-learn
+        with IMPORT_LOCK:
+            if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
+                classifier = load_shared_model(MODEL_PATH)
+                vectorizer = load_shared_model(VECTORIZER_PATH)
+                logger.info("Classifier and Vectorizer loaded successfully.")
+            else:
+                logger.warning("Models not found. Classification will be skipped.")
     except Exception as e:
-        print(f"Error loading models: {e}")
+        logger.error(f"Error loading models: {e}")
 
-    # 2. Initialize Preprocessor
-    preprocessor = TextPreprocessor(language="italian")
-    
-    # 3. Initialize LangChain Ollama Chat Models (For Legacy RAG)
+def init_preprocessor():
+    global preprocessor
+    # TextPreprocessor imports NLTK when constructed
+    with IMPORT_LOCK:
+        from utils.text_preprocessing import TextPreprocessor
+        preprocessor = TextPreprocessor(language="italian")
+
+def init_ollama():
+    # Ollama client layer (For Legacy RAG): models + chains built once
+    global ollama_client
     try:
-        print(f"Initializing Ollama with URL: {OLLAMA_URL}")
-        llm_summary = ChatOllama(
-            base_url=OLLAMA_URL,
-            model=SUMMARY_MODEL,
-            temperature=0.2
-        )
-        llm_qa = ChatOllama(
+        with IMPORT_LOCK:
+            from ollama_client import OllamaClient
+        logger.info(f"Initializing Ollama with URL: {OLLAMA_URL}")
+        ollama_client = OllamaClient(
             base_url=OLLAMA_URL,
-            model=QA_MODEL,
-            temperature=0.7
+            summary_model=SUMMARY_MODEL,
+            qa_model=QA_MODEL,
+            limiter=ollama_limiter,
         )
-        print("LangChain Ollama instances initialized for Legacy RAG.")
+        logger.info(f"LangChain Ollama chains initialized for Legacy RAG (keep_alive={ollama_client.keep_alive}).")
+    except Exception as e:
+        logger.error(f"Error initializing LangChain Ollama: {e}")
+
+def init_stores():
+    global summary_store, document_repo, faq_store
+    # Page summaries cache (content hash -> summary)
+    summary_store = SummaryStore()
+    document_repo = DocumentRepository()
+    # Precomputed FAQ answers, loaded (and kept fresh) by the background refresher
+    if LEGACY_FAQ:
+        faq_store = FaqStore()
+
+def init_embeddings():
+    # Embeddings (Ollama, batched + disk cache): query vectors for retrieval and
+    # background backfill of the chunks ingested by the crawler
+    global embedding_service, embedding_backfill
+    if not EMBEDDING_MODEL:
+        return
+    try:
+        embedding_service = EmbeddingService(OLLAMA_URL, cache=EmbeddingCache(), limiter=embedding_limiter)
+        embedding_backfill = EmbeddingBackfill(embedding_service, leader=UpstreamLimiter("embedding-backfill", 1))
     except Exception as e:
-        print(f"Error initializing LangChain Ollama: {e}")
+        logger.error(f"Error initializing embeddings: {e}")
 
-    # 4. Initialize RAG SQL Service (Gemini)
+def init_rag_sql():
+    # RAG SQL Service (Gemini)
+    global rag_sql_service
     try:
-        rag_sql_service = RAGSQLService()
-        print("RAG SQL Service initialized with gemini-2.5-flash.")
+        with IMPORT_LOCK:
+            from rag_sql import RAGSQLService
+        rag_sql_service = RAGSQLService(limiter=gemini_limiter)
+        logger.info("RAG SQL Service initialized with gemini-2.5-flash.")
     except Exception as e:
-        print(f"Error initializing RAG SQL Service: {e}")
+        logger.error(f"Error initializing RAG SQL Service: {e}")
+
+async def startup():
+    global crawler_client, retriever, reranker, ollama_limiter, gemini_limiter, embedding_limiter, faq_refresher, stats_refresher
+
+    # Concurrency caps per upstream, shared across workers (LIMITER_BACKEND)
+    ollama_limiter = UpstreamLimiter("ollama", OLLAMA_CONCURRENCY)
+    gemini_limiter = UpstreamLimiter("gemini", GEMINI_CONCURRENCY)
+    embedding_limiter = UpstreamLimiter("ollama-embed", EMBEDDING_CONCURRENCY)
+
+    # Independent initialisations run concurrently, off the event loop
+    await asyncio.gather(
+        asyncio.to_thread(load_classifier),
+        asyncio.to_thread(init_preprocessor),
+        asyncio.to_thread(init_ollama),
+        asyncio.to_thread(init_stores),
+        asyncio.to_thread(init_embeddings),
+        asyncio.to_thread(init_rag_sql),
+    )
 
+    # Pooled HTTP client for the crawler service, reused across requests
+    crawler_client = httpx.AsyncClient(timeout=CRAWLER_TIMEOUT)
+    if embedding_backfill:
+        embedding_backfill.start()
+    if faq_store:
+        faq_refresher = FaqRefresher(faq_store, build_faq_answer, model=QA_MODEL, leader=UpstreamLimiter("faq-refresh", 1))
+        faq_refresher.start()
+    # Pre-aggregated statistics for the dashboards (materialized views, STATS_REFRESH_INTERVAL)
+    stats_refresher = RollupRefresher(leader=UpstreamLimiter("stats-refresh", 1))
+    stats_refresher.start()
+    # SQL templates mined from dashboard_history (SQL_TEMPLATE_REFRESH_INTERVAL)
+    if rag_sql_service and rag_sql_service.sql_templates:
+        rag_sql_service.sql_templates.start()
+    retriever = HybridRetriever(embed_query=embedding_service.embed_query if embedding_service else None)
+    # Optional CPU reranking of the retrieved candidates (RERANKER=off|tfidf|cross-encoder)
+    reranker = await asyncio.to_thread(Reranker, vectorizer=vectorizer, preprocessor=preprocessor)
+
+def warm_database():
+    components = (summary_store, document_repo, retriever, rag_sql_service)
+    engines = {
+        id(engine): engine
+        for engine in (getattr(component, "engine", None) for component in components)
+        if engine is not None
+    }
+    for engine in engines.values():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+async def warmup():
+    """Loads the Ollama models, opens the DB pools and exercises the classifier.
+
+    Runs in the background after startup: the service is live immediately and
+    reports ready on /health/ready once every check has passed.
+    """
+    checks = {"database": asyncio.to_thread(warm_database)}
+    if classifier:
+        checks["classifier"] = asyncio.to_thread(classify_relevance, "warmup")
+    if ollama_client:
+        checks["ollama"] = ollama_client.warmup()
+    if embedding_service:
+        checks["embeddings"] = embedding_service.embed_query("warmup")
+    readiness.update({name: "pending" for name in checks})
+
+    results = await asyncio.gather(*checks.values(), return_exceptions=True)
+    for name, result in zip(checks, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Warmup '{name}' failed: {result}")
+            readiness[name] = f"error: {str(result).splitlines()[0]}"
+        else:
+            readiness[name] = "ok"
+    logger.info(f"Warmup completed: {readiness}")
+
+async def shutdown():
+    if warmup_task:
+        warmup_task.cancel()
+    if crawler_client:
+        await crawler_client.aclose()
+    if embedding_backfill:
+        await embedding_backfill.stop()
+    if faq_refresher:
+        await faq_refresher.stop()
+    if stats_refresher:
+        await stats_refresher.stop()
+    if rag_sql_service and rag_sql_service.sql_templates:
+        await rag_sql_service.sql_templates.stop()
+    if embedding_service:
+        await embedding_service.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global warmup_task
+    await startup()
+    readiness["startup"] = "ok"
+    if STARTUP_WARMUP:
+        warmup_task = asyncio.create_task(warmup())
+    yield
+    await shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Every log line of the request (threads included) carries its ID; the
+    # caller's ID is kept, so logs correlate across the webapp and the crawler
+    token = set_request_id(request.headers.get(REQUEST_ID_HEADER))
+    try:
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = get_request_id()
+        return response
+    finally:
+        reset_request_id(token)
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    endpoint = request.url.path
+    if endpoint not in INSTRUMENTED_PATHS:
+        return await call_next(request)
+    REQUESTS_IN_FLIGHT.labels(endpoint=endpoint).inc()
+    start = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        REQUEST_LATENCY.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+        REQUESTS_IN_FLIGHT.labels(endpoint=endpoint).dec()
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": "Servizio sovraccarico, riprova più tardi.", "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 def classify_relevance(question: str) -> bool:
     if not classifier or not vectorizer:
@@ -99,109 +369,324 @@ def classify_relevance(question: str) -> bool:
     prediction = classifier.predict(X)[0]
     return bool(prediction == 1)
 
-async def crawl_content() -> str:
-    """Fetches content from the crawler service asynchronously."""
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        try:
-            print(f"Richiesta al crawler inviata a {CRAWLER_URL}/crawl...")
-            response = await client.post(f"{CRAWLER_URL}/crawl", json={"urls": []})
-            
-            if response.status_code != 200:
-                print(f"Crawler error: {response.status_code}")
-                return ""
-                
-            crawl_data = response.json()
-            results = crawl_data.get("results") or []
-            
-            full_text = ""
-            for res in results:
-                if res.get("success"):
-                    full_text += str(res.get("content", "")) + "\n\n"
+async def crawl_content() -> List[Dict[str, str]]:
+    """Fetches the crawled pages; concurrent requests share a single crawler call."""
+    return await crawl_flight.do("crawl", fetch_crawled_pages)
+
+async def fetch_crawled_pages() -> List[Dict[str, str]]:
+    """Fetches the crawled pages (url + markdown) from the crawler service asynchronously."""
+    try:
+        logger.info(f"Richiesta al crawler inviata a {CRAWLER_URL}/crawl...")
+        response = await crawler_client.post(
+            f"{CRAWLER_URL}/crawl", json={"urls": []}, timeout=deadline_timeout(CRAWLER_TIMEOUT),
+            headers={REQUEST_ID_HEADER: get_request_id()},
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"Crawler error: {response.status_code}")
+            return []
             
-            return full_text
-        except Exception as e:
-            print(f"Crawler request failed: {e}")
-            return ""
+        crawl_data = response.json()
+        results = crawl_data.get("results") or []
+        
+        return [
+            {"url": res.get("url", ""), "content": str(res.get("content", ""))}
+            for res in results
+            if res.get("success") and res.get("content")
+        ]
+    except Exception as e:
+        logger.error(f"Crawler request failed: {e}")
+        return []
 
-# --- NEW LEGACY ENDPOINT (Ollama + Crawler) ---
-@app.post("/ask_legacy", response_model=AskResponse)
-async def ask_legacy(request: AskRequest):
-    # 1. Classification (Non-blocking mode due to strict classifier)
+async def load_pages(urls: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    """Returns the ingested pages (only `urls`, if given)."""
+    return await asyncio.to_thread(document_repo.load_pages, urls)
+
+async def crawl_documents() -> List[Dict[str, Any]]:
+    """Live crawl in place of the index: pages, chunked on the fly in direct mode."""
+    pages = await crawl_content()
+    if LEGACY_SUMMARY_MODE != "direct":
+        return pages
+    chunker = MarkdownChunker()
+    return [
+        {"url": page["url"], **chunk}
+        for page in pages
+        for chunk in chunker.iter_chunks(page["content"], source_url=page["url"])
+    ]
+
+async def retrieve_documents(request: AskRequest, timer: StageTimer, live_crawl: bool = LEGACY_LIVE_CRAWL) -> List[Dict[str, Any]]:
+    # With a reranker, retrieve a wider candidate set and keep only the best few
+    top_k = request.top_k or (RERANK_TOP_K if reranker.enabled else LEGACY_TOP_K)
+    with timer.stage("retrieval"):
+        chunks = await retriever.retrieve(
+            request.question,
+            top_k=RERANK_CANDIDATES if reranker.enabled else top_k,
+            keyword_weight=request.keyword_weight,
+            vector_weight=request.vector_weight,
+        )
+    if reranker.enabled:
+        with timer.stage("rerank"):
+            chunks = await asyncio.to_thread(reranker.rerank, request.question, chunks, top_k)
+
+    with timer.stage("load_documents"):
+        if not chunks:
+            # Nothing matched (or both branches missed the budget): no context rather
+            # than the whole index, which in summary mode means an LLM call per page
+            return await crawl_documents() if live_crawl else []
+        if LEGACY_SUMMARY_MODE == "direct":
+            return chunks
+        return await load_pages(sorted({chunk["url"] for chunk in chunks}))
+
+def pack_context(texts: List[str], budget: int = MAX_CONTEXT_CHARS) -> str:
+    """Joins whole texts within the budget, never slicing through a chunk or table."""
+    packed, size = [], 0
+    for text in texts:
+        if size + len(text) > budget:
+            continue
+        packed.append(text)
+        size += len(text) + 2
+    return "\n\n".join(packed)
+
+async def summarize_page(page: Dict[str, str]) -> str:
+    """Returns the summary of a crawled page, generating it only if its content changed."""
+    key = content_hash(page["content"])
+    summary = await asyncio.to_thread(summary_store.get, key, SUMMARY_MODEL)
+    record_cache("summary", summary is not None)
+    if summary is not None:
+        return summary
+    # Requests retrieving the same uncached page wait for one generation
+    return await summary_flight.do(key, lambda: generate_summary(page, key))
+
+async def generate_summary(page: Dict[str, str], key: str) -> str:
     try:
-        is_relevant = classify_relevance(request.question)
-        if not is_relevant:
-            print(f"WARN: Legacy classifier marked irrelevant: '{request.question}'. Proceeding anyway.")
+        summary = await ollama_client.summarize(page["content"][:MAX_CONTEXT_CHARS])
     except Exception as e:
-        print(f"WARN: Classification error: {e}")
+        logger.error(f"Legacy Summary Error ({page['url']}): {e}")
+        # Not cached: the next request retries the summary
+        return page["content"][:3000]
 
-    # 2. Retrieval
-    raw_content = await crawl_content()
-    if not raw_content:
-        return AskResponse(answer="Impossibile recuperare info dal crawler.", relevant=True, context_used=False)
+    await asyncio.to_thread(summary_store.put, key, SUMMARY_MODEL, summary, page["url"])
+    return summary
 
-    # 3. LangChain Processing (Ollama)
-    if not llm_summary or not llm_qa:
-        return AskResponse(answer="Servizio Ollama non disponibile.", relevant=True, context_used=False)
+async def build_legacy_context(documents: List[Dict[str, Any]], timer: StageTimer) -> str:
+    if LEGACY_SUMMARY_MODE == "direct":
+        return pack_context([chunk["content"] for chunk in documents])
 
-    truncated_content = raw_content[:15000]
-    
-    # Summarize
-    summary_chain = PromptTemplate.from_template(
-        "Riassumi il seguente testo accademico:\n{text}\nRiassunto:"
-    ) | llm_summary | StrOutputParser()
-    
+    with timer.stage("summary"):
+        summaries = await asyncio.gather(*(summarize_page(page) for page in documents))
+    # Pages keep the crawler order so the prompt prefix is stable across questions
+    return pack_context(summaries)
+
+def build_response(timer: StageTimer, **fields) -> AskResponse:
+    return AskResponse(timings=timer.total(), **fields)
+
+def with_timings(request: AskRequest, response: AskResponse) -> AskResponse:
+    if request.debug or DEBUG_TIMINGS:
+        return response
+    return response.model_copy(update={"timings": None})
+
+def question_key(endpoint: str, request: AskRequest) -> tuple:
+    return (endpoint, normalize_question(request.question), request.top_k, request.keyword_weight, request.vector_weight)
+
+# --- NEW LEGACY ENDPOINT (Ollama + Ingested crawler content) ---
+@app.post("/ask_legacy", response_model=AskResponse)
+async def ask_legacy(request: AskRequest):
+    # Frequent questions are served from the precomputed answers: no LLM call
+    response = match_faq(request)
+    if response:
+        return with_timings(request, response)
+    # Duplicates of a question already in flight share its answer (and its admission slot)
+    response = await question_flight.do(
+        question_key("/ask_legacy", request), lambda: legacy_admission.run(lambda: answer_legacy(request))
+    )
+    return with_timings(request, response)
+
+def match_faq(request: AskRequest) -> Optional[AskResponse]:
+    if not faq_store:
+        return None
+    timer = StageTimer("/ask_legacy")
+    with timer.stage("faq"):
+        entry = faq_store.match(request.question)
+    record_cache("faq", entry is not None)
+    if not entry:
+        return None
+    return build_response(timer, answer=entry["answer"], relevant=True, context_used=True)
+
+async def classify_question(question: str, timer: StageTimer) -> bool:
     try:
-        summary_text = await summary_chain.ainvoke({"text": truncated_content})
+        with timer.stage("classification"):
+            is_relevant = await asyncio.to_thread(classify_relevance, question)
     except Exception as e:
-        print(f"Legacy Summary Error: {e}")
-        summary_text = truncated_content[:3000]
+        logger.warning(f"Classification error: {e}")
+        return True
+    if not is_relevant and not LEGACY_CLASSIFIER_GATE:
+        # Non-blocking mode due to strict classifier
+        logger.warning(f"Legacy classifier marked irrelevant: '{question}'. Proceeding anyway.")
+    return is_relevant
+
+async def answer_legacy(request: AskRequest) -> AskResponse:
+    timer = StageTimer("/ask_legacy")
+    dag = RequestDAG(timer)
+    try:
+        fields = await run_legacy_stages(request, timer, dag)
+    finally:
+        await dag.close()
+    return build_response(timer, **fields)
+
+async def run_legacy_stages(request: AskRequest, timer: StageTimer, dag: RequestDAG) -> Dict[str, Any]:
+    # 1. Classification and retrieval are independent: both start right away.
+    # Direct mode answers from the retrieved chunks, summary mode from the pages they belong to
+    dag.add("classification", lambda: classify_question(request.question, timer))
+    dag.add("retrieval", lambda: retrieve_documents(request, timer))
+    if LEGACY_CLASSIFIER_GATE and not await dag.get("classification"):
+        dag.cancel("retrieval")
+        return dict(answer=IRRELEVANT_ANSWER, relevant=False, context_used=False)
+
+    documents = await dag.get("retrieval")
+    if not documents:
+        return dict(answer="Nessun contenuto indicizzato disponibile, riprova più tardi.", relevant=True, context_used=False)
 
-    # QA
-    qa_chain = PromptTemplate.from_template(
-        "Contesto:\n{context}\n\nDomanda: {question}\n\nRisposta:"
-    ) | llm_qa | StrOutputParser()
+    # 2. LangChain Processing (Ollama)
+    if not ollama_client:
+        return dict(answer="Servizio Ollama non disponibile.", relevant=True, context_used=False)
 
+    # Summaries (cached per page) or raw text, depending on LEGACY_SUMMARY_MODE, then QA
+    dag.add("context", lambda docs: build_legacy_context(docs, timer), "retrieval")
+    dag.add("qa", lambda context: generate_answer(context, request.question, timer), "context")
     try:
-        answer_text = await qa_chain.ainvoke({"context": summary_text, "question": request.question})
+        answer_text = await dag.get("qa")
+    except Overloaded:
+        raise
     except Exception as e:
         answer_text = f"Errore generazione risposta legacy: {e}"
 
-    return AskResponse(answer=answer_text, relevant=True, context_used=True)
+    return dict(answer=answer_text, relevant=True, context_used=True)
+
+async def generate_answer(context: str, question: str, timer: StageTimer) -> str:
+    if LEGACY_QA_MODE == "cascade":
+        with timer.stage("qa_draft"):
+            draft, confidence = await ollama_client.draft_answer(context, question)
+        escalate = confidence < ollama_client.cascade_threshold
+        CASCADE_ANSWERS.labels(outcome="escalated" if escalate else "draft").inc()
+        cascade_stats["escalated" if escalate else "draft"] += 1
+        rate = cascade_stats["escalated"] / (cascade_stats["draft"] + cascade_stats["escalated"])
+        logger.info(f"Cascade: confidence {confidence:.2f} -> {'escalated' if escalate else 'draft'} (escalation rate {rate:.0%})")
+        if not escalate:
+            return draft
+
+    with timer.stage("qa"):
+        return await ollama_client.answer(context, question)
+
+async def build_faq_answer(question: str) -> Optional[Tuple[str, List[str]]]:
+    """Runs the legacy pipeline offline for an FAQ question, always with QA_MODEL.
+
+    Returns the answer and the pages it was built from, None if nothing was retrieved.
+    """
+    if not ollama_client:
+        # Not None: the FAQ refresher deletes the answers that retrieve nothing
+        raise RuntimeError("Servizio Ollama non disponibile.")
+    timer = StageTimer()
+    # Never from a live crawl: the answer must be traceable to the ingested pages
+    documents = await retrieve_documents(AskRequest(question=question), timer, live_crawl=False)
+    if not documents:
+        return None
+    context = await build_legacy_context(documents, timer)
+    answer = await ollama_client.answer(context, question)
+    return answer, sorted({document["url"] for document in documents})
+
+@app.post("/summaries/refresh")
+async def refresh_summaries():
+    """Precomputes the summaries of the current ingested snapshot, off the question path."""
+    if not ollama_client:
+        raise HTTPException(status_code=503, detail="Servizio Ollama non disponibile.")
+    pages = await load_pages()
+    # Bounded fan-out: the whole snapshot at once would flood the limiter with waiters
+    slots = asyncio.Semaphore(OLLAMA_CONCURRENCY)
+
+    async def refresh(page: Dict[str, str]):
+        async with slots:
+            await summarize_page(page)
+
+    await asyncio.gather(*(refresh(page) for page in pages))
+    return {"pages": len(pages)}
 
 
 # --- CURRENT GEMINI/SQL ENDPOINT ---
 @app.post("/ask", response_model=AskResponse)
 async def ask(request: AskRequest):
-    # 0. Route Query (SQL vs Text)
-    route = "text"
-    if rag_sql_service:
-        route = rag_sql_service.route_query(request.question)
-        print(f"Query routing decision: {route}")
-    
-    if route == "sql" and rag_sql_service:
-        # Esegue la catena SQL (usa gemini-2.5-flash)
-        result = rag_sql_service.execute_sql_chain(request.question)
-        if "error" in result:
-             return AskResponse(
-                answer=f"Ho provato a consultare il database ma ho riscontrato un errore: {result['error']}",
-                relevant=True,
-                context_used=True
-            )
-        
-        return AskResponse(
-            answer="Ho generato una dashboard con i dati richiesti.",
+    response = await question_flight.do(
+        question_key("/ask", request), lambda: sql_admission.run(lambda: answer_sql(request))
+    )
+    return with_timings(request, response)
+
+async def answer_sql(request: AskRequest) -> AskResponse:
+    timer = StageTimer("/ask")
+    if not rag_sql_service:
+        return text_disabled_response(timer)
+
+    # The Gemini chains are synchronous: run them in a thread, off the event loop
+    dag = RequestDAG(timer)
+    # Without a database there is nothing to plan for
+    speculative = SQL_SPECULATIVE_PLANNING and rag_sql_service.engine is not None
+    try:
+        # 0. Route Query (SQL vs Text); with speculative planning the dashboard is planned meanwhile
+        dag.add("routing", lambda: asyncio.to_thread(rag_sql_service.route_query, request.question, timer))
+        if speculative:
+            dag.add("planning", lambda: asyncio.to_thread(rag_sql_service.plan_questions, request.question, timer))
+        route = await dag.get("routing")
+        logger.info(f"Query routing decision: {route}")
+        if route != "sql":
+            dag.cancel("planning")
+            return text_disabled_response(timer)
+
+        if not rag_sql_service.engine:
+            result = {"error": "Database not available"}
+        else:
+            if not speculative:
+                dag.add("planning", lambda: asyncio.to_thread(rag_sql_service.plan_questions, request.question, timer))
+            # Esegue la catena SQL (usa gemini-2.5-flash): one chart per sub-question, in parallel
+            questions = await dag.get("planning")
+            for i, question in enumerate(questions):
+                dag.add(f"chart_{i}", lambda _, q=question: asyncio.to_thread(rag_sql_service.execute_subquery, q, timer), "planning")
+            items = await asyncio.gather(*(dag.get(f"chart_{i}") for i in range(len(questions))))
+            result = rag_sql_service.build_dashboard(questions, items)
+    finally:
+        await dag.close()
+
+    if "error" in result:
+         return build_response(
+            timer,
+            answer=f"Ho provato a consultare il database ma ho riscontrato un errore: {result['error']}",
             relevant=True,
-            context_used=True,
-            dashboard_data=result
+            context_used=True
         )
+    
+    return build_response(
+        timer,
+        answer="Ho generato una dashboard con i dati richiesti.",
+        relevant=True,
+        context_used=True,
+        dashboard_data=result
+    )
 
+def text_disabled_response(timer: StageTimer) -> AskResponse:
     # Fallback Text per Main Page (disabilitato come richiesto)
-    return AskResponse(
+    return build_response(
+        timer,
         answer="La ricerca testuale su questa pagina è disabilitata. Usa la pagina 'Legacy Chat' per usare il Crawler e Ollama.",
         relevant=True,
         context_used=False
     )
 
+@app.get("/metrics")
+def metrics():
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/health/ready")
+def health_ready():
+    ready = all(state == "ok" for state in readiness.values())
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "checks": readiness})
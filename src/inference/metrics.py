@@ -0,0 +1,51 @@
+import os
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# With several uvicorn workers, each process writes its samples to this
+# directory and /metrics aggregates them (must be empty at container start)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Buckets from 5ms (classification, cache lookups) up to 2 minutes (CPU-only LLM calls)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "ai_request_duration_seconds", "End-to-end request latency", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "ai_stage_duration_seconds", "Latency of a single pipeline stage", ["endpoint", "stage"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "ai_requests_in_flight", "Requests currently being processed", ["endpoint"], multiprocess_mode="livesum"
+)
+LLM_TOKENS = Counter("ai_llm_tokens_total", "Tokens processed by the LLMs", ["model", "kind"])
+CACHE_REQUESTS = Counter("ai_cache_requests_total", "Cache lookups", ["cache", "result"])
+COALESCED_CALLS = Counter("ai_singleflight_calls_total", "Calls executed (leader) or coalesced (follower)", ["flight", "role"])
+CASCADE_ANSWERS = Counter(
+    "ai_cascade_answers_total", "Cascade answers served by the draft model or escalated", ["outcome"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "ai_admission_queue_depth", "Requests waiting for an admission slot", ["endpoint"], multiprocess_mode="livesum"
+)
+ADMISSION_WAIT = Histogram(
+    "ai_admission_wait_seconds", "Time spent waiting for an admission slot", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+ADMISSION_REJECTIONS = Counter(
+    "ai_admission_rejections_total", "Requests rejected by admission control", ["endpoint", "reason"]
+)
+
+
+def observe_stage(endpoint: str, stage: str, seconds: float):
+    STAGE_LATENCY.labels(endpoint=endpoint, stage=stage).observe(seconds)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    if count:
+        CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+
+def render_latest() -> bytes:
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
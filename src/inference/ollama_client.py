@@ -0,0 +1,165 @@
+import os
+import re
+import math
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_ollama import ChatOllama
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from token_usage import token_usage_callback
+from limiter import UpstreamLimiter
+
+# Keep models resident between requests (Ollama unloads them after 5m by default)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Context window large enough for the 15k-char context: if Ollama truncates the
+# prompt, the cached KV prefix can no longer be reused across questions.
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+# Cascade mode: the draft model answers first, QA_MODEL only below the threshold
+CASCADE_MODEL = os.getenv("CASCADE_MODEL", "")
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.6"))
+WORD = re.compile(r"\w{4,}")
+
+# Prompts put the static part (instructions + crawled context) first and the
+# question last, so consecutive requests on the same content share the longest
+# possible prefix and Ollama can reuse its KV cache instead of re-reading it.
+SUMMARY_PROMPT = PromptTemplate.from_template(
+    "Riassumi il seguente testo accademico:\n{text}\nRiassunto:"
+)
+PARAPHRASE_PROMPT = PromptTemplate.from_template(
+    "Riformula la seguente domanda in {n} modi diversi mantenendone il significato. "
+    "Scrivi una domanda per riga, senza numerazione.\nDomanda: {question}\nRiformulazioni:"
+)
+QA_PROMPT = PromptTemplate.from_template(
+    "Rispondi alla domanda usando solo il contesto fornito.\n\n"
+    "Contesto:\n{context}\n\nDomanda: {question}\n\nRisposta:"
+)
+
+
+class OllamaClient:
+    """Ollama layer for the legacy RAG path.
+
+    Both chat models share a pooled HTTP client configuration, pin `keep_alive`
+    so the models stay loaded, and the LangChain chains are built once here
+    instead of on every request. With a `limiter`, generations wait for a slot
+    of the Ollama concurrency cap shared by all workers. `draft_answer` serves
+    the cascade mode: a small-model answer scored by `answer_confidence`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        summary_model: str,
+        qa_model: str,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        num_ctx: int = OLLAMA_NUM_CTX,
+        limiter: Optional[UpstreamLimiter] = None,
+        cascade_threshold: float = CASCADE_THRESHOLD,
+    ):
+        self.base_url = base_url
+        self.summary_model = summary_model
+        self.qa_model = qa_model
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.limiter = limiter
+        self.cascade_threshold = cascade_threshold
+
+        client_kwargs = {
+            "timeout": OLLAMA_TIMEOUT,
+            "limits": httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+            ),
+        }
+
+        self.llm_summary = self._build_llm(summary_model, 0.2, num_ctx, client_kwargs)
+        self.llm_qa = self._build_llm(qa_model, 0.7, num_ctx, client_kwargs)
+
+        self.summary_chain = SUMMARY_PROMPT | self.llm_summary | StrOutputParser()
+        self.paraphrase_chain = PARAPHRASE_PROMPT | self.llm_summary | StrOutputParser()
+        self.qa_chain = QA_PROMPT | self.llm_qa | StrOutputParser()
+
+        # Draft answers keep the whole message: the token log-probs are in its metadata
+        self.cascade_model = CASCADE_MODEL or summary_model
+        self.llm_draft = self._build_llm(self.cascade_model, 0.2, num_ctx, client_kwargs, logprobs=True)
+        self.draft_chain = QA_PROMPT | self.llm_draft
+
+    def _build_llm(self, model: str, temperature: float, num_ctx: int, client_kwargs: dict, logprobs: bool = False) -> ChatOllama:
+        return ChatOllama(
+            base_url=self.base_url,
+            model=model,
+            temperature=temperature,
+            keep_alive=self.keep_alive,
+            num_ctx=num_ctx,
+            client_kwargs=client_kwargs,
+            callbacks=[token_usage_callback],
+            logprobs=logprobs or None,
+        )
+
+    def _slot(self):
+        return self.limiter.slot() if self.limiter else nullcontext()
+
+    async def summarize(self, text: str) -> str:
+        async with self._slot():
+            return await self.summary_chain.ainvoke({"text": text})
+
+    async def answer(self, context: str, question: str) -> str:
+        async with self._slot():
+            return await self.qa_chain.ainvoke({"context": context, "question": question})
+
+    async def paraphrase(self, question: str, n: int) -> List[str]:
+        """Up to `n` rewordings of a question (small model), for the offline FAQ build."""
+        async with self._slot():
+            output = await self.paraphrase_chain.ainvoke({"question": question, "n": n})
+        lines = [line.strip().lstrip("-*0123456789.) ").strip() for line in output.splitlines()]
+        seen = {question.strip().lower()}
+        paraphrases = []
+        for line in lines:
+            if line and line.lower() not in seen:
+                seen.add(line.lower())
+                paraphrases.append(line)
+        return paraphrases[:n]
+
+    async def draft_answer(self, context: str, question: str) -> Tuple[str, float]:
+        """Answers with the cascade model and returns the answer with its confidence."""
+        async with self._slot():
+            message = await self.draft_chain.ainvoke({"context": context, "question": question})
+        answer = StrOutputParser().invoke(message)
+        return answer, answer_confidence(answer, context, message.response_metadata.get("logprobs"))
+
+    async def warmup(self):
+        """Loads both models into memory ahead of the first question.
+
+        An empty prompt only loads the model; `num_ctx` must match the one used by
+        the chains, otherwise Ollama reloads the model on the first real request.
+        """
+        async with httpx.AsyncClient(timeout=OLLAMA_TIMEOUT) as client:
+            for model in dict.fromkeys([self.summary_model, self.qa_model, self.cascade_model]):
+                response = await client.post(
+                    f"{self.base_url}/api/generate",
+                    json={"model": model, "keep_alive": self.keep_alive, "options": {"num_ctx": self.num_ctx}},
+                )
+                response.raise_for_status()
+
+
+def answer_confidence(answer: str, context: str, logprobs: Optional[List[Dict[str, Any]]] = None) -> float:
+    """Confidence in [0, 1] of a draft answer.
+
+    Support is the share of the answer's content words found in the retrieved
+    context (an answer the context does not back is likely made up). When the
+    server returns token log-probs, the geometric mean token probability is also
+    computed and the lower of the two scores wins.
+    """
+    words = WORD.findall(answer.lower())
+    if not words:
+        return 0.0
+    context_words = set(WORD.findall(context.lower()))
+    confidence = sum(word in context_words for word in words) / len(words)
+
+    values = [entry["logprob"] for entry in logprobs or [] if entry.get("logprob") is not None]
+    if values:
+        confidence = min(confidence, math.exp(sum(values) / len(values)))
+    return confidence
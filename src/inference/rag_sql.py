@@ -1,24 +1,37 @@
 import os
 import json
 import logging
+from contextlib import nullcontext
 from typing import Dict, Any, List, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from token_usage import token_usage_callback
+from timing import StageTimer
+from limiter import UpstreamLimiter
+from admission import check_deadline
+from singleflight import SyncSingleFlight, normalize_question
+from rollups import ROLLUP_SCHEMA
+from sql_templates import SqlTemplateLibrary
+from metrics import record_cache
 
-# Setup Logger
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Config
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
+# Serve known query shapes from the templates mined from dashboard_history
+SQL_TEMPLATES = os.getenv("SQL_TEMPLATES", "true").lower() == "true"
 
 class RAGSQLService:
-    def __init__(self):
+    def __init__(self, limiter: Optional[UpstreamLimiter] = None):
+        # Gemini concurrency cap shared by all workers; identical sub-queries in
+        # flight at the same time (same dashboard requested by many users) run once
+        self.limiter = limiter
+        self.subquery_flight = SyncSingleFlight("sql_subquery")
         try:
             self.engine = create_engine(DATABASE_URL)
             self.Session = sessionmaker(bind=self.engine)
@@ -26,18 +39,22 @@ class RAGSQLService:
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             self.engine = None
+        # Parameterized SQL learned from the successful queries (refreshed by main.py)
+        self.sql_templates = SqlTemplateLibrary(self.engine) if SQL_TEMPLATES and self.engine else None
         
         # Initialize LLM (Prefer Gemini, fallback to Ollama if needed but strictly using gemini-2.5-flash as requested)
         if GEMINI_API_KEY:
             self.llm = ChatGoogleGenerativeAI(
                 model="gemini-2.5-flash-lite",
                 google_api_key=GEMINI_API_KEY,
-                temperature=0.1
+                temperature=0.1,
+                callbacks=[token_usage_callback]
             )
             self.llm_creative = ChatGoogleGenerativeAI(
                 model="gemini-2.5-flash-lite",
                 google_api_key=GEMINI_API_KEY,
-                temperature=0.7
+                temperature=0.7,
+                callbacks=[token_usage_callback]
             )
             logger.info("Initialized Gemini API (gemini-2.5-flash)")
         else:
@@ -88,7 +105,8 @@ class RAGSQLService:
         # 2. SQL Generation Prompt
         self.sql_prompt = ChatPromptTemplate.from_template(
             """Sei un esperto SQL PostgreSQL. Genera una query SQL per rispondere alla domanda.
-            Usa SOLO le seguenti tabelle: studenti, corsi_laurea, insegnamenti, appelli, esami.
+            Usa SOLO le seguenti tabelle: studenti, corsi_laurea, insegnamenti, appelli, esami,
+            e le viste pre-aggregate mv_iscrizioni, mv_voti_insegnamento, mv_esiti_appelli.
             
             Schema rilevante con Tipi di Dato:
             - studenti(id INT, matricola TEXT, nome TEXT, cognome TEXT, corso_laurea_id INT, anno_iscrizione INT, status TEXT)
@@ -100,8 +118,12 @@ class RAGSQLService:
             - appelli(id INT, insegnamento_id INT, data_appello DATE)
               * NOTA: 'data_appello' è DATE. Qui PUOI usare EXTRACT(YEAR FROM data_appello).
 
+            Viste pre-aggregate (statistiche già calcolate, molto più veloci dei JOIN sulle tabelle):
+            {rollup_schema}
+
             Regole:
             - Non usare tabelle non elencate.
+            - Per iscritti per anno o per corso, media voti per insegnamento ed esiti/tassi di superamento degli appelli usa le viste pre-aggregate invece dei JOIN sulle tabelle.
             - Usa JOIN corrette.
             - Se la domanda chiede medie, usa AVG().
             - Se chiede conteggi, usa COUNT().
@@ -110,7 +132,7 @@ class RAGSQLService:
 
             Domanda: {question}
             SQL:"""
-        )
+        ).partial(rollup_schema=ROLLUP_SCHEMA)
 
         # 3. Visualization Prompt
         self.viz_prompt = ChatPromptTemplate.from_template(
@@ -126,30 +148,39 @@ class RAGSQLService:
             JSON Config:"""
         )
 
-    def route_query(self, question: str) -> str:
+    def _invoke(self, chain, inputs: Dict[str, Any]):
+        # A request past its deadline has already been answered with 503: stop here
+        check_deadline()
+        with self.limiter.slot_sync() if self.limiter else nullcontext():
+            return chain.invoke(inputs)
+
+    def route_query(self, question: str, timer: Optional[StageTimer] = None) -> str:
+        timer = timer or StageTimer()
         chain = self.router_prompt | self.llm | JsonOutputParser()
         try:
-            res = chain.invoke({"question": question})
+            with timer.stage("routing"):
+                res = self._invoke(chain, {"question": question})
             return res.get("destination", "text")
         except Exception as e:
             logger.error(f"Routing error: {e}")
             return "text"
 
-    def save_dashboard_history(self, question: str, sql: str, data: List[Dict], viz_config: Dict):
+    def save_dashboard_history(self, question: str, sql: str, data: List[Dict], viz_config: Dict, sql_template: Optional[str] = None):
         if not self.engine: return
         try:
             with self.engine.connect() as conn:
                 import json
                 conn.execute(
                     text("""
-                        INSERT INTO dashboard_history (user_query, generated_sql, context_json, generated_ejs)
-                        VALUES (:q, :s, :d, :v)
+                        INSERT INTO dashboard_history (user_query, generated_sql, context_json, generated_ejs, sql_template)
+                        VALUES (:q, :s, :d, :v, :t)
                     """),
                     {
                         "q": question,
                         "s": sql,
                         "d": json.dumps(data, default=str),
-                        "v": json.dumps(viz_config)
+                        "v": json.dumps(viz_config),
+                        "t": sql_template
                     }
                 )
                 conn.commit()
@@ -157,40 +188,59 @@ class RAGSQLService:
         except Exception as e:
             logger.error(f"Failed to save history: {e}")
 
-    def execute_single_sql_query(self, question: str) -> Optional[Dict]:
+    def execute_single_sql_query(self, question: str, timer: Optional[StageTimer] = None) -> Optional[Dict]:
         """Helper to execute a single question flow"""
-        # 1. Generate SQL
-        sql_chain = self.sql_prompt | self.llm | StrOutputParser()
-        try:
-            generated_sql = sql_chain.invoke({"question": question})
-            generated_sql = generated_sql.replace("```sql", "").replace("```", "").strip()
-            logger.info(f"Generated SQL for '{question}': {generated_sql}")
-        except Exception as e:
-             logger.error(f"SQL Gen error: {e}")
-             return None
+        timer = timer or StageTimer()
+        # 1. Known query shape: fill a mined template, no SQL generation
+        generated_sql, result_data, template_name = None, None, None
+        template = self.sql_templates.match(question) if self.sql_templates else None
+        if template:
+            try:
+                with timer.stage("sql_execution"), self.engine.connect() as conn:
+                    keys, rows = self.sql_templates.execute(conn, template)
+                generated_sql = template.render()
+                result_data = [{k: str(v) for k, v in zip(keys, row)} for row in rows]
+                template_name = template.template.name
+                logger.info(f"SQL template for '{question}' (support {template.template.support}): {generated_sql}")
+            except Exception as e:
+                logger.warning(f"SQL template failed, generating the query instead: {e}")
+        record_cache("sql_template", result_data is not None)
 
-        # 2. Execute SQL
-        result_data = []
-        try:
-            with self.engine.connect() as conn:
-                result = conn.execute(text(generated_sql))
-                keys = result.keys()
-                for row in result.fetchall():
-                    row_dict = {}
-                    for k, v in zip(keys, row):
-                        row_dict[k] = str(v)
-                    result_data.append(row_dict)
-        except Exception as e:
-            logger.error(f"SQL Execution error: {e}")
-            return {"error": str(e), "sql": generated_sql}
+        if result_data is None:
+            # 2. Generate SQL
+            sql_chain = self.sql_prompt | self.llm | StrOutputParser()
+            try:
+                with timer.stage("sql_generation"):
+                    generated_sql = self._invoke(sql_chain, {"question": question})
+                generated_sql = generated_sql.replace("```sql", "").replace("```", "").strip()
+                logger.info(f"Generated SQL for '{question}': {generated_sql}")
+            except Exception as e:
+                 logger.error(f"SQL Gen error: {e}")
+                 return None
 
-        # 3. Generate Viz Config (Robust Parsing)
+            # 3. Execute SQL
+            result_data = []
+            try:
+                with timer.stage("sql_execution"), self.engine.connect() as conn:
+                    result = conn.execute(text(generated_sql))
+                    keys = result.keys()
+                    for row in result.fetchall():
+                        row_dict = {}
+                        for k, v in zip(keys, row):
+                            row_dict[k] = str(v)
+                        result_data.append(row_dict)
+            except Exception as e:
+                logger.error(f"SQL Execution error: {e}")
+                return {"error": str(e), "sql": generated_sql}
+
+        # 4. Generate Viz Config (Robust Parsing)
         viz_config = {}
         if result_data:
             # Use StrOutputParser instead of JsonOutputParser to handle markdown manually
             viz_chain = self.viz_prompt | self.llm_creative | StrOutputParser()
             try:
-                raw_viz = viz_chain.invoke({"data": str(result_data[:20]), "question": question})
+                with timer.stage("chart_generation"):
+                    raw_viz = self._invoke(viz_chain, {"data": str(result_data[:20]), "question": question})
                 # Clean Markdown
                 cleaned_viz = raw_viz.replace("```json", "").replace("```", "").strip()
                 viz_config = json.loads(cleaned_viz)
@@ -199,8 +249,9 @@ class RAGSQLService:
                 # Fallback: empty config, frontend should handle this or show data table
                 viz_config = {}
 
-        # 4. Save History
-        self.save_dashboard_history(question, generated_sql, result_data, viz_config)
+        # 5. Save History (flagged when served by a template, so mining skips it)
+        with timer.stage("history_save"):
+            self.save_dashboard_history(question, generated_sql, result_data, viz_config, template_name)
 
         return {
             "sql": generated_sql,
@@ -209,14 +260,13 @@ class RAGSQLService:
             "title": question
         }
 
-    def execute_sql_chain(self, main_question: str) -> Dict[str, Any]:
-        if not self.engine:
-            return {"error": "Database not available"}
-
-        # 1. Plan: Decompose question
+    def plan_questions(self, main_question: str, timer: Optional[StageTimer] = None) -> List[str]:
+        """Decomposes the request into at most 3 sub-questions (one per chart)."""
+        timer = timer or StageTimer()
         planner_chain = self.planner_prompt | self.llm | JsonOutputParser()
         try:
-            questions_list = planner_chain.invoke({"question": main_question})
+            with timer.stage("planning"):
+                questions_list = self._invoke(planner_chain, {"question": main_question})
             if not isinstance(questions_list, list):
                 questions_list = [main_question]
             logger.info(f"Dashboard Plan: {questions_list}")
@@ -225,11 +275,27 @@ class RAGSQLService:
             questions_list = [main_question]
 
         # Limit to 3 charts to avoid timeout/quota
-        questions_list = questions_list[:3]
+        return questions_list[:3]
 
+    def execute_sql_chain(self, main_question: str, timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+        """Sequential form of the /ask SQL pipeline: the endpoint runs the same stages as a DAG."""
+        if not self.engine:
+            return {"error": "Database not available"}
+        # Sub-queries accumulate into the same stages of the request timer
+        timer = timer or StageTimer()
+        questions_list = self.plan_questions(main_question, timer)
+        return self.build_dashboard(questions_list, [self.execute_subquery(q, timer) for q in questions_list])
+
+    def execute_subquery(self, question: str, timer: Optional[StageTimer] = None) -> Optional[Dict]:
+        """One chart of the dashboard; identical sub-queries in flight run once."""
+        return self.subquery_flight.do(
+            normalize_question(str(question)), lambda: self.execute_single_sql_query(question, timer)
+        )
+
+    @staticmethod
+    def build_dashboard(questions_list: List[str], items: List[Optional[Dict]]) -> Dict[str, Any]:
         dashboard_items = []
-        for q in questions_list:
-            item = self.execute_single_sql_query(q)
+        for q, item in zip(questions_list, items):
             # Check if item is valid and not an error response
             if item and not item.get("error"):
                 dashboard_items.append(item)
@@ -242,4 +308,4 @@ class RAGSQLService:
         return {
             "type": "multi-dashboard",
             "charts": dashboard_items
-        }
\ No newline at end of file
+        }
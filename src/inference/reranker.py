@@ -0,0 +1,85 @@
+import os
+import time
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# "off", "tfidf" (classifier vectorizer cosine) or "cross-encoder"
+RERANKER = os.getenv("RERANKER", "off")
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "5"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+
+
+class Reranker:
+    """Reranks retrieved chunks on CPU before they reach the QA model.
+
+    Scores (question, chunk) pairs in batches, either with a small cross-encoder
+    (needs `sentence-transformers`) or with the cosine similarity in the TF-IDF
+    space of the classifier's `vectorizer`. Scoring stops when the time budget is
+    spent: unscored candidates keep their retrieval order after the scored ones.
+    """
+
+    def __init__(
+        self,
+        mode: str = RERANKER,
+        vectorizer=None,
+        preprocessor=None,
+        model_name: str = RERANKER_MODEL,
+        batch_size: int = RERANK_BATCH_SIZE,
+        budget_ms: float = RERANK_BUDGET_MS,
+    ):
+        self.mode = mode
+        self.vectorizer = vectorizer
+        self.preprocessor = preprocessor
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.cross_encoder = None
+
+        if mode == "cross-encoder":
+            try:
+                from sentence_transformers import CrossEncoder
+                self.cross_encoder = CrossEncoder(model_name, device="cpu")
+                logger.info(f"Reranker: cross-encoder {model_name}")
+            except Exception as e:
+                logger.warning(f"Cross-encoder unavailable ({e}), falling back to TF-IDF reranking")
+                self.mode = "tfidf"
+        if self.mode == "tfidf" and (vectorizer is None or preprocessor is None):
+            logger.warning("TF-IDF reranking needs the classifier vectorizer, reranking disabled")
+            self.mode = "off"
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _score_batch(self, question: str, query_vector, texts: List[str]) -> List[float]:
+        if self.cross_encoder is not None:
+            return [float(s) for s in self.cross_encoder.predict([(question, t) for t in texts])]
+        docs = self.vectorizer.transform([self.preprocessor.preprocess(t) for t in texts])
+        # TF-IDF rows are L2-normalized: the dot product is the cosine similarity
+        return (docs @ query_vector.T).toarray().ravel().tolist()
+
+    def rerank(self, question: str, candidates: List[Dict[str, Any]], top_k: int = RERANK_TOP_K) -> List[Dict[str, Any]]:
+        if not self.enabled or len(candidates) <= 1:
+            return candidates[:top_k]
+
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        query_vector = None
+        if self.cross_encoder is None:
+            query_vector = self.vectorizer.transform([self.preprocessor.preprocess(question)])
+
+        scored = []
+        for start in range(0, len(candidates), self.batch_size):
+            if time.perf_counter() > deadline:
+                logger.warning(f"Rerank budget of {self.budget_ms:.0f}ms exhausted after {start} candidates")
+                break
+            batch = candidates[start:start + self.batch_size]
+            scores = self._score_batch(question, query_vector, [c["content"] for c in batch])
+            scored.extend({**c, "rerank_score": s} for c, s in zip(batch, scores))
+
+        # Stable sort: ties keep the retrieval order
+        ranked = sorted(scored, key=lambda c: c["rerank_score"], reverse=True)
+        return (ranked + candidates[len(scored):])[:top_k]
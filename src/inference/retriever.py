@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "50"))
+RETRIEVAL_BUDGET_MS = float(os.getenv("RETRIEVAL_BUDGET_MS", "300"))
+RRF_K = 60
+# "halfvec" queries the float16 expression index, "vector" the full-precision column
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "halfvec")
+
+# Keeps course codes ("LM-32") and acronyms ("ISEE") as single terms
+QUERY_TERM_PATTERN = re.compile(r"\w+(?:-\w+)*")
+
+
+def build_tsquery(question: str) -> str:
+    """OR-query over the question terms: ts_rank_cd then favours chunks matching more of them."""
+    terms = {term.lower() for term in QUERY_TERM_PATTERN.findall(question) if len(term) > 1}
+    return " | ".join(f"'{term}'" for term in sorted(terms))
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict]], weights: Dict[str, float], k: int = RRF_K) -> List[Dict]:
+    """Fuses several rankings of the same chunks: score = sum(weight / (k + rank))."""
+    fused: Dict[int, Dict] = {}
+    for name, ranking in rankings.items():
+        weight = weights.get(name, 1.0)
+        for rank, doc in enumerate(ranking, 1):
+            entry = fused.setdefault(doc["id"], {**doc, "score": 0.0, "ranks": {}})
+            entry["score"] += weight / (k + rank)
+            entry["ranks"][name] = rank
+    return sorted(fused.values(), key=lambda d: d["score"], reverse=True)
+
+
+class HybridRetriever:
+    """Hybrid retrieval over `rag_documents`.
+
+    Combines Postgres full-text search (`italian` tsvector, GIN index), which
+    catches exact terms like "ISEE" or "LM-32", with pgvector similarity, and
+    fuses the two rankings with reciprocal rank fusion. Both searches run
+    concurrently; a branch that misses the latency budget is dropped and the
+    other one is returned alone (a query embedding still running is left to
+    finish, so it gets cached). Without `embed_query` only full-text is used.
+    """
+
+    def __init__(
+        self,
+        database_url: str = DATABASE_URL,
+        embed_query: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        candidates: int = RETRIEVAL_CANDIDATES,
+        budget_ms: float = RETRIEVAL_BUDGET_MS,
+    ):
+        self.embed_query = embed_query
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        # Query embeddings still running after their branch was dropped
+        self._embeddings: Set[asyncio.Task] = set()
+        try:
+            self.engine = create_engine(database_url, pool_pre_ping=True)
+        except Exception as e:
+            logger.error(f"Retriever DB unavailable: {e}")
+            self.engine = None
+
+    def _rows(self, result) -> List[Dict[str, Any]]:
+        return [
+            {"id": row[0], "url": row[1], "content": row[2], "metadata": row[3] or {}}
+            for row in result.fetchall()
+        ]
+
+    def keyword_search(self, question: str, limit: int) -> List[Dict[str, Any]]:
+        query = build_tsquery(question)
+        if not query:
+            return []
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text("""
+                    SELECT id, source_url, content, metadata
+                    FROM rag_documents, to_tsquery('italian', :q) AS query
+                    WHERE content_tsv @@ query
+                    ORDER BY ts_rank_cd(content_tsv, query) DESC
+                    LIMIT :k
+                """),
+                {"q": query, "k": limit}
+            )
+            return self._rows(result)
+
+    def vector_search(self, embedding: List[float], limit: int) -> List[Dict[str, Any]]:
+        # The ORDER BY expression must match the index expression to use it
+        if VECTOR_INDEX_TYPE == "halfvec":
+            distance = "embedding::halfvec(768) <=> CAST(:e AS halfvec(768))"
+        else:
+            distance = "embedding <=> CAST(:e AS vector)"
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text(f"""
+                    SELECT id, source_url, content, metadata
+                    FROM rag_documents
+                    WHERE embedding IS NOT NULL
+                    ORDER BY {distance}
+                    LIMIT :k
+                """),
+                {"e": json.dumps(embedding), "k": limit}
+            )
+            return self._rows(result)
+
+    def _embedding_done(self, task: asyncio.Task):
+        self._embeddings.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Query embedding failed: {task.exception()}")
+
+    async def _vector_branch(self, question: str, limit: int) -> List[Dict[str, Any]]:
+        # The embedding outlives a branch that misses the budget: it still lands in
+        # the embedding cache, so the next time the question gets the vector branch
+        task = asyncio.create_task(self.embed_query(question))
+        self._embeddings.add(task)
+        task.add_done_callback(self._embedding_done)
+        embedding = await asyncio.shield(task)
+        return await asyncio.to_thread(self.vector_search, embedding, limit)
+
+    async def retrieve(
+        self,
+        question: str,
+        top_k: int = 5,
+        keyword_weight: float = 1.0,
+        vector_weight: float = 1.0,
+        budget_ms: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the top_k chunks; a weight of 0 disables the corresponding branch."""
+        if not self.engine:
+            return []
+        budget = (budget_ms or self.budget_ms) / 1000
+
+        branches = {}
+        if keyword_weight > 0:
+            branches["keyword"] = asyncio.create_task(
+                asyncio.to_thread(self.keyword_search, question, self.candidates)
+            )
+        if vector_weight > 0 and self.embed_query:
+            branches["vector"] = asyncio.create_task(self._vector_branch(question, self.candidates))
+        if not branches:
+            return []
+
+        done, pending = await asyncio.wait(branches.values(), timeout=budget)
+        for task in pending:
+            task.cancel()
+
+        rankings = {}
+        for name, task in branches.items():
+            if task not in done:
+                logger.warning(f"Retrieval branch '{name}' exceeded {budget * 1000:.0f}ms budget, skipped")
+            elif task.exception():
+                logger.error(f"Retrieval branch '{name}' failed: {task.exception()}")
+            else:
+                rankings[name] = task.result()
+
+        fused = reciprocal_rank_fusion(rankings, {"keyword": keyword_weight, "vector": vector_weight})
+        return fused[:top_k]
@@ -0,0 +1,74 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy import create_engine, text
+from limiter import UpstreamLimiter
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+# Seconds between refreshes of the pre-aggregated statistics (0 disables the schedule)
+STATS_REFRESH_INTERVAL = int(os.getenv("STATS_REFRESH_INTERVAL", "900"))
+
+# Materialized views of init.sql, described for the SQL generation prompt
+ROLLUP_SCHEMA = """- mv_iscrizioni(anno_iscrizione INT, corso_laurea_id INT, corso_laurea TEXT, tipo_laurea TEXT, status TEXT, studenti INT)
+              * Una riga per anno di iscrizione, corso di laurea e stato: per i totali usa SUM(studenti).
+            - mv_voti_insegnamento(insegnamento_id INT, insegnamento TEXT, cfu INT, anno_corso INT, corso_laurea_id INT, corso_laurea TEXT,
+                                   esami_sostenuti INT, superati INT, respinti INT, lodi INT, voto_medio NUMERIC, tasso_superamento NUMERIC)
+              * Una riga per insegnamento. 'voto_medio' è calcolato solo sugli esami superati, 'tasso_superamento' è tra 0 e 1.
+            - mv_esiti_appelli(appello_id INT, data_appello DATE, anno INT, insegnamento_id INT, insegnamento TEXT, corso_laurea_id INT,
+                               corso_laurea TEXT, iscritti INT, superati INT, respinti INT, assenti INT, voto_medio NUMERIC, tasso_superamento NUMERIC)
+              * Una riga per appello; 'anno' è l'anno di data_appello."""
+
+
+class RollupRefresher:
+    """Refreshes the materialized views with the pre-aggregated statistics.
+
+    `refresh_statistiche()` (init.sql) refreshes them CONCURRENTLY, so the
+    dashboards keep reading the previous snapshot meanwhile. With a `leader`
+    lock (limit 1) only one worker refreshes each round.
+    """
+
+    def __init__(self, database_url: str = DATABASE_URL, leader: Optional[UpstreamLimiter] = None):
+        self.leader = leader
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        # The views only exist on Postgres
+        self.enabled = self.engine.dialect.name == "postgresql"
+        self._task: Optional[asyncio.Task] = None
+
+    def refresh(self) -> float:
+        start = time.perf_counter()
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT refresh_statistiche()"))
+        return time.perf_counter() - start
+
+    async def run_once(self) -> Optional[float]:
+        slot = await asyncio.to_thread(self.leader.try_acquire) if self.leader else False
+        if slot is None:
+            return None  # another worker is refreshing
+        try:
+            return await asyncio.to_thread(self.refresh)
+        finally:
+            if self.leader:
+                await asyncio.to_thread(self.leader.release, slot)
+
+    async def _loop(self, interval: int):
+        while True:
+            try:
+                elapsed = await self.run_once()
+                if elapsed is not None:
+                    logger.info(f"Statistics views refreshed in {elapsed:.2f}s")
+            except Exception as e:
+                logger.error(f"Statistics refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: int = STATS_REFRESH_INTERVAL):
+        if self.enabled and interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,67 @@
+import re
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from metrics import COALESCED_CALLS
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case, spacing and trailing punctuation don't change the answer."""
+    return WHITESPACE.sub(" ", question).strip().rstrip("?!. ").lower()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs `fn`; callers arriving while it is in flight await the
+    same result (or exception). Nothing is cached: once the call completes, the
+    next caller starts a new one. The shared call is shielded, so a caller that
+    disconnects does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            COALESCED_CALLS.labels(flight=self.name, role="follower").inc()
+            return await asyncio.shield(future)
+
+        COALESCED_CALLS.labels(flight=self.name, role="leader").inc()
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+
+class SyncSingleFlight:
+    """Thread-based variant of `SingleFlight` for code running in worker threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        COALESCED_CALLS.labels(flight=self.name, role="leader" if leader else "follower").inc()
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
@@ -0,0 +1,314 @@
+import os
+import re
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from keywords import content_words
+from singleflight import normalize_question
+
+logger = logging.getLogger(__name__)
+
+# Successful history rows a template needs before it replaces SQL generation
+SQL_TEMPLATE_MIN_SUPPORT = int(os.getenv("SQL_TEMPLATE_MIN_SUPPORT", "2"))
+# Seconds between re-minings of dashboard_history
+SQL_TEMPLATE_REFRESH_INTERVAL = int(os.getenv("SQL_TEMPLATE_REFRESH_INTERVAL", "600"))
+HISTORY_LIMIT = 5000
+
+# Successful generated queries only: the ones that returned rows. Rows served by a
+# template are not evidence for it (a template would reinforce itself forever)
+HISTORY_SQL = """
+    SELECT user_query, generated_sql FROM dashboard_history
+    WHERE generated_sql IS NOT NULL AND context_json IS NOT NULL AND CAST(context_json AS TEXT) <> '[]'
+      AND sql_template IS NULL
+    ORDER BY created_at DESC LIMIT :limit
+"""
+# Names that questions mention literally (course names, course units)
+ENTITY_SQL = ("SELECT DISTINCT nome FROM corsi_laurea", "SELECT DISTINCT nome FROM insegnamenti")
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w.$:])\d+(?:\.\d+)?(?![\w.])")
+QUESTION_NUMBER = re.compile(r"(?<![\w.,])\d+(?:[.,]\d+)?(?![\w]|[.,]\d)")
+YEAR = re.compile(r"^(19|20)\d{2}$")
+PLACEHOLDER = re.compile(r"\$(\d+)\b")
+YEAR_SLOT, NUMBER_SLOT, TEXT_SLOT = "year", "number", "text"
+
+
+@dataclass(frozen=True)
+class Slot:
+    """A parameter of a template: a literal of the SQL that came from the question."""
+    kind: str        # year, number or text (how it is found in a question)
+    value_type: str  # int, float or str (how it is bound)
+    prefix: str = ""  # LIKE wildcards around the value
+    suffix: str = ""
+
+
+@dataclass
+class SqlTemplate:
+    sql: str  # $1..$n placeholders, in SQL order
+    slots: Tuple[Slot, ...]
+    support: int = 0
+
+    @property
+    def name(self) -> str:
+        return "sqlt_" + hashlib.sha1(self.sql.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class TemplateMatch:
+    template: SqlTemplate
+    params: Tuple[Any, ...]
+
+    def render(self) -> str:
+        """The SQL with the literals inlined (for dashboard_history and the logs)."""
+        def literal(match: re.Match) -> str:
+            value = self.params[int(match.group(1)) - 1]
+            return str(value) if not isinstance(value, str) else "'" + value.replace("'", "''") + "'"
+        return PLACEHOLDER.sub(literal, self.template.sql)
+
+
+def _slot_kind(value: str) -> str:
+    if YEAR.match(value):
+        return YEAR_SLOT
+    return NUMBER_SLOT if re.fullmatch(r"\d+(?:\.\d+)?", value) else TEXT_SLOT
+
+
+def _find(value: str, question: str) -> Optional[Tuple[int, int]]:
+    match = re.search(rf"(?<!\w){re.escape(value.lower())}(?!\w)", question)
+    return match.span() if match else None
+
+
+def _shape(question: str, spans: Sequence[Tuple[int, int, str]]) -> str:
+    """The question with the parameter values replaced by their kind."""
+    shape, last = [], 0
+    for start, end, kind in spans:
+        shape += [question[last:start], f" __{kind}__ "]
+        last = end
+    shape.append(question[last:])
+    return "".join(shape)
+
+
+def shape_key(shape: str) -> Tuple[str, ...]:
+    """What two question shapes must share to be served by the same template.
+
+    The content words in order (the values replaced by their kind): only articles,
+    prepositions and the like may differ. A changed word or a negation ("laureati"
+    for "iscritti", "non si sono iscritti") is a different question.
+    """
+    return content_words(shape)
+
+
+def parameterize(sql: str, question: str) -> Optional[Tuple[SqlTemplate, str, Tuple[int, ...], Tuple[str, ...]]]:
+    """Turns a (question, SQL) pair into a template.
+
+    The literals of the SQL that also appear in the question (years, numbers,
+    course names) become placeholders; the other literals are part of the
+    shape of the query. Returns the template, the question shape, for each
+    value in question order the index of its placeholder, and the values.
+    """
+    sql = " ".join(sql.strip().rstrip(";").split())
+    if not re.match(r"(?i)^(select|with)\b", sql) or ";" in sql or PLACEHOLDER.search(sql):
+        return None
+    question = normalize_question(question)
+
+    slots: List[Slot] = []
+    values: List[str] = []
+    params: Dict[Tuple[str, Slot], int] = {}
+    spans: Dict[str, Tuple[int, int, int]] = {}  # value -> question span, placeholder
+
+    def placeholder(value: str, slot: Slot) -> Optional[str]:
+        span = _find(value, question)
+        if span is None:
+            return None
+        key = (value.lower(), slot)
+        if key not in params:
+            if value.lower() in spans:
+                raise ValueError("same value bound twice with different wildcards")
+            slots.append(slot)
+            values.append(value)
+            params[key] = len(slots)
+            spans[value.lower()] = (*span, len(slots))
+        return f"${params[key]}"
+
+    def replace_string(match: re.Match) -> str:
+        inner = match.group(0)[1:-1].replace("''", "'")
+        value = inner.strip("%")
+        if not value:
+            return match.group(0)
+        prefix, suffix = inner[:len(inner) - len(inner.lstrip("%"))], inner[len(inner.rstrip("%")):]
+        return placeholder(value, Slot(_slot_kind(value), "str", prefix, suffix)) or match.group(0)
+
+    def replace_number(match: re.Match) -> str:
+        value = match.group(0)
+        return placeholder(value, Slot(_slot_kind(value), "float" if "." in value else "int")) or value
+
+    try:
+        parts, last = [], 0
+        for match in STRING_LITERAL.finditer(sql):
+            parts.append(NUMBER_LITERAL.sub(replace_number, sql[last:match.start()]))
+            parts.append(replace_string(match))
+            last = match.end()
+        parts.append(NUMBER_LITERAL.sub(replace_number, sql[last:]))
+    except ValueError:
+        return None
+
+    ordered = sorted(spans.values())
+    if any(a[1] > b[0] for a, b in zip(ordered, ordered[1:])):
+        return None  # overlapping values: ambiguous
+    shape = _shape(question, [(start, end, slots[index - 1].kind) for start, end, index in ordered])
+    order = tuple(index - 1 for _, _, index in ordered)
+    return SqlTemplate("".join(parts), tuple(slots)), shape, order, tuple(values)
+
+
+class SqlTemplateLibrary:
+    """Parameterized SQL mined from the successful dashboard queries.
+
+    Gemini tends to write the same queries for the same kind of question, with
+    different literals (a year, a course name). `refresh` parameterizes the
+    history of `dashboard_history` and indexes the question shapes; `match`
+    recognises a known shape in a new question, extracts its values and fills
+    the template, with no LLM call. Shapes match only when they have the same
+    content words (`shape_key`): a near miss goes to the LLM. On Postgres the templates run as
+    prepared statements, so each pooled connection plans them only once.
+    """
+
+    def __init__(
+        self,
+        engine,
+        min_support: int = SQL_TEMPLATE_MIN_SUPPORT,
+    ):
+        self.engine = engine
+        self.min_support = min_support
+        self.prepared = engine.dialect.name == "postgresql"
+        # (shape key -> (value order, template), entity names)
+        self._index: Optional[Tuple[Dict[Tuple[str, ...], Tuple[Tuple[int, ...], SqlTemplate]], Dict[str, str]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _load_entities(self) -> Dict[str, str]:
+        entities = {}
+        for sql in ENTITY_SQL:
+            try:
+                with self.engine.connect() as conn:
+                    entities.update({row[0].lower(): row[0] for row in conn.execute(text(sql)) if row[0]})
+            except Exception as e:
+                logger.debug(f"Entity names not loaded ({sql}): {e}")
+        return entities
+
+    def refresh(self) -> int:
+        """Re-mines the history; returns the number of templates in use."""
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(HISTORY_SQL), {"limit": HISTORY_LIMIT}).fetchall()
+        entities = self._load_entities()
+
+        templates: Dict[str, SqlTemplate] = {}
+        shapes: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+        for question, sql in rows:
+            mined = parameterize(sql, question)
+            if mined is None:
+                continue
+            template, shape, order, values = mined
+            template = templates.setdefault(template.sql, template)
+            template.support += 1
+            shapes.setdefault((template.sql, shape), order)
+            # Text values seen in the history are entities too (e.g. partial names under ILIKE)
+            for slot, value in zip(template.slots, values):
+                if slot.kind == TEXT_SLOT:
+                    entities.setdefault(value.lower(), value)
+
+        entries: Dict[Tuple[str, ...], Tuple[Tuple[int, ...], SqlTemplate]] = {}
+        for (template_sql, shape), order in shapes.items():
+            template = templates[template_sql]
+            if template.support < self.min_support:
+                continue
+            key = shape_key(shape)
+            # Same shape, different queries: the one Gemini wrote most often
+            if key not in entries or template.support > entries[key][1].support:
+                entries[key] = (order, template)
+
+        self._index = (entries, entities) if entries else None
+        return len({id(template) for _, template in entries.values()})
+
+    def _extract(self, question: str, entities: Dict[str, str]) -> List[Tuple[int, int, str, str]]:
+        """Candidate parameter values of a question: (start, end, kind, value), in order."""
+        found: List[Tuple[int, int, str, str]] = []
+        taken = [False] * len(question)
+        for name in sorted(entities, key=len, reverse=True):
+            for match in re.finditer(rf"(?<!\w){re.escape(name)}(?!\w)", question):
+                start, end = match.span()
+                if not any(taken[start:end]):
+                    taken[start:end] = [True] * (end - start)
+                    found.append((start, end, TEXT_SLOT, entities[name]))
+        for match in QUESTION_NUMBER.finditer(question):
+            start, end = match.span()
+            if not any(taken[start:end]):
+                value = match.group(0).replace(",", ".")
+                found.append((start, end, _slot_kind(value), value))
+        return sorted(found)
+
+    def match(self, question: str) -> Optional[TemplateMatch]:
+        index = self._index
+        if index is None:
+            return None
+        entries, entities = index
+        question = normalize_question(question)
+        values = self._extract(question, entities)
+        entry = entries.get(shape_key(_shape(question, [(start, end, kind) for start, end, kind, _ in values])))
+        if entry is None:
+            return None
+
+        order, template = entry
+        params: List[Any] = [None] * len(template.slots)
+        for (_, _, _, value), slot_index in zip(values, order):
+            slot = template.slots[slot_index]
+            if slot.value_type == "int":
+                params[slot_index] = int(float(value))
+            elif slot.value_type == "float":
+                params[slot_index] = float(value)
+            else:
+                params[slot_index] = f"{slot.prefix}{value}{slot.suffix}"
+        return TemplateMatch(template, tuple(params))
+
+    def execute(self, conn, match: TemplateMatch) -> Tuple[List[str], List[Tuple]]:
+        """Runs a filled template on `conn`: (column names, rows)."""
+        template = match.template
+        if not self.prepared:
+            result = conn.execute(
+                text(PLACEHOLDER.sub(lambda m: f":p{m.group(1)}", template.sql)),
+                {f"p{i + 1}": value for i, value in enumerate(match.params)},
+            )
+            return list(result.keys()), result.fetchall()
+
+        # Prepared statements live as long as the DBAPI connection (and survive rollbacks)
+        prepared = conn.connection.info.setdefault("sql_templates", set())
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if template.name not in prepared:
+                cursor.execute(f"PREPARE {template.name} AS {template.sql}")
+                prepared.add(template.name)
+            if match.params:
+                cursor.execute(f"EXECUTE {template.name} ({', '.join(['%s'] * len(match.params))})", match.params)
+            else:
+                cursor.execute(f"EXECUTE {template.name}")
+            return [column[0] for column in cursor.description], cursor.fetchall()
+        finally:
+            cursor.close()
+
+    async def _loop(self, interval: int):
+        while True:
+            try:
+                templates = await asyncio.to_thread(self.refresh)
+                logger.info(f"SQL templates mined: {templates}")
+            except Exception as e:
+                logger.error(f"SQL template mining failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: int = SQL_TEMPLATE_REFRESH_INTERVAL):
+        if interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,85 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
+# Summaries kept in memory per worker (least recently used evicted first); the rest are read from the DB
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "2048"))
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class SummaryStore:
+    """Summaries of crawled pages keyed by the hash of the page content.
+
+    A summary only depends on the page text, so it is generated once per crawl
+    snapshot and reused until the content (and therefore the hash) changes.
+    The most recently used `max_entries` live in memory; all of them are persisted
+    in `page_summaries` so they survive restarts and evictions. The store keeps
+    working in memory only if the DB is unreachable.
+    """
+
+    def __init__(self, database_url: str = DATABASE_URL, max_entries: int = SUMMARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        try:
+            self.engine = create_engine(database_url, pool_pre_ping=True)
+        except Exception as e:
+            logger.error(f"Summary store DB unavailable: {e}")
+            self.engine = None
+
+    def _remember(self, cache_key: str, summary: str):
+        with self._lock:
+            self._cache[cache_key] = summary
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def get(self, key: str, model: str) -> Optional[str]:
+        with self._lock:
+            cached = self._cache.get(f"{model}:{key}")
+            if cached is not None:
+                self._cache.move_to_end(f"{model}:{key}")
+                return cached
+        if not self.engine:
+            return None
+        try:
+            with self.engine.connect() as conn:
+                row = conn.execute(
+                    text("SELECT summary FROM page_summaries WHERE content_hash = :h AND model = :m"),
+                    {"h": key, "m": model}
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"Summary lookup failed: {e}")
+            return None
+        if row:
+            self._remember(f"{model}:{key}", row[0])
+            return row[0]
+        return None
+
+    def put(self, key: str, model: str, summary: str, source_url: Optional[str] = None):
+        self._remember(f"{model}:{key}", summary)
+        if not self.engine:
+            return
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(
+                    text("""
+                        INSERT INTO page_summaries (content_hash, model, source_url, summary)
+                        VALUES (:h, :m, :u, :s)
+                        ON CONFLICT (content_hash, model) DO UPDATE SET summary = EXCLUDED.summary
+                    """),
+                    {"h": key, "m": model, "u": source_url, "s": summary}
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to save summary: {e}")
@@ -0,0 +1,39 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from metrics import observe_stage
+
+
+class StageTimer:
+    """Collects wall-clock durations (ms) for the stages of a single request.
+
+    With an `endpoint`, every stage is also recorded in the Prometheus stage histogram.
+    """
+
+    def __init__(self, endpoint: Optional[str] = None):
+        self.endpoint = endpoint
+        self.timings: Dict[str, float] = {}
+        # Stages of one request may run in parallel threads
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, elapsed: float):
+        # Stages executed more than once (e.g. per page) are accumulated
+        with self._lock:
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed * 1000, 2)
+        if self.endpoint:
+            observe_stage(self.endpoint, name, elapsed)
+
+    def total(self) -> Dict[str, float]:
+        result = dict(self.timings)
+        result["total"] = round((time.perf_counter() - self._start) * 1000, 2)
+        return result
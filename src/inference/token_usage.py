@@ -0,0 +1,23 @@
+from typing import Any
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from metrics import LLM_TOKENS
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Counts input/output tokens from the usage metadata of chat model responses."""
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage:
+                    continue
+                metadata = message.response_metadata or {}
+                model = metadata.get("model") or metadata.get("model_name") or "unknown"
+                LLM_TOKENS.labels(model=model, kind="input").inc(usage.get("input_tokens", 0))
+                LLM_TOKENS.labels(model=model, kind="output").inc(usage.get("output_tokens", 0))
+
+
+token_usage_callback = TokenUsageCallback()
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The inference service imports its modules flat (it runs from src/inference)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "inference"))
+# The crawler modules are flat too; appended so `main` stays the inference service
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src" / "crawler"))
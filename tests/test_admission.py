@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from admission import AdmissionController, Overloaded, create_background_task, remaining
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_admits_and_binds_deadline():
+    async def main():
+        controller = AdmissionController("test", max_concurrency=1, queue_size=1, max_wait=1, deadline=5)
+
+        async def handler():
+            return remaining()
+
+        left = await controller.run(handler)
+        assert 0 < left <= 5
+        assert remaining() is None
+
+    run(main())
+
+
+def test_rejects_when_queue_full():
+    async def main():
+        controller = AdmissionController("test", max_concurrency=1, queue_size=1, max_wait=5, deadline=5)
+        release = asyncio.Event()
+
+        async def handler():
+            await release.wait()
+
+        running = asyncio.create_task(controller.run(handler))
+        waiting = asyncio.create_task(controller.run(handler))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as error:
+            await controller.run(handler)
+        assert error.value.status_code == 429
+        assert error.value.reason == "queue_full"
+        assert error.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(running, waiting)
+
+    run(main())
+
+
+def test_rejects_after_queue_timeout():
+    async def main():
+        controller = AdmissionController("test", max_concurrency=1, queue_size=4, max_wait=0.05, deadline=5)
+        release = asyncio.Event()
+
+        async def handler():
+            await release.wait()
+
+        running = asyncio.create_task(controller.run(handler))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as error:
+            await controller.run(handler)
+        assert error.value.status_code == 503
+        assert error.value.reason == "queue_timeout"
+        release.set()
+        await running
+        # The slot of the rejected request was never taken
+        assert await controller.run(lambda: asyncio.sleep(0, result="ok")) == "ok"
+
+    run(main())
+
+
+def test_rejects_past_deadline():
+    async def main():
+        controller = AdmissionController("test", max_concurrency=1, queue_size=1, max_wait=1, deadline=0.05)
+
+        with pytest.raises(Overloaded) as error:
+            await controller.run(lambda: asyncio.sleep(1))
+        assert error.value.status_code == 503
+        assert error.value.reason == "deadline"
+        # The slot is released after the overrun
+        assert await controller.run(lambda: asyncio.sleep(0, result="ok")) == "ok"
+
+    run(main())
+
+
+def test_background_task_has_no_deadline():
+    async def main():
+        controller = AdmissionController("test", max_concurrency=1, queue_size=1, max_wait=1, deadline=5)
+
+        async def background():
+            return remaining()
+
+        async def handler():
+            return await create_background_task(background())
+
+        assert await controller.run(handler) is None
+
+    run(main())
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import httpx
+from utils import async_scraper
+from utils.async_scraper import AsyncWebScraper, HostRateLimiter, parse_page
+
+
+PAGES = {
+    "/a": '<h1>Bandi</h1><a href="/b">b</a><a href="#top">top</a>',
+    "/b": '<h1>Tasse</h1><a href="https://other.it/x">x</a>',
+}
+
+
+def make_transport(failures: dict = None):
+    failures = dict(failures or {})
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if failures.get(path, 0) > 0:
+            failures[path] -= 1
+            return httpx.Response(503)
+        if path not in PAGES:
+            return httpx.Response(404)
+        return httpx.Response(200, text=PAGES[path])
+
+    return httpx.MockTransport(handler)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_parse_page_extracts_selectors_and_links():
+    data = parse_page("https://www.univpm.it/a", PAGES["/a"], {"title": "h1"})
+    assert data["title"] == ["Bandi"]
+    assert data["links"] == ["https://www.univpm.it/b"]
+
+
+def test_fetch_page_retries_retryable_status():
+    async def scenario():
+        async with AsyncWebScraper(delay=0, backoff_base=0, transport=make_transport({"/a": 2})) as scraper:
+            return await scraper.fetch_page("https://www.univpm.it/a", retries=3)
+
+    assert "Bandi" in run(scenario())
+
+
+def test_fetch_page_gives_up_on_client_error():
+    async def scenario():
+        async with AsyncWebScraper(delay=0, backoff_base=0, transport=make_transport()) as scraper:
+            return await scraper.fetch_page("https://www.univpm.it/missing")
+
+    assert run(scenario()) is None
+
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    async def scenario():
+        limiter = HostRateLimiter(0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(limiter.wait("https://a.it/x") for _ in range(3)), limiter.wait("https://b.it/x"))
+        return loop.time() - start
+
+    assert run(scenario()) >= 0.1
+
+
+def test_scrape_multiple_pages_streams_to_jsonl(tmp_path, monkeypatch):
+    monkeypatch.setattr(async_scraper.config, "RAW_DATA_DIR", tmp_path)
+
+    async def scenario(append=False):
+        async with AsyncWebScraper(delay=0, parser_workers=1, transport=make_transport()) as scraper:
+            return await scraper.scrape_multiple_pages(
+                ["https://www.univpm.it/a", "https://www.univpm.it/b", "https://www.univpm.it/missing"],
+                {"title": "h1"},
+                output_file="pages.jsonl",
+                append=append,
+            )
+
+    assert run(scenario()) == 2
+    lines = (tmp_path / "pages.jsonl").read_text(encoding="utf-8").splitlines()
+    titles = sorted(json.loads(line)["title"][0] for line in lines)
+    assert titles == ["Bandi", "Tasse"]
+
+    # A rerun replaces the results instead of duplicating them
+    run(scenario())
+    assert len((tmp_path / "pages.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+    run(scenario(append=True))
+    assert len((tmp_path / "pages.jsonl").read_text(encoding="utf-8").splitlines()) == 4
+
+
+def test_default_delay_follows_robots_crawl_delay():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow.it" and request.url.path == "/robots.txt":
+            return httpx.Response(200, text="User-agent: *\nCrawl-delay: 2\n")
+        return httpx.Response(200, text=PAGES["/a"])
+
+    async def scenario():
+        async with AsyncWebScraper(transport=httpx.MockTransport(handler)) as scraper:
+            await scraper.fetch_page("https://slow.it/a")
+            await scraper.fetch_page("https://fast.it/a")
+            return scraper.rate_limiter
+
+    limiter = run(scenario())
+    assert limiter._intervals == {"slow.it": 2.0}
+    assert limiter.interval == async_scraper.DEFAULT_HOST_DELAY
@@ -0,0 +1,106 @@
+import random
+from utils.chunking import MarkdownChunker, count_tokens, iter_blocks, iter_lines
+
+
+MARKDOWN = """# Tasse
+Le tasse universitarie dipendono dall'ISEE.
+
+## Scadenze
+- prima rata entro ottobre
+- seconda rata entro marzo
+
+| Fascia ISEE | Importo |
+|---|---|
+| 0-20000 | 0 |
+| 20000-30000 | 500 |
+| 30000-40000 | 900 |
+
+# Corsi
+""" + " ".join(f"Frase numero {i} sul corso di laurea." for i in range(40))
+
+
+def test_iter_blocks_detects_block_types():
+    blocks = [(block_type, level) for block_type, _, level in iter_blocks(MARKDOWN.splitlines())]
+    assert blocks[:5] == [("heading", 1), ("paragraph", 0), ("heading", 2), ("list", 0), ("table", 0)]
+
+
+def test_chunks_carry_heading_path_and_source_url():
+    chunks = list(MarkdownChunker(max_tokens=200, overlap_tokens=20).iter_chunks(MARKDOWN, "https://www.univpm.it/tasse"))
+    assert chunks[0]["metadata"]["heading_path"] == ["Tasse"]
+    assert chunks[1]["metadata"]["heading_path"] == ["Tasse", "Scadenze"]
+    assert chunks[-1]["metadata"]["heading_path"] == ["Corsi"]
+    assert all(c["metadata"]["source_url"] == "https://www.univpm.it/tasse" for c in chunks)
+    assert [c["metadata"]["chunk_index"] for c in chunks] == list(range(len(chunks)))
+
+
+def test_chunks_respect_token_bound():
+    chunker = MarkdownChunker(max_tokens=40, overlap_tokens=10)
+    for chunk in chunker.iter_chunks(MARKDOWN):
+        assert count_tokens(chunk["content"]) <= 40
+
+
+def test_oversized_table_repeats_header():
+    chunks = list(MarkdownChunker(max_tokens=30, overlap_tokens=5).iter_chunks(MARKDOWN))
+    tables = [c["content"] for c in chunks if "table" in c["metadata"]["block_types"]]
+    assert len(tables) > 1
+    assert all("| Fascia ISEE | Importo |\n|---|---|" in t for t in tables)
+
+
+def test_consecutive_chunks_overlap_within_section():
+    chunks = [
+        c for c in MarkdownChunker(max_tokens=40, overlap_tokens=12).iter_chunks(MARKDOWN)
+        if c["metadata"]["heading_path"] == ["Corsi"]
+    ]
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        overlap = current["metadata"]["overlap_chars"]
+        assert overlap > 0
+        assert current["content"][:overlap - 2] in previous["content"]
+
+
+def test_iter_chunks_accepts_line_iterator():
+    from_string = list(MarkdownChunker().iter_chunks(MARKDOWN))
+    from_lines = list(MarkdownChunker().iter_chunks(iter(MARKDOWN.splitlines(keepends=True))))
+    assert from_string == from_lines
+
+
+def test_iter_lines_matches_splitlines():
+    for text in (MARKDOWN, "", "a", "a\n", "\n\nb\nc"):
+        assert list(iter_lines(text)) == text.splitlines(keepends=True)
+
+
+def random_markdown(rng: random.Random) -> str:
+    words = ["LM-32", "tasse", "ISEE", "https://www.univpm.it/tasse?anno=2024", "a.b.c.d.e.f", "x" * 40, "(L-31)", "20000"]
+
+    def text(n: int) -> str:
+        return " ".join(rng.choice(words) + rng.choice(["", ".", ";", ","]) for _ in range(n))
+
+    lines = []
+    for _ in range(rng.randint(1, 20)):
+        kind = rng.choice(["heading", "paragraph", "list", "table", "code"])
+        if kind == "heading":
+            lines.append("#" * rng.randint(1, 3) + " " + text(3))
+        elif kind == "paragraph":
+            lines.append(text(rng.randint(1, 80)))
+        elif kind == "list":
+            lines += ["- " + text(rng.randint(1, 40)) for _ in range(rng.randint(1, 5))]
+        elif kind == "table":
+            lines += ["| " + " | ".join(text(1) for _ in range(rng.randint(1, 12))) + " |", "|---|---|"]
+            lines += ["| " + " | ".join(text(1) for _ in range(rng.randint(1, 12))) + " |" for _ in range(rng.randint(1, 8))]
+        else:
+            lines += ["```", text(rng.randint(1, 60)), "```"]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def test_no_chunk_exceeds_max_tokens():
+    assert all(
+        count_tokens(chunk["content"]) <= 40
+        for chunk in MarkdownChunker(max_tokens=40, overlap_tokens=10).iter_chunks(" ".join(["LM-32"] * 200))
+    )
+    for seed in range(300):
+        rng = random.Random(seed)
+        max_tokens = rng.randint(5, 120)
+        chunker = MarkdownChunker(max_tokens=max_tokens, overlap_tokens=rng.randint(0, max_tokens - 1))
+        for chunk in chunker.iter_chunks(random_markdown(rng)):
+            assert count_tokens(chunk["content"]) <= max_tokens, (seed, chunk["content"])
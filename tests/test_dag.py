@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from dag import RequestDAG
+from timing import StageTimer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_stages_run_after_their_dependencies():
+    async def main():
+        dag = RequestDAG()
+        order = []
+
+        async def stage(name, result, delay=0.0):
+            await asyncio.sleep(delay)
+            order.append(name)
+            return result
+
+        dag.add("a", lambda: stage("a", 1, 0.02))
+        dag.add("b", lambda: stage("b", 2))
+        dag.add("c", lambda a, b: stage("c", a + b), "a", "b")
+        assert await dag.get("c") == 3
+        # b does not wait for a: independent stages run in parallel
+        assert order == ["b", "a", "c"]
+        await dag.close()
+
+    run(main())
+
+
+def test_unknown_dependency_is_rejected():
+    async def main():
+        dag = RequestDAG()
+        with pytest.raises(ValueError, match="unknown stages"):
+            dag.add("b", lambda a: asyncio.sleep(0), "a")
+        await dag.close()
+
+    run(main())
+
+
+def test_exception_propagates_to_dependants():
+    async def main():
+        dag = RequestDAG()
+
+        async def fail():
+            raise RuntimeError("retrieval failed")
+
+        reached = []
+
+        async def dependant(value):
+            reached.append(value)
+
+        dag.add("retrieval", fail)
+        dag.add("context", dependant, "retrieval")
+        with pytest.raises(RuntimeError, match="retrieval failed"):
+            await dag.get("context")
+        assert reached == []
+        await dag.close()
+
+    run(main())
+
+
+def test_cancel_stops_a_branch_and_its_dependants():
+    async def main():
+        dag = RequestDAG()
+        dag.add("routing", lambda: asyncio.sleep(0, result="text"))
+        dag.add("planning", lambda: asyncio.sleep(1, result=["q"]))
+        dag.add("chart", lambda questions: asyncio.sleep(0, result=questions), "planning")
+        assert await dag.get("routing") == "text"
+        dag.cancel("planning", "unknown")
+        with pytest.raises(asyncio.CancelledError):
+            await dag.get("chart")
+        await dag.close()
+
+    run(main())
+
+
+def test_close_cancels_pending_stages_and_records_critical_path():
+    async def main():
+        timer = StageTimer()
+        dag = RequestDAG(timer)
+        dag.add("classification", lambda: asyncio.sleep(0.01))
+        dag.add("retrieval", lambda: asyncio.sleep(0.03, result=["doc"]))
+        dag.add("context", lambda docs: asyncio.sleep(0.01, result=docs), "retrieval")
+        dag.add("speculative", lambda: asyncio.sleep(5))
+        await dag.get("context")
+        await dag.close()
+
+        assert dag._tasks["speculative"].cancelled()
+        path, elapsed = dag.critical_path()
+        # The cancelled stage finished last but is not part of the answer
+        assert path == ["retrieval", "context"]
+        assert elapsed >= 40
+        assert timer.timings["critical_path"] == elapsed
+
+    run(main())
+
+
+def test_critical_path_follows_the_dependency_that_finished_last():
+    dag = RequestDAG()
+    dag._deps = {"classification": (), "retrieval": (), "context": ("classification", "retrieval"), "qa": ("context",)}
+    dag._spans = {"classification": (0.0, 0.01), "retrieval": (0.0, 0.05), "context": (0.05, 0.06), "qa": (0.06, 0.5)}
+    assert dag.critical_path() == (["retrieval", "context", "qa"], 500.0)
+    assert RequestDAG().critical_path() == ([], 0.0)
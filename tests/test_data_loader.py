@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from utils.data_loader import DataLoader
+
+
+def test_detect_encoding_from_sample(tmp_path):
+    utf8 = tmp_path / "utf8.csv"
+    utf8.write_text("text,label\nperché,tasse\n", encoding="utf-8")
+    latin1 = tmp_path / "latin1.csv"
+    latin1.write_text("text,label\nperché,tasse\n", encoding="latin-1")
+    bom = tmp_path / "bom.csv"
+    bom.write_text("text,label\nperché,tasse\n", encoding="utf-8-sig")
+
+    assert DataLoader.detect_encoding(utf8) == "utf-8"
+    assert DataLoader.detect_encoding(latin1) == "latin-1"
+    assert DataLoader.detect_encoding(bom) == "utf-8-sig"
+    # A multi-byte character cut by the sample boundary is still utf-8
+    assert DataLoader.detect_encoding(utf8, sample_size=len("text,label\nperch") + 1) == "utf-8"
+    assert DataLoader.load_csv(latin1)["text"].tolist() == ["perché"]
+
+
+def test_iter_csv_falls_back_past_the_sample(tmp_path):
+    path = tmp_path / "mixed.csv"
+    with open(path, "wb") as f:
+        f.write(b"text,label\n" + b"domanda numero,x\n" * 70000 + "perché,y\n".encode("latin-1"))
+
+    assert DataLoader.detect_encoding(path) == "utf-8"
+    assert DataLoader.detect_encoding(path, sample_size=None) == "latin-1"
+    chunks = list(DataLoader.iter_chunks(path, chunksize=50000))
+    assert [len(chunk) for chunk in chunks] == [50000, 20001]
+    assert chunks[-1]["text"].iloc[-1] == "perché"
+    assert len(DataLoader.load_csv(path)) == 70001
+
+
+def test_load_csv_projects_columns_and_applies_dtypes(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"text": ["a", "b", "c"], "label": ["x", "y", "x"], "extra": [1, 2, 3]}).to_csv(path, index=False)
+
+    df = DataLoader.load_csv(path, columns=["text", "label"], dtype={"label": "category"})
+    assert list(df.columns) == ["text", "label"]
+    assert isinstance(df["label"].dtype, pd.CategoricalDtype)
+
+
+def test_load_json_projects_columns_and_applies_dtypes(tmp_path):
+    path = tmp_path / "data.json"
+    pd.DataFrame({"text": ["a", "b", "c"], "label": ["x", "y", "x"], "extra": [1, 2, 3]}).to_json(path, orient="records")
+
+    df = DataLoader.load_json(path, columns=["text", "label"], dtype={"label": "category"})
+    assert list(df.columns) == ["text", "label"]
+    assert isinstance(df["label"].dtype, pd.CategoricalDtype)
+
+
+def test_load_excel_projects_columns_and_applies_dtypes(tmp_path):
+    pytest.importorskip("openpyxl")
+    path = tmp_path / "data.xlsx"
+    pd.DataFrame({"text": ["a", "b", "c"], "label": ["x", "y", "x"], "extra": [1, 2, 3]}).to_excel(path, index=False)
+
+    df = DataLoader.load_excel(path, columns=["text", "label"], dtype={"label": "category"})
+    assert list(df.columns) == ["text", "label"]
+    assert isinstance(df["label"].dtype, pd.CategoricalDtype)
+
+
+def test_iter_chunks_csv_and_jsonl(tmp_path):
+    df = pd.DataFrame({"text": [f"domanda {i}" for i in range(10)], "label": ["x"] * 10})
+    df.to_csv(tmp_path / "data.csv", index=False)
+    df.to_json(tmp_path / "data.jsonl", orient="records", lines=True)
+
+    for name in ("data.csv", "data.jsonl"):
+        chunks = list(DataLoader.iter_chunks(tmp_path / name, chunksize=4, columns=["text"]))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert pd.concat(chunks)["text"].tolist() == df["text"].tolist()
+        assert list(chunks[0].columns) == ["text"]
+
+
+def test_load_text_files_keeps_file_order(tmp_path):
+    for i in range(20):
+        (tmp_path / f"page_{i:02d}.txt").write_text(f"contenuto {i}", encoding="utf-8")
+
+    df = DataLoader.load_text_files(tmp_path)
+    assert df["filename"].tolist() == [f"page_{i:02d}.txt" for i in range(20)]
+    assert df["text"].tolist()[:2] == ["contenuto 0", "contenuto 1"]
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+from admission import AdmissionController
+from embeddings import EMBEDDING_DIM, EmbeddingBackfill, EmbeddingService
+from limiter import UpstreamLimiter
+
+
+def make_service(handler) -> EmbeddingService:
+    service = EmbeddingService("http://ollama", max_batch=8, max_wait_ms=10)
+    service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def test_concurrent_texts_are_batched():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        texts = json.loads(request.content)["input"]
+        calls.append(texts)
+        return httpx.Response(200, json={"embeddings": [[float(len(t))] for t in texts]})
+
+    async def main():
+        service = make_service(handler)
+        try:
+            return await service.embed_many(["a", "bb", "ccc"])
+        finally:
+            await service.close()
+
+    assert asyncio.run(main()) == [[1.0], [2.0], [3.0]]
+    assert calls == [["a", "bb", "ccc"]]
+
+
+def test_short_response_fails_every_caller():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"embeddings": [[0.0]]})
+
+    async def main():
+        service = make_service(handler)
+        try:
+            await asyncio.wait_for(service.embed_many(["a", "b", "c"]), timeout=5)
+        finally:
+            await service.close()
+
+    with pytest.raises(ValueError, match="1 embeddings for 3 texts"):
+        asyncio.run(main())
+
+
+def test_worker_does_not_inherit_request_deadline():
+    def handler(request: httpx.Request) -> httpx.Response:
+        texts = json.loads(request.content)["input"]
+        return httpx.Response(200, json={"embeddings": [[float(len(t))] for t in texts]})
+
+    async def main():
+        service = make_service(handler)
+        service.limiter = UpstreamLimiter("test-embed", 1, backend="process")
+        try:
+            # The first request starts the batch worker, then its deadline expires
+            await AdmissionController("first", deadline=0.05).run(lambda: service.embed_many(["a"]))
+            await asyncio.sleep(0.1)
+
+            # A contended slot makes the worker wait (and check the deadline)
+            held = service.limiter.try_acquire()
+            second = asyncio.create_task(
+                AdmissionController("second", deadline=5).run(lambda: service.embed_many(["bb"]))
+            )
+            await asyncio.sleep(0.1)
+            service.limiter.release(held)
+            return await second
+        finally:
+            await service.close()
+
+    assert asyncio.run(main()) == [[2.0]]
+
+
+def test_backfill_skips_past_a_bad_chunk(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        texts = json.loads(request.content)["input"]
+        if any("BAD" in t for t in texts):
+            return httpx.Response(400, json={"error": "input length exceeds the context length"})
+        return httpx.Response(200, json={"embeddings": [[0.5] * EMBEDDING_DIM for _ in texts]})
+
+    database_url = f"sqlite:///{tmp_path / 'rag.db'}"
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE rag_documents (id INTEGER PRIMARY KEY, content TEXT, embedding TEXT)"))
+        for i, content in enumerate(["a", "BAD", "c", "d", "e"], 1):
+            conn.execute(text("INSERT INTO rag_documents (id, content) VALUES (:id, :c)"), {"id": i, "c": content})
+
+    async def main():
+        service = make_service(handler)
+        backfill = EmbeddingBackfill(service, database_url=database_url, batch_size=2, max_attempts=2)
+        try:
+            rounds = [await backfill.run_once() for _ in range(3)]
+        finally:
+            await service.close()
+        return rounds, backfill._attempts
+
+    rounds, attempts = asyncio.run(main())
+    # Every good chunk in the first round; the bad one is retried once, then skipped
+    assert rounds == [4, 0, 0]
+    assert attempts == {2: 2}
+    with engine.connect() as conn:
+        missing = conn.execute(text("SELECT id FROM rag_documents WHERE embedding IS NULL")).fetchall()
+    assert [row[0] for row in missing] == [2]
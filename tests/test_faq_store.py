@@ -0,0 +1,156 @@
+import asyncio
+import threading
+from typing import Any, Dict, List
+from faq_store import FaqRefresher, FaqStore
+from limiter import UpstreamLimiter
+
+
+def entry(intent: str, question: str, fresh: bool = True) -> Dict[str, Any]:
+    return {"intent": intent, "question": question, "answer": f"{intent}: {question}", "source_urls": [], "fresh": fresh}
+
+
+ENTRIES = [
+    entry("iscrizione", "Come mi iscrivo alla laurea magistrale?"),
+    entry("iscrizione", "Come ci si iscrive a una laurea magistrale?"),
+    entry("tasse", "Quanto costano le tasse della laurea magistrale?"),
+    entry("tasse", "Quanto costano le tasse della laurea triennale?"),
+    entry("borse", "Quando esce il bando per le borse di studio?", fresh=False),
+]
+
+
+class MemoryFaqStore(FaqStore):
+    def __init__(self, entries: List[Dict[str, Any]]):
+        super().__init__("sqlite://")
+        self.entries = entries
+        self.stored = []
+
+    def _load(self) -> List[Dict[str, Any]]:
+        return [dict(entry) for entry in self.entries]
+
+    def put(self, intent, question, answer, source_urls, model=None):
+        self.stored.append((intent, question, answer))
+        for stored in self.entries:
+            if stored["question"] == question:
+                stored.update(answer=answer, source_urls=source_urls, fresh=True)
+
+    def delete(self, question):
+        self.entries = [stored for stored in self.entries if stored["question"] != question]
+
+
+def make_store() -> MemoryFaqStore:
+    store = MemoryFaqStore([dict(e) for e in ENTRIES])
+    assert store.refresh() == 4
+    return store
+
+
+def test_match_ignores_function_words_and_case():
+    store = make_store()
+    assert store.match("come mi iscrivo alla laurea magistrale")["intent"] == "iscrizione"
+    assert store.match("COME MI ISCRIVO NELLA LAUREA MAGISTRALE ?")["intent"] == "iscrizione"
+    match = store.match("Quanto costano tasse laurea magistrale?")
+    assert match["question"] == "Quanto costano le tasse della laurea magistrale?"
+
+
+def test_match_rejects_near_miss_paraphrases():
+    store = make_store()
+    assert store.match("Come mi cancello dalla laurea magistrale?") is None
+    assert store.match("Come non mi iscrivo alla laurea magistrale?") is None
+    assert store.match("Quanto costano le tasse della laurea?") is None
+    assert store.match("Quanto costano le tasse del dottorato?") is None
+    assert store.match("Quanto costavano le tasse della laurea magistrale?") is None
+
+
+def test_match_skips_stale_and_ambiguous_entries():
+    store = make_store()
+    assert store.match("Quando esce il bando per le borse di studio?") is None
+    assert [e["intent"] for e in store.stale] == ["borse"]
+
+    store = MemoryFaqStore([entry("a", "Orari della segreteria"), entry("b", "Orari della segreteria?")])
+    store.refresh()
+    assert store.match("orari segreteria") is None
+
+
+def test_refresher_regenerates_stale_answers():
+    store = MemoryFaqStore([dict(e) for e in ENTRIES])
+
+    async def generate(question: str):
+        return f"nuova risposta: {question}", ["https://www.unimol.it/bandi"]
+
+    async def main():
+        refresher = FaqRefresher(store, generate, model="test", leader=UpstreamLimiter("faq-test", 1))
+        assert await refresher.run_once() == 1
+        assert await refresher.run_once() == 0
+
+    asyncio.run(main())
+    assert store.stored == [("borse", ENTRIES[4]["question"], f"nuova risposta: {ENTRIES[4]['question']}")]
+    assert store.match("Quando esce il bando per le borse di studio")["answer"].startswith("nuova risposta")
+
+
+class RecordingLimiter(UpstreamLimiter):
+    """Records the thread of every leader lock call."""
+
+    def __init__(self, name: str):
+        super().__init__(name, 1)
+        self.threads = []
+
+    def try_acquire(self):
+        self.threads.append(threading.get_ident())
+        return super().try_acquire()
+
+    def release(self, slot):
+        self.threads.append(threading.get_ident())
+        super().release(slot)
+
+
+def test_refresher_takes_the_leader_lock_off_the_event_loop():
+    store = MemoryFaqStore([dict(e) for e in ENTRIES])
+    leader = RecordingLimiter("faq-test-thread")
+
+    async def generate(question: str):
+        return "risposta", ["https://www.unimol.it/bandi"]
+
+    async def main():
+        await FaqRefresher(store, generate, leader=leader).run_once()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert len(leader.threads) == 2
+    assert loop_thread not in leader.threads
+
+
+def test_refresher_skips_when_another_worker_regenerates():
+    store = MemoryFaqStore([dict(e) for e in ENTRIES])
+    leader = UpstreamLimiter("faq-test-busy", 1)
+
+    async def generate(question: str):
+        raise AssertionError("only the leader regenerates")
+
+    async def main():
+        slot = leader.try_acquire()
+        try:
+            assert await FaqRefresher(store, generate, leader=leader).run_once() == 0
+        finally:
+            leader.release(slot)
+
+    asyncio.run(main())
+    assert [e["intent"] for e in store.stale] == ["borse"]
+
+
+def test_refresher_deletes_answers_without_sources():
+    store = MemoryFaqStore([dict(e) for e in ENTRIES])
+    calls = []
+
+    async def generate(question: str):
+        calls.append(question)
+        return None
+
+    async def main():
+        refresher = FaqRefresher(store, generate, max_misses=2)
+        for _ in range(4):
+            assert await refresher.run_once() == 0
+
+    asyncio.run(main())
+    # Retried up to max_misses rounds, then gone instead of retried forever
+    assert calls == [ENTRIES[4]["question"]] * 2
+    assert store.stale == []
+    assert len(store.entries) == 4
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from urllib.robotparser import RobotFileParser
+
+import frontier
+from frontier import BloomFilter, FrontierCrawler, SeenSet, normalize_url
+
+
+SITE = {
+    "/": '<a href="/a">a</a><a href="/b">b</a><a href="/private/x">p</a><a href="/gone">g</a>',
+    "/a": '<a href="/c">c</a><a href="/a#top">top</a>',
+    "/b": '<a href="https://other.it/x">x</a><a href="/a?utm_source=mail">a</a><a href="/doc.pdf">pdf</a>',
+    "/c": '<a href="/d">d</a>',
+    "/d": "",
+}
+ROBOTS = "User-agent: *\nDisallow: /private\nCrawl-delay: 1\n"
+
+
+class FakeCrawler:
+    """Stands in for crawl4ai's AsyncWebCrawler."""
+
+    def __init__(self):
+        self.fetched = []
+
+    async def arun(self, url: str):
+        self.fetched.append(url)
+        path = url.split("univpm.it", 1)[1]
+        if path not in SITE:
+            return SimpleNamespace(success=False, status_code=404, error_message="not found")
+        return SimpleNamespace(success=True, status_code=200, html=SITE[path], markdown=f"page {path}")
+
+
+def make_frontier(**kwargs) -> FrontierCrawler:
+    kwargs.setdefault("state_path", None)
+    crawler = FrontierCrawler(["https://www.univpm.it/"], **kwargs)
+    parser = RobotFileParser()
+    parser.parse(ROBOTS.splitlines())
+    # Pre-populated so no robots.txt is fetched over the network
+    crawler.robots._parsers["https://www.univpm.it"] = parser
+    crawler._wait_turn = no_wait
+    return crawler
+
+
+async def no_wait(url: str):
+    return None
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(frontier_crawler: FrontierCrawler, crawler: FakeCrawler):
+    return [(url, depth) async for url, _, depth in frontier_crawler.crawl(crawler)]
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://WWW.Univpm.IT:443/a?b=2&a=1&utm_source=x#frag") == "https://www.univpm.it/a?a=1&b=2"
+    assert normalize_url("http://www.univpm.it:8080") == "http://www.univpm.it:8080/"
+    assert normalize_url("https://www.univpm.it/a?fbclid=1") == "https://www.univpm.it/a"
+    assert normalize_url("mailto:info@univpm.it") is None
+    assert normalize_url("/relative") is None
+
+
+def test_bloom_filter_membership():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://www.univpm.it/{i}" for i in range(500)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+    false_positives = sum(f"https://other.it/{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+    restored = BloomFilter(1000, 0.01, bytes(bloom.bits))
+    assert all(url in restored for url in urls)
+
+
+def test_seen_set_switches_to_bloom_and_round_trips():
+    seen = SeenSet(exact_limit=3)
+    for i in range(3):
+        seen.add(f"https://www.univpm.it/{i}")
+    assert seen.bloom is None
+    assert SeenSet.from_dict(seen.to_dict()).exact == seen.exact
+
+    seen.add("https://www.univpm.it/3")
+    assert seen.exact is None and seen.bloom is not None
+    restored = SeenSet.from_dict(seen.to_dict(), exact_limit=3)
+    assert restored.count == 4
+    assert all(f"https://www.univpm.it/{i}" in restored for i in range(4))
+    assert "https://www.univpm.it/new" not in restored
+
+
+def test_in_scope_limits_domains_and_extensions():
+    crawler = FrontierCrawler(["https://www.univpm.it/"], allowed_domains=["univpm.it"], state_path=None)
+    assert crawler.in_scope("https://www.univpm.it/a")
+    assert crawler.in_scope("https://ingegneria.univpm.it/a")
+    assert not crawler.in_scope("https://notunivpm.it/a")
+    assert not crawler.in_scope("https://www.univpm.it/bando.PDF")
+
+
+def test_robots_rules_and_crawl_delay():
+    crawler = make_frontier()
+
+    async def scenario():
+        robots = crawler.robots
+        return (
+            await robots.can_fetch("https://www.univpm.it/a"),
+            await robots.can_fetch("https://www.univpm.it/private/x"),
+            await robots.crawl_delay("https://www.univpm.it/a"),
+        )
+
+    assert run(scenario()) == (True, False, 1.0)
+
+
+def test_wait_turn_spaces_requests_by_crawl_delay(monkeypatch):
+    crawler = FrontierCrawler(["https://www.univpm.it/"], state_path=None)
+    crawler.robots._parsers["https://www.univpm.it"] = None
+    monkeypatch.setattr(frontier, "CRAWL_DEFAULT_DELAY", 0.05)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(crawler._wait_turn("https://www.univpm.it/a") for _ in range(3)))
+        return loop.time() - start
+
+    assert run(scenario()) >= 0.1
+
+
+def test_crawl_dedups_and_respects_depth_scope_and_robots():
+    crawler = make_frontier(max_depth=2)
+    fake = FakeCrawler()
+    pages = dict(run(collect(crawler, fake)))
+
+    assert pages == {
+        "https://www.univpm.it/": 0,
+        "https://www.univpm.it/a": 1,
+        "https://www.univpm.it/b": 1,
+        "https://www.univpm.it/c": 2,
+    }
+    # /a is linked three ways but fetched once; /d is past max_depth, other.it and the pdf out of scope
+    assert sorted(fake.fetched) == sorted(pages) + ["https://www.univpm.it/gone"]
+    assert crawler.gone == {"https://www.univpm.it/private/x", "https://www.univpm.it/gone"}
+    assert crawler.failed == set()
+    assert crawler.complete
+
+
+def test_link_extraction_runs_off_the_event_loop():
+    crawler = make_frontier(max_depth=1)
+    threads = set()
+    extract_links = crawler.extract_links
+
+    def recording(url, html):
+        threads.add(threading.get_ident())
+        return extract_links(url, html)
+
+    crawler.extract_links = recording
+    run(collect(crawler, FakeCrawler()))
+    assert threads and threading.get_ident() not in threads
+
+
+def test_interrupted_crawl_resumes_from_saved_state(tmp_path):
+    state_path = tmp_path / "crawl_state.json"
+    crawler = make_frontier(max_depth=2, concurrency=1, state_path=str(state_path))
+
+    async def interrupt_after(count: int):
+        pages = []
+        stream = crawler.crawl(FakeCrawler())
+        async for url, _, _ in stream:
+            pages.append(url)
+            if len(pages) == count:
+                break
+        await stream.aclose()
+        return pages
+
+    first = run(interrupt_after(2))
+    assert state_path.exists()
+
+    resumed = make_frontier(max_depth=2, concurrency=1, state_path=str(state_path))
+    fake = FakeCrawler()
+    rest = [url for url, _ in run(collect(resumed, fake))]
+
+    assert set(first).isdisjoint(fake.fetched)
+    assert sorted(first + rest) == [
+        "https://www.univpm.it/",
+        "https://www.univpm.it/a",
+        "https://www.univpm.it/b",
+        "https://www.univpm.it/c",
+    ]
+    assert resumed.pages_crawled == 4
+    # A resumed crawl did not see the whole frontier, so nothing is pruned on its basis
+    assert not resumed.complete
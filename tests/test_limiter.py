@@ -0,0 +1,74 @@
+import asyncio
+from admission import AdmissionController, Overloaded
+from limiter import UpstreamLimiter, _FileSlots, _ProcessSlots
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_process_slots_enforce_the_cap():
+    slots = _ProcessSlots("test", 2)
+    held = [slots.try_acquire(), slots.try_acquire()]
+    assert all(slot is not None for slot in held)
+    assert slots.try_acquire() is None
+    slots.release(held[0])
+    assert slots.try_acquire() is not None
+
+
+def test_file_slots_enforce_the_cap(tmp_path):
+    slots = _FileSlots("test", 2, directory=str(tmp_path))
+    held = [slots.try_acquire(), slots.try_acquire()]
+    assert all(slot is not None for slot in held)
+    # Another worker sees the same lock files
+    other = _FileSlots("test", 2, directory=str(tmp_path))
+    assert other.try_acquire() is None
+    assert slots.try_acquire() is None
+    slots.release(held[0])
+    slot = other.try_acquire()
+    assert slot is not None
+    other.release(slot)
+    slots.release(held[1])
+
+
+def test_slot_caps_concurrent_calls():
+    async def main():
+        limiter = UpstreamLimiter("test", 2, backend="process")
+        running, peak = 0, 0
+
+        async def call():
+            nonlocal running, peak
+            async with limiter.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(call() for _ in range(10)))
+        assert peak == 2
+        # Every slot, shared and local, was released
+        assert limiter.try_acquire() is not None
+        assert not limiter._local.locked()
+
+    run(main())
+
+
+def test_waiters_give_up_at_the_deadline():
+    async def main():
+        limiter = UpstreamLimiter("test", 1, backend="process")
+        held = limiter.try_acquire()
+        controller = AdmissionController("test", deadline=0.05)
+
+        async def handler():
+            async with limiter.slot():
+                pass
+
+        # The local waiters time out too, without polling the shared slots
+        results = await asyncio.gather(*(controller.run(handler) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, Overloaded) for result in results)
+        limiter.release(held)
+        assert not limiter._local.locked()
+        async with limiter.slot():
+            pass
+
+    run(main())
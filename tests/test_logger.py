@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import queue
+import random
+
+import pytest
+
+from utils import logger as logger_module
+from utils.logger import (
+    DebugSampler,
+    NonBlockingQueueHandler,
+    configure_logging,
+    get_request_id,
+    reset_request_id,
+    set_request_id,
+    stop_logging,
+)
+
+
+@pytest.fixture
+def log_to_file(tmp_path, monkeypatch):
+    """Runs configure_logging on an isolated root logger; returns a reader of the JSON lines."""
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(root, "level", root.level)
+    monkeypatch.setattr(root, "_allmand_configured", False, raising=False)
+    log_file = tmp_path / "app.log"
+    handlers = []
+
+    def setup(**kwargs):
+        configure_logging(log_file=log_file, console=False, json_format=True, use_queue=True, **kwargs)
+        handlers.extend(logger_module._listener.handlers)
+
+    def read():
+        # Stopping the listener flushes the queued records to the file
+        stop_logging()
+        return [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+
+    yield setup, read
+    stop_logging()
+    for handler in handlers:
+        handler.close()
+
+
+def test_json_records_carry_fields_extra_and_exception(log_to_file):
+    setup, read = log_to_file
+    setup(level="INFO")
+    log = logging.getLogger("allmand.test")
+
+    token = set_request_id("req-1")
+    try:
+        log.info("Fetched %s", "page", extra={"url": "https://www.univpm.it/", "status": 200})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("Failed")
+    finally:
+        reset_request_id(token)
+
+    fetched, failed = read()
+    assert fetched["message"] == "Fetched page"
+    assert fetched["level"] == "INFO"
+    assert fetched["logger"] == "allmand.test"
+    assert fetched["request_id"] == "req-1"
+    assert (fetched["url"], fetched["status"]) == ("https://www.univpm.it/", 200)
+    assert {"time", "process", "thread"} <= set(fetched)
+    assert failed["level"] == "ERROR"
+    assert "ValueError: boom" in failed["exception"]
+
+
+def test_request_id_follows_each_task_and_thread(log_to_file):
+    setup, read = log_to_file
+    setup(level="INFO")
+    log = logging.getLogger("allmand.test")
+
+    async def handle(request_id: str):
+        set_request_id(request_id)
+        await asyncio.sleep(0)
+        log.info(f"task {request_id}")
+        # asyncio.to_thread copies the context: the worker thread logs the same ID
+        await asyncio.to_thread(log.info, f"thread {request_id}")
+
+    async def scenario():
+        await asyncio.gather(*(handle(f"req-{i}") for i in range(5)))
+
+    asyncio.run(scenario())
+    log.info("outside")
+
+    records = read()
+    assert len(records) == 11
+    for record in records:
+        expected = record["message"].split()[-1] if record["message"] != "outside" else "-"
+        assert record["request_id"] == expected
+    assert get_request_id() == "-"
+
+
+def test_debug_records_are_sampled(log_to_file, monkeypatch):
+    setup, read = log_to_file
+    monkeypatch.setattr(logger_module, "LOG_DEBUG_SAMPLE_RATE", 0.0)
+    setup(level="DEBUG")
+    log = logging.getLogger("allmand.test")
+
+    for i in range(20):
+        log.debug(f"debug {i}")
+    log.info("kept")
+    log.warning("kept too")
+
+    assert [record["message"] for record in read()] == ["kept", "kept too"]
+
+
+def test_debug_sampler_keeps_the_configured_share():
+    random.seed(0)
+    sampler = DebugSampler(0.25)
+    debug = logging.LogRecord("allmand", logging.DEBUG, __file__, 0, "x", None, None)
+    info = logging.LogRecord("allmand", logging.INFO, __file__, 0, "x", None, None)
+
+    kept = sum(sampler.filter(debug) for _ in range(4000))
+    assert 800 < kept < 1200
+    assert all(sampler.filter(info) for _ in range(100))
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(2))
+    log = logging.getLogger("allmand.test.queue")
+    log.addHandler(handler)
+    log.propagate = False
+    try:
+        for i in range(5):
+            log.warning(f"record {i}")
+    finally:
+        log.removeHandler(handler)
+        log.propagate = True
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
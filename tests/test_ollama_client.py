@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+pytest.importorskip("langchain_ollama")
+
+from ollama_client import CASCADE_THRESHOLD, answer_confidence
+
+
+CONTEXT = (
+    "Le tasse universitarie si pagano in tre rate. La prima rata scade il 30 settembre, "
+    "la seconda il 31 gennaio e la terza il 30 aprile tramite PagoPA."
+)
+
+
+def logprobs(*probabilities):
+    return [{"token": f"t{i}", "logprob": math.log(p)} for i, p in enumerate(probabilities)]
+
+
+def test_answer_backed_by_context_is_confident():
+    answer = "Le tasse: la prima rata scade il 30 settembre."
+    confidence = answer_confidence(answer, CONTEXT)
+    assert confidence == 1.0
+    assert confidence >= CASCADE_THRESHOLD
+    # Confident tokens keep it above the threshold
+    assert answer_confidence(answer, CONTEXT, logprobs(0.95, 0.9, 0.99)) >= CASCADE_THRESHOLD
+
+
+def test_hedging_or_empty_answer_escalates():
+    hedging = "Purtroppo non dispongo di informazioni sufficienti per rispondere con certezza."
+    assert answer_confidence(hedging, CONTEXT) < CASCADE_THRESHOLD
+    assert answer_confidence("", CONTEXT) == 0.0
+    assert answer_confidence("Sì.", CONTEXT) == 0.0
+
+
+def test_uncertain_tokens_escalate_a_supported_answer():
+    answer = "La prima rata scade il 30 settembre."
+    probabilities = (0.3, 0.2, 0.4)
+    confidence = answer_confidence(answer, CONTEXT, logprobs(*probabilities) + [{"token": "x", "logprob": None}])
+
+    expected = math.exp(sum(math.log(p) for p in probabilities) / len(probabilities))
+    assert confidence == pytest.approx(expected)
+    assert confidence < CASCADE_THRESHOLD
+
+
+def test_partially_supported_answer_scores_the_supported_share():
+    answer = "La terza rata scade ad aprile oppure durante l'estate."
+    # Content words: terza, rata, scade, aprile (in context); oppure, durante, estate (not)
+    assert answer_confidence(answer, CONTEXT) == pytest.approx(4 / 7)
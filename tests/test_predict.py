@@ -0,0 +1,61 @@
+import json
+from argparse import Namespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import predict
+
+
+class LowercasePreprocessor:
+    def preprocess(self, text):
+        return text.lower()
+
+
+class StubVectorizer:
+    def transform(self, texts):
+        return texts
+
+
+class StubModel:
+    """Predicts the text length, with two-class probabilities."""
+
+    def predict(self, X):
+        return np.array([len(text) for text in X])
+
+    def predict_proba(self, X):
+        lengths = np.array([len(text) for text in X], dtype=float)
+        return np.column_stack([lengths / 100, 1 - lengths / 100])
+
+
+def read_output(path, fmt):
+    if fmt == "csv":
+        return pd.read_csv(path)
+    if fmt == "jsonl":
+        return pd.DataFrame([json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()])
+    return pd.read_parquet(path)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "parquet"])
+def test_predict_bulk_streams_chunks_in_order(tmp_path, monkeypatch, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    # nltk-free preprocessor; _preprocessor is registered so monkeypatch restores it
+    monkeypatch.setattr(predict, "_preprocessor", None)
+    monkeypatch.setattr(predict, "_init_worker", lambda language: setattr(predict, "_preprocessor", LowercasePreprocessor()))
+    texts = [f"Domanda {'x' * i}" for i in range(10)]
+    input_file = tmp_path / "input.csv"
+    pd.DataFrame({"id": range(10), "text": texts}).to_csv(input_file, index=False)
+    output_file = tmp_path / f"predictions.{fmt}"
+
+    args = Namespace(
+        input_file=input_file, output_file=output_file, text_column="text",
+        language="italian", chunk_size=3, workers=1,
+    )
+    assert predict.predict_bulk(args, StubModel(), StubVectorizer()) == 10
+
+    output = read_output(output_file, fmt)
+    assert output["text"].tolist() == texts
+    assert output["prediction"].tolist() == [len(text) for text in texts]
+    assert list(output.columns) == ["text", "prediction", "prob_class_0", "prob_class_1"]
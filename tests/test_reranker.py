@@ -0,0 +1,57 @@
+import time
+
+from reranker import Reranker
+
+
+class StubVectorizer:
+    def transform(self, texts):
+        return None
+
+
+class StubPreprocessor:
+    def preprocess(self, text):
+        return text
+
+
+class StubReranker(Reranker):
+    """TF-IDF mode with a stub scorer: the score is the number in the chunk."""
+
+    def __init__(self, delay: float = 0.0, **kwargs):
+        super().__init__(mode="tfidf", vectorizer=StubVectorizer(), preprocessor=StubPreprocessor(), **kwargs)
+        self.delay = delay
+        self.batches = []
+
+    def _score_batch(self, question, query_vector, texts):
+        self.batches.append(len(texts))
+        time.sleep(self.delay)
+        return [float(t.split()[-1]) for t in texts]
+
+
+def make_candidates(n: int):
+    # Retrieval order is the reverse of the rerank score
+    return [{"id": i, "content": f"chunk {i + 1}"} for i in range(n)]
+
+
+def test_rerank_keeps_best_of_candidates_in_batches():
+    reranker = StubReranker(batch_size=16, budget_ms=10_000)
+    top = reranker.rerank("question", make_candidates(50), top_k=5)
+
+    assert reranker.batches == [16, 16, 16, 2]
+    assert [c["id"] for c in top] == [49, 48, 47, 46, 45]
+    assert [c["rerank_score"] for c in top] == [50.0, 49.0, 48.0, 47.0, 46.0]
+
+
+def test_rerank_falls_back_to_retrieval_order_when_budget_is_spent():
+    reranker = StubReranker(delay=0.1, batch_size=10, budget_ms=50)
+    ranked = reranker.rerank("question", make_candidates(50), top_k=50)
+
+    # Only the first batch fits the budget: it is reranked, the rest keeps retrieval order
+    assert reranker.batches == [10]
+    assert [c["id"] for c in ranked] == list(range(9, -1, -1)) + list(range(10, 50))
+    assert all("rerank_score" not in c for c in ranked[10:])
+
+
+def test_disabled_reranker_truncates_retrieval_order():
+    reranker = Reranker(mode="tfidf")
+    assert not reranker.enabled
+    assert [c["id"] for c in reranker.rerank("question", make_candidates(10), top_k=3)] == [0, 1, 2]
@@ -0,0 +1,45 @@
+import asyncio
+from retriever import HybridRetriever, build_tsquery, reciprocal_rank_fusion
+
+
+def test_embedding_finishes_after_missed_budget():
+    embedded = []
+
+    async def embed_query(question):
+        await asyncio.sleep(0.05)
+        embedded.append(question)
+        return [0.0]
+
+    async def main():
+        retriever = HybridRetriever("sqlite://", embed_query=embed_query, budget_ms=10)
+        chunks = await retriever.retrieve("ISEE", keyword_weight=0)
+        assert chunks == []
+        assert embedded == []
+        # The dropped branch's embedding keeps running and reaches the cache
+        await asyncio.sleep(0.1)
+        assert embedded == ["ISEE"]
+        assert not retriever._embeddings
+
+    asyncio.run(main())
+
+
+def test_build_tsquery_keeps_codes_and_drops_single_letters():
+    assert build_tsquery("Requisiti ISEE per la LM-32 e la L-8?") == "'isee' | 'l-8' | 'la' | 'lm-32' | 'per' | 'requisiti'"
+    assert build_tsquery("a ? !") == ""
+
+
+def test_rrf_rewards_chunks_ranked_by_both_branches():
+    keyword = [{"id": 1}, {"id": 2}]
+    vector = [{"id": 2}, {"id": 3}]
+    fused = reciprocal_rank_fusion({"keyword": keyword, "vector": vector}, {}, k=60)
+    assert [doc["id"] for doc in fused] == [2, 1, 3]
+    assert fused[0]["ranks"] == {"keyword": 2, "vector": 1}
+    assert fused[0]["score"] == 1 / 62 + 1 / 61
+
+
+def test_rrf_weights_scale_each_branch():
+    fused = reciprocal_rank_fusion(
+        {"keyword": [{"id": 1}], "vector": [{"id": 2}]}, {"keyword": 0.5, "vector": 1.0}, k=60
+    )
+    assert [doc["id"] for doc in fused] == [2, 1]
+    assert fused[1]["score"] == 0.5 / 61
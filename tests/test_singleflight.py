@@ -0,0 +1,134 @@
+import time
+import asyncio
+import threading
+import pytest
+from metrics import COALESCED_CALLS
+from singleflight import SingleFlight, SyncSingleFlight, normalize_question
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def wait_for_followers(name: str, count: int):
+    follower = COALESCED_CALLS.labels(flight=name, role="follower")
+    deadline = time.monotonic() + 5
+    while follower._value.get() < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_normalize_question():
+    assert normalize_question("  Quando apre   la segreteria?? ") == "quando apre la segreteria"
+
+
+def test_followers_share_the_leader_result():
+    async def main():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("q", fn) for _ in range(5)))
+        assert results == ["answer"] * 5
+        assert len(calls) == 1
+        # Nothing is cached: the next call runs again
+        assert await flight.do("q", fn) == "answer"
+        assert len(calls) == 2
+
+    run(main())
+
+
+def test_followers_share_the_leader_exception():
+    async def main():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(*(flight.do("q", fn) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(calls) == 1
+        assert not flight._inflight
+
+    run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_call():
+    async def main():
+        flight = SingleFlight("test")
+
+        async def fn():
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        leader = asyncio.create_task(flight.do("q", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("q", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "answer"
+
+    run(main())
+
+
+def test_sync_followers_share_the_leader_result():
+    flight = SyncSingleFlight("sync-result")
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do("q", fn)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("q", fn))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    wait_for_followers("sync-result", 3)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert results == ["answer"] * 4
+    assert len(calls) == 1
+
+
+def test_sync_followers_share_the_leader_exception():
+    flight = SyncSingleFlight("sync-error")
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fn():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            flight.do("q", fn)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads[1:]:
+        thread.start()
+    wait_for_followers("sync-error", 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
+    assert len({id(error) for error in errors}) == 1
+    with pytest.raises(ValueError):
+        flight.do("q", fn)
@@ -0,0 +1,96 @@
+from sqlalchemy import create_engine, text
+from sql_templates import SqlTemplateLibrary, parameterize
+
+COUNT_SQL = "SELECT COUNT(*) AS totale FROM studenti WHERE anno_iscrizione = {year}"
+COURSE_SQL = (
+    "SELECT s.anno_iscrizione, COUNT(*) AS totale FROM studenti s JOIN corsi_laurea c ON c.id = s.corso_id "
+    "WHERE c.nome = '{course}' GROUP BY s.anno_iscrizione"
+)
+HISTORY = [
+    ("Quanti studenti si sono iscritti nel 2020?", COUNT_SQL.format(year=2020)),
+    ("quanti studenti si sono iscritti nel 2021", COUNT_SQL.format(year=2021)),
+    ("Iscritti per anno a Informatica", COURSE_SQL.format(course="Informatica")),
+    ("Iscritti per anno a Matematica", COURSE_SQL.format(course="Matematica")),
+    # Seen once: below the minimum support
+    ("Quanti studenti si sono laureati nel 2020?", "SELECT COUNT(*) FROM lauree WHERE anno = 2020"),
+]
+
+
+def make_library() -> SqlTemplateLibrary:
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE dashboard_history "
+            "(user_query TEXT, generated_sql TEXT, context_json TEXT, sql_template TEXT, created_at TEXT)"
+        ))
+        conn.execute(text("CREATE TABLE corsi_laurea (id INTEGER, nome TEXT)"))
+        conn.execute(text("CREATE TABLE insegnamenti (nome TEXT)"))
+        conn.execute(text("CREATE TABLE studenti (corso_id INTEGER, anno_iscrizione INTEGER)"))
+        conn.execute(text("INSERT INTO corsi_laurea VALUES (1, 'Informatica'), (2, 'Matematica'), (3, 'Fisica')"))
+        conn.execute(text("INSERT INTO studenti VALUES (1, 2020), (1, 2022), (3, 2022), (3, 2022)"))
+        for i, (question, sql) in enumerate(HISTORY):
+            conn.execute(
+                text("INSERT INTO dashboard_history VALUES (:q, :sql, '[{\"totale\": 1}]', NULL, :t)"),
+                {"q": question, "sql": sql, "t": f"2024-01-{i + 1:02d}"},
+            )
+    library = SqlTemplateLibrary(engine, min_support=2)
+    assert library.refresh() == 2
+    return library
+
+
+def test_parameterize_binds_question_literals():
+    template, shape, order, values = parameterize(
+        "SELECT * FROM corsi_laurea WHERE nome ILIKE '%Informatica%' AND anno = 2020 LIMIT 10;",
+        "Corsi di Informatica nel 2020",
+    )
+    assert template.sql == "SELECT * FROM corsi_laurea WHERE nome ILIKE $1 AND anno = $2 LIMIT 10"
+    assert [(slot.kind, slot.prefix, slot.suffix) for slot in template.slots] == [("text", "%", "%"), ("year", "", "")]
+    assert shape == "corsi di  __text__  nel  __year__ "
+    assert order == (0, 1)
+    assert values == ("Informatica", "2020")
+
+
+def test_parameterize_rejects_non_select():
+    assert parameterize("DELETE FROM studenti WHERE anno_iscrizione = 2020", "iscritti 2020") is None
+    assert parameterize("SELECT 1; DROP TABLE studenti", "1") is None
+
+
+def test_match_fills_template():
+    library = make_library()
+    match = library.match("Quanti studenti si sono iscritti nel 2023?")
+    assert match.template.sql == COUNT_SQL.format(year="$1")
+    assert match.params == (2023,)
+    assert match.render() == COUNT_SQL.format(year=2023)
+
+    # Only function words differ
+    assert library.match("quanti studenti sono iscritti nel 2019").params == (2019,)
+
+    match = library.match("iscritti per anno a fisica")
+    assert match.params == ("Fisica",)
+    with library.engine.connect() as conn:
+        keys, rows = library.execute(conn, match)
+    assert keys == ["anno_iscrizione", "totale"]
+    assert [tuple(row) for row in rows] == [(2022, 2)]
+
+
+def test_match_rejects_near_misses():
+    library = make_library()
+    assert library.match("Quanti studenti si sono laureati nel 2020?") is None
+    assert library.match("Quanti studenti non si sono iscritti nel 2020?") is None
+    assert library.match("Quali studenti si sono iscritti nel 2020?") is None
+    assert library.match("Quanti studenti si sono iscritti nel 2020 a Informatica?") is None
+    assert library.match("Quanti studenti si sono iscritti?") is None
+    assert library.match("Iscritti per anno") is None
+
+
+def test_template_served_rows_are_not_support():
+    library = make_library()
+    assert library.match("Quanti studenti si sono laureati nel 2021?") is None
+    # Served by a template, the same query again must not count as support
+    with library.engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO dashboard_history VALUES (:q, :sql, '[{\"totale\": 1}]', 'sqlt_0', '2024-02-01')"),
+            {"q": "Quanti studenti si sono laureati nel 2021?", "sql": "SELECT COUNT(*) FROM lauree WHERE anno = 2021"},
+        )
+    assert library.refresh() == 2
+    assert library.match("Quanti studenti si sono laureati nel 2021?") is None
@@ -0,0 +1,15 @@
+from summary_store import SummaryStore
+
+
+def test_memory_cache_evicts_least_recently_used():
+    store = SummaryStore("sqlite://", max_entries=2)
+    store.engine = None  # memory only
+    store.put("a", "m", "summary a")
+    store.put("b", "m", "summary b")
+    assert store.get("a", "m") == "summary a"
+    store.put("c", "m", "summary c")
+
+    assert store.get("b", "m") is None
+    assert store.get("a", "m") == "summary a"
+    assert store.get("c", "m") == "summary c"
+    assert len(store._cache) == 2
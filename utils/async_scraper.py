@@ -0,0 +1,263 @@
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Union
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+import httpx
+from bs4 import BeautifulSoup
+from utils.logger import logger
+from utils.config import config
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Per-host interval when robots.txt sets no Crawl-delay: up to 10 requests/s per host
+DEFAULT_HOST_DELAY = 0.1
+
+
+def parse_page(url: str, html: str, selectors: Dict[str, str], base_url: Optional[str] = None) -> Dict[str, Any]:
+    """Extracts the selectors' text and the page links; runs in a worker process."""
+    soup = BeautifulSoup(html, 'html.parser')
+    data = {'url': url}
+    for key, selector in selectors.items():
+        data[key] = [element.get_text(strip=True) for element in soup.select(selector)]
+    data['links'] = [
+        urljoin(base_url or url, a['href'])
+        for a in soup.select('a[href]')
+        if not a['href'].startswith(('#', 'mailto:', 'tel:', 'javascript:'))
+    ]
+    return data
+
+
+class HostRateLimiter:
+    """Enforces a minimum interval between requests to the same host."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._intervals: Dict[str, float] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def set_interval(self, url: str, interval: float):
+        """Overrides the interval for the host of `url` (e.g. its robots.txt Crawl-delay)."""
+        self._intervals[urlsplit(url).netloc] = interval
+
+    async def wait(self, url: str):
+        host = urlsplit(url).netloc
+        interval = self._intervals.get(host, self.interval)
+        if interval <= 0:
+            return
+        async with self._locks.setdefault(host, asyncio.Lock()):
+            delay = self._next_slot.get(host, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot[host] = time.monotonic() + interval
+
+
+class JsonlResultWriter:
+    """Writes scraped results to a JSON Lines file as they arrive.
+
+    The file is overwritten, so a rerun does not duplicate records; with
+    `append=True` the results are added to the existing ones.
+    """
+
+    def __init__(self, output_path: Union[str, Path], append: bool = False):
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.output_path, 'a' if append else 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, data: Dict[str, Any]):
+        self._file.write(json.dumps(data, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+        logger.info(f"Saved {self.count} scraped records to {self.output_path}")
+
+
+class AsyncWebScraper:
+    """Async counterpart of `WebScraper` for static pages.
+
+    One pooled (HTTP/2 when `h2` is installed) client is shared by all requests;
+    gzip/brotli decoding is handled by httpx. `delay` is applied per host rather
+    than globally; by default each host gets the Crawl-delay of its robots.txt,
+    or DEFAULT_HOST_DELAY if it sets none, so throughput comes from many hosts
+    and connections without hammering one site. Failed requests are retried with exponential backoff and full
+    jitter, and HTML parsing is offloaded to a process pool so the event loop
+    keeps fetching while BeautifulSoup works.
+
+    Use as an async context manager:
+
+        async with AsyncWebScraper() as scraper:
+            await scraper.scrape_multiple_pages(urls, selectors, output_file="pages.jsonl")
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        delay: Optional[float] = None,
+        max_connections: int = 100,
+        timeout: float = 10.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        parser_workers: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        # An explicit delay applies to every host; None follows each host's robots.txt
+        self.rate_limiter = HostRateLimiter(DEFAULT_HOST_DELAY if delay is None else delay)
+        self.use_crawl_delay = delay is None
+        self._crawl_delays: Dict[str, Optional[float]] = {}
+        self._robots_locks: Dict[str, asyncio.Lock] = {}
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.parser_workers = parser_workers
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def __aenter__(self) -> "AsyncWebScraper":
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE and self.transport is None,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+            transport=self.transport,
+        )
+        self._pool = ProcessPoolExecutor(max_workers=self.parser_workers)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # Full jitter: uniform in [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _apply_crawl_delay(self, url: str):
+        """Fetches the host's robots.txt once and uses its Crawl-delay, if any."""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        async with self._robots_locks.setdefault(origin, asyncio.Lock()):
+            if origin in self._crawl_delays:
+                return
+            delay = None
+            try:
+                response = await self.client.get(f"{origin}/robots.txt")
+                if response.status_code == 200:
+                    parser = RobotFileParser()
+                    parser.parse(response.text.splitlines())
+                    delay = parser.crawl_delay('*')
+            except httpx.HTTPError as e:
+                logger.debug(f"robots.txt unavailable for {origin}: {e}")
+            self._crawl_delays[origin] = delay
+            if delay is not None:
+                self.rate_limiter.set_interval(url, float(delay))
+                logger.info(f"Crawl-delay for {origin}: {delay}s")
+
+    async def fetch_page(self, url: str, retries: int = 3) -> Optional[str]:
+        if self.use_crawl_delay:
+            await self._apply_crawl_delay(url)
+        for attempt in range(retries):
+            await self.rate_limiter.wait(url)
+            retry_after = None
+            try:
+                response = await self.client.get(url)
+                if response.status_code in RETRYABLE_STATUS:
+                    retry_after = response.headers.get('Retry-After')
+                    raise httpx.HTTPStatusError(
+                        f"Retryable status {response.status_code}", request=response.request, response=response
+                    )
+                response.raise_for_status()
+                logger.debug(f"Successfully fetched: {url}")
+                return response.text
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in RETRYABLE_STATUS:
+                    logger.error(f"Failed to fetch {url}: {e}")
+                    return None
+                logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+            except httpx.HTTPError as e:
+                logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+
+            if attempt < retries - 1:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        logger.error(f"Failed to fetch {url} after {retries} attempts")
+        return None
+
+    async def scrape_page(self, url: str, selectors: Dict[str, str]) -> Dict[str, Any]:
+        html = await self.fetch_page(url)
+        if not html:
+            return {}
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, parse_page, url, html, selectors, self.base_url)
+
+    async def iter_pages(
+        self,
+        urls: Iterable[str],
+        selectors: Dict[str, str],
+        concurrency: int = 50
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields scraped pages as soon as they complete (not in input order)."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.scrape_page(url, selectors)
+
+        tasks = [asyncio.create_task(bounded(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                data = await next_done
+                if data:
+                    yield data
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def scrape_multiple_pages(
+        self,
+        urls: List[str],
+        selectors: Dict[str, str],
+        output_file: Optional[str] = None,
+        concurrency: int = 50,
+        append: bool = False
+    ) -> Union[List[Dict[str, Any]], int]:
+        """Scrapes `urls` concurrently.
+
+        With `output_file` the results are streamed to `data/raw/<output_file>`
+        (JSON Lines, replaced unless `append`) and only the count is returned;
+        otherwise they are returned as a list.
+        """
+        writer = JsonlResultWriter(config.RAW_DATA_DIR / output_file, append=append) if output_file else None
+        results = []
+        started = time.perf_counter()
+        try:
+            async for data in self.iter_pages(urls, selectors, concurrency):
+                if writer:
+                    writer.write(data)
+                else:
+                    results.append(data)
+        finally:
+            if writer:
+                writer.close()
+
+        scraped = writer.count if writer else len(results)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Scraped {scraped}/{len(urls)} pages in {elapsed:.1f}s ({scraped / max(elapsed, 1e-9):.1f} pages/s)")
+        return scraped if writer else results
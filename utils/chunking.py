@@ -0,0 +1,242 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+LIST_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+TABLE_PATTERN = re.compile(r"^\s*\|")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (words and punctuation), cheap enough to call per line."""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """The lines of `text` one at a time (unlike splitlines/StringIO, no copy of the whole text)."""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end + 1]
+        start = end + 1
+
+
+def _hard_split(text: str, budget: int) -> Iterator[str]:
+    """Pieces of `text` of at most `budget` tokens, cut between words where possible."""
+    words = text.split()
+    current: List[str] = []
+    current_tokens = 0
+    for word in words:
+        word_tokens = count_tokens(word)
+        if current and current_tokens + word_tokens > budget:
+            yield " ".join(current)
+            current, current_tokens = [], 0
+        if word_tokens > budget:
+            # A single "word" longer than the budget (e.g. a long code or URL): cut between tokens
+            spans = [match.span() for match in TOKEN_PATTERN.finditer(word)]
+            for i in range(0, len(spans), budget):
+                group = spans[i:i + budget]
+                yield word[group[0][0]:group[-1][1]]
+            continue
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        yield " ".join(current)
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Tuple[str, str, int]]:
+    """Groups markdown lines into blocks.
+
+    Yields (block_type, text, heading_level) with block_type in
+    heading/paragraph/list/table/code; heading_level is 0 for non-headings.
+    """
+    block_type = None
+    buffer: List[str] = []
+
+    def flush():
+        text = "\n".join(buffer).strip("\n")
+        buffer.clear()
+        return text
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\n")
+
+        if block_type == "code":
+            buffer.append(line)
+            if FENCE_PATTERN.match(line):
+                yield "code", flush(), 0
+                block_type = None
+            continue
+
+        if FENCE_PATTERN.match(line):
+            if buffer:
+                yield block_type, flush(), 0
+            block_type = "code"
+            buffer.append(line)
+            continue
+
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            if buffer:
+                yield block_type, flush(), 0
+            block_type = None
+            yield "heading", heading.group(2), len(heading.group(1))
+            continue
+
+        if not line.strip():
+            if buffer:
+                yield block_type, flush(), 0
+            block_type = None
+            continue
+
+        if TABLE_PATTERN.match(line):
+            line_type = "table"
+        elif LIST_PATTERN.match(line) or (block_type == "list" and line.startswith((" ", "\t"))):
+            line_type = "list"
+        else:
+            line_type = "paragraph"
+
+        if buffer and line_type != block_type:
+            yield block_type, flush(), 0
+        block_type = line_type
+        buffer.append(line)
+
+    if buffer:
+        yield block_type or "paragraph", flush(), 0
+
+
+class MarkdownChunker:
+    """Structure-aware chunker for crawled markdown.
+
+    Splits on headings, keeps lists and tables whole whenever they fit in
+    `max_tokens` (oversized tables are split by rows with the header repeated),
+    and overlaps consecutive chunks of the same section by up to
+    `overlap_tokens`. No chunk exceeds `max_tokens` (`count_tokens`). Chunks
+    are produced by a generator that reads the text line by line, so a page is
+    never held twice in memory.
+    """
+
+    def __init__(self, max_tokens: int = 400, overlap_tokens: int = 50):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def _split_oversized(self, block_type: str, text: str) -> List[str]:
+        """Breaks a block larger than max_tokens into pieces that fit next to the overlap."""
+        budget = self.max_tokens - self.overlap_tokens
+        if block_type == "table":
+            rows = text.split("\n")
+            header = rows[:2] if len(rows) > 1 and set(rows[1].replace("|", "").strip()) <= set("-: ") else rows[:1]
+            units, prefix = rows[len(header):], "\n".join(header) + "\n"
+            if count_tokens(prefix) >= budget:
+                # No room for any row next to the header: split the table like a list
+                units, prefix = rows, ""
+        elif block_type in ("list", "code"):
+            units, prefix = text.split("\n"), ""
+        else:
+            units, prefix = SENTENCE_PATTERN.split(text), ""
+
+        pieces, current, current_tokens = [], [], count_tokens(prefix)
+        for unit in units:
+            unit_tokens = count_tokens(unit)
+            if unit_tokens + count_tokens(prefix) > budget:
+                # A single sentence/row still too large: hard split on words
+                if current:
+                    pieces.append(prefix + ("\n" if block_type != "paragraph" else " ").join(current))
+                    current, current_tokens = [], count_tokens(prefix)
+                pieces.extend(prefix + piece for piece in _hard_split(unit, budget - count_tokens(prefix)))
+                continue
+            if current and current_tokens + unit_tokens > budget:
+                pieces.append(prefix + ("\n" if block_type != "paragraph" else " ").join(current))
+                current, current_tokens = [], count_tokens(prefix)
+            current.append(unit)
+            current_tokens += unit_tokens
+        if current:
+            pieces.append(prefix + ("\n" if block_type != "paragraph" else " ").join(current))
+        return pieces
+
+    def _overlap_tail(self, parts: List[Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+        """Trailing sentences (or list lines) of the previous chunk to repeat in the next one."""
+        block_type, text = parts[-1]
+        if block_type in ("table", "code"):
+            return None
+        separator = " " if block_type == "paragraph" else "\n"
+        units = SENTENCE_PATTERN.split(text) if block_type == "paragraph" else text.split("\n")
+        tail: List[str] = []
+        tokens = 0
+        for unit in reversed(units):
+            unit_tokens = count_tokens(unit)
+            if tokens + unit_tokens > self.overlap_tokens:
+                break
+            tail.insert(0, unit)
+            tokens += unit_tokens
+        # Repeating the whole previous block would not be an overlap but a duplicate
+        if not tail or len(tail) == len(units):
+            return None
+        return block_type, separator.join(tail).strip()
+
+    def iter_chunks(
+        self,
+        markdown: Union[str, Iterable[str]],
+        source_url: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Yields {"content", "metadata"} dicts; metadata carries source URL and heading path."""
+        lines = iter_lines(markdown) if isinstance(markdown, str) else markdown
+
+        heading_path: List[str] = []
+        parts: List[Tuple[str, str]] = []
+        parts_tokens = 0
+        overlap_chars = 0
+        chunk_index = 0
+
+        def make_chunk():
+            content = "\n\n".join(text for _, text in parts)
+            return {
+                "content": content,
+                "metadata": {
+                    "source_url": source_url,
+                    "heading_path": list(heading_path),
+                    "chunk_index": chunk_index,
+                    "token_count": count_tokens(content),
+                    "overlap_chars": overlap_chars,
+                    "block_types": sorted({block_type for block_type, _ in parts}),
+                },
+            }
+
+        for block_type, text, level in iter_blocks(lines):
+            if block_type == "heading":
+                # Section boundary: no overlap across sections
+                if parts:
+                    yield make_chunk()
+                    chunk_index += 1
+                parts, parts_tokens, overlap_chars = [], 0, 0
+                heading_path = heading_path[:level - 1] + [text]
+                continue
+
+            block_tokens = count_tokens(text)
+            pieces = [text] if block_tokens <= self.max_tokens else [
+                piece.strip() for piece in self._split_oversized(block_type, text)
+            ]
+
+            for piece in pieces:
+                piece_tokens = count_tokens(piece)
+                if parts and parts_tokens + piece_tokens > self.max_tokens:
+                    yield make_chunk()
+                    chunk_index += 1
+                    tail = self._overlap_tail(parts)
+                    if tail and count_tokens(tail[1]) + piece_tokens > self.max_tokens:
+                        tail = None
+                    parts = [tail] if tail else []
+                    overlap_chars = len(tail[1]) + 2 if tail else 0
+                    parts_tokens = count_tokens(tail[1]) if tail else 0
+                parts.append((block_type, piece))
+                parts_tokens += piece_tokens
+
+        if parts:
+            yield make_chunk()
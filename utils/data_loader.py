@@ -1,72 +1,232 @@
+import codecs
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
 from utils.logger import logger
 
+# Bytes read to detect the encoding of a text file
+ENCODING_SAMPLE_SIZE = 1 << 20
+
+Columns = Optional[List[str]]
+# Column dtypes, e.g. {"label": "category"} for the class labels
+Dtypes = Optional[Dict[str, str]]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Feather files require pyarrow: pip install pyarrow")
+
 
 class DataLoader:
-    
+
+    @staticmethod
+    def detect_encoding(file_path: Union[str, Path], sample_size: Optional[int] = ENCODING_SAMPLE_SIZE) -> str:
+        """utf-8 (utf-8-sig with a BOM) if the first `sample_size` bytes decode, latin-1 otherwise.
+
+        With `sample_size=None` the whole file is checked, a block at a time.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with open(file_path, "rb") as f:
+            block = f.read(sample_size or ENCODING_SAMPLE_SIZE)
+            encoding = "utf-8-sig" if block.startswith(codecs.BOM_UTF8) else "utf-8"
+            try:
+                while block:
+                    # Incremental: a multi-byte character cut at the end of a block is fine
+                    decoder.decode(block, final=False)
+                    if sample_size:
+                        break
+                    block = f.read(ENCODING_SAMPLE_SIZE)
+                if not sample_size:
+                    decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                return "latin-1"
+        return encoding
+
     @staticmethod
     def load_csv(
         file_path: Union[str, Path],
-        encoding: str = "utf-8",
+        encoding: Optional[str] = None,
+        columns: Columns = None,
+        dtype: Dtypes = None,
         **kwargs
     ) -> pd.DataFrame:
+        encoding = encoding or DataLoader.detect_encoding(file_path)
         try:
-            df = pd.read_csv(file_path, encoding=encoding, **kwargs)
-            logger.info(f"Loaded CSV file: {file_path} ({len(df)} rows)")
-            return df
+            df = pd.read_csv(file_path, encoding=encoding, usecols=columns, dtype=dtype, **kwargs)
         except UnicodeDecodeError:
-            logger.warning(f"UTF-8 failed, trying latin-1 encoding for {file_path}")
-            df = pd.read_csv(file_path, encoding="latin-1", **kwargs)
-            logger.info(f"Loaded CSV file with latin-1: {file_path} ({len(df)} rows)")
-            return df
-    
+            # Invalid bytes past the detection sample
+            logger.warning(f"{encoding} failed, trying latin-1 encoding for {file_path}")
+            encoding = "latin-1"
+            df = pd.read_csv(file_path, encoding=encoding, usecols=columns, dtype=dtype, **kwargs)
+        logger.info(f"Loaded CSV file ({encoding}): {file_path} ({len(df)} rows)")
+        return df
+
+    @staticmethod
+    def iter_csv(
+        file_path: Union[str, Path],
+        chunksize: int = 50000,
+        encoding: Optional[str] = None,
+        columns: Columns = None,
+        dtype: Dtypes = None,
+        **kwargs
+    ) -> Iterator[pd.DataFrame]:
+        """The CSV file `chunksize` rows at a time."""
+        # Unlike load_csv there is no retry once chunks are out: check the whole file up front
+        encoding = encoding or DataLoader.detect_encoding(file_path, sample_size=None)
+        with pd.read_csv(
+            file_path, encoding=encoding, usecols=columns, dtype=dtype, chunksize=chunksize, **kwargs
+        ) as reader:
+            yield from reader
+
     @staticmethod
     def load_excel(
         file_path: Union[str, Path],
         sheet_name: Union[str, int] = 0,
+        columns: Columns = None,
+        dtype: Dtypes = None,
         **kwargs
     ) -> pd.DataFrame:
-        df = pd.read_excel(file_path, sheet_name=sheet_name, **kwargs)
+        df = pd.read_excel(file_path, sheet_name=sheet_name, usecols=columns, dtype=dtype, **kwargs)
         logger.info(f"Loaded Excel file: {file_path} ({len(df)} rows)")
         return df
-    
+
     @staticmethod
     def load_json(
         file_path: Union[str, Path],
+        columns: Columns = None,
+        dtype: Dtypes = None,
         **kwargs
     ) -> pd.DataFrame:
+        # read_json has no column projection: the whole file is parsed first
         df = pd.read_json(file_path, **kwargs)
+        df = df[columns] if columns else df
+        df = df.astype(dtype) if dtype else df
         logger.info(f"Loaded JSON file: {file_path} ({len(df)} rows)")
         return df
-    
+
+    @staticmethod
+    def iter_json(
+        file_path: Union[str, Path],
+        chunksize: int = 50000,
+        columns: Columns = None,
+        dtype: Dtypes = None,
+        **kwargs
+    ) -> Iterator[pd.DataFrame]:
+        """A JSON Lines file `chunksize` records at a time."""
+        with pd.read_json(file_path, lines=True, chunksize=chunksize, **kwargs) as reader:
+            for chunk in reader:
+                chunk = chunk[columns] if columns else chunk
+                yield chunk.astype(dtype) if dtype else chunk
+
+    @staticmethod
+    def load_parquet(
+        file_path: Union[str, Path],
+        columns: Columns = None,
+        dtype: Dtypes = None,
+        **kwargs
+    ) -> pd.DataFrame:
+        _pyarrow()
+        # Columnar: only the requested columns are read from disk
+        df = pd.read_parquet(file_path, columns=columns, **kwargs)
+        df = df.astype(dtype) if dtype else df
+        logger.info(f"Loaded Parquet file: {file_path} ({len(df)} rows)")
+        return df
+
+    @staticmethod
+    def iter_parquet(
+        file_path: Union[str, Path],
+        chunksize: int = 50000,
+        columns: Columns = None,
+        dtype: Dtypes = None
+    ) -> Iterator[pd.DataFrame]:
+        """The Parquet file `chunksize` rows at a time."""
+        parquet = _pyarrow().parquet.ParquetFile(file_path)
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            chunk = batch.to_pandas()
+            yield chunk.astype(dtype) if dtype else chunk
+
+    @staticmethod
+    def load_feather(
+        file_path: Union[str, Path],
+        columns: Columns = None,
+        dtype: Dtypes = None,
+        **kwargs
+    ) -> pd.DataFrame:
+        _pyarrow()
+        df = pd.read_feather(file_path, columns=columns, **kwargs)
+        df = df.astype(dtype) if dtype else df
+        logger.info(f"Loaded Feather file: {file_path} ({len(df)} rows)")
+        return df
+
+    @staticmethod
+    def load(
+        file_path: Union[str, Path],
+        columns: Columns = None,
+        dtype: Dtypes = None,
+        **kwargs
+    ) -> pd.DataFrame:
+        """Loads a CSV, JSON Lines, Parquet or Feather file, by extension."""
+        suffix = Path(file_path).suffix.lower()
+        if suffix in (".parquet", ".pq"):
+            return DataLoader.load_parquet(file_path, columns=columns, dtype=dtype, **kwargs)
+        if suffix == ".feather":
+            return DataLoader.load_feather(file_path, columns=columns, dtype=dtype, **kwargs)
+        if suffix in (".jsonl", ".ndjson"):
+            return DataLoader.load_json(file_path, lines=True, columns=columns, dtype=dtype, **kwargs)
+        return DataLoader.load_csv(file_path, columns=columns, dtype=dtype, **kwargs)
+
+    @staticmethod
+    def iter_chunks(
+        file_path: Union[str, Path],
+        chunksize: int = 50000,
+        columns: Columns = None,
+        dtype: Dtypes = None
+    ) -> Iterator[pd.DataFrame]:
+        """Iterates over a CSV, JSON Lines or Parquet file, by extension."""
+        suffix = Path(file_path).suffix.lower()
+        if suffix in (".parquet", ".pq"):
+            return DataLoader.iter_parquet(file_path, chunksize, columns=columns, dtype=dtype)
+        if suffix in (".jsonl", ".ndjson"):
+            return DataLoader.iter_json(file_path, chunksize, columns=columns, dtype=dtype)
+        if suffix == ".csv":
+            return DataLoader.iter_csv(file_path, chunksize, columns=columns, dtype=dtype)
+        raise ValueError(f"Unsupported file format for chunked reading: {file_path}")
+
     @staticmethod
     def load_text_files(
         directory: Union[str, Path],
         pattern: str = "*.txt",
-        encoding: str = "utf-8"
+        encoding: str = "utf-8",
+        max_workers: int = 16
     ) -> pd.DataFrame:
         directory = Path(directory)
-        files = list(directory.glob(pattern))
-        
-        data = []
-        for file_path in files:
+        files = sorted(directory.glob(pattern))
+
+        def read(file_path: Path) -> Optional[Dict[str, str]]:
             try:
                 with open(file_path, "r", encoding=encoding) as f:
-                    content = f.read()
-                    data.append({
+                    return {
                         "filename": file_path.name,
-                        "text": content,
+                        "text": f.read(),
                         "path": str(file_path)
-                    })
+                    }
             except Exception as e:
                 logger.error(f"Error reading {file_path}: {e}")
-        
+                return None
+
+        # File reads are I/O bound: threads overlap the open/read latency
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            data = [row for row in pool.map(read, files) if row is not None]
+
         df = pd.DataFrame(data)
         logger.info(f"Loaded {len(df)} text files from {directory}")
         return df
-    
+
     @staticmethod
     def save_dataframe(
         df: pd.DataFrame,
@@ -76,7 +236,7 @@ class DataLoader:
     ):
         file_path = Path(file_path)
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        
+
         if format == "csv":
             df.to_csv(file_path, index=False, **kwargs)
         elif format == "excel":
@@ -85,7 +245,13 @@ class DataLoader:
             df.to_json(file_path, **kwargs)
         elif format == "pickle":
             df.to_pickle(file_path, **kwargs)
+        elif format == "parquet":
+            _pyarrow()
+            df.to_parquet(file_path, index=False, **kwargs)
+        elif format == "feather":
+            _pyarrow()
+            df.reset_index(drop=True).to_feather(file_path, **kwargs)
         else:
             raise ValueError(f"Unsupported format: {format}")
-        
+
         logger.info(f"Saved dataframe to {file_path} ({len(df)} rows)")
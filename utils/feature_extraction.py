@@ -1,11 +1,14 @@
 import numpy as np
-import pandas as pd
-from typing import List, Tuple, Optional, Dict
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation, NMF
-from gensim.models import Word2Vec
+from typing import TYPE_CHECKING, List, Tuple, Optional, Dict
 from utils.logger import logger
 
+# scikit-learn and gensim are imported on first use: loading gensim alone takes
+# longer than most scripts that only need TF-IDF.
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation, NMF
+    from gensim.models import Word2Vec
+
 
 class FeatureExtractor:
     
@@ -21,7 +24,9 @@ class FeatureExtractor:
         min_df: int = 2,
         max_df: float = 0.95,
         **kwargs
-    ) -> Tuple[np.ndarray, CountVectorizer]:
+    ) -> Tuple[np.ndarray, "CountVectorizer"]:
+        from sklearn.feature_extraction.text import CountVectorizer
+
         self.vectorizer = CountVectorizer(
             max_features=max_features,
             min_df=min_df,
@@ -40,7 +45,9 @@ class FeatureExtractor:
         max_df: float = 0.95,
         ngram_range: Tuple[int, int] = (1, 2),
         **kwargs
-    ) -> Tuple[np.ndarray, TfidfVectorizer]:
+    ) -> Tuple[np.ndarray, "TfidfVectorizer"]:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
         self.vectorizer = TfidfVectorizer(
             max_features=max_features,
             min_df=min_df,
@@ -58,7 +65,10 @@ class FeatureExtractor:
         n_topics: int = 10,
         max_features: int = 1000,
         **kwargs
-    ) -> Tuple[np.ndarray, LatentDirichletAllocation]:
+    ) -> Tuple[np.ndarray, "LatentDirichletAllocation"]:
+        from sklearn.feature_extraction.text import CountVectorizer
+        from sklearn.decomposition import LatentDirichletAllocation
+
         vectorizer = CountVectorizer(max_features=max_features, min_df=2)
         bow = vectorizer.fit_transform(texts)
         
@@ -78,7 +88,10 @@ class FeatureExtractor:
         n_topics: int = 10,
         max_features: int = 1000,
         **kwargs
-    ) -> Tuple[np.ndarray, NMF]:
+    ) -> Tuple[np.ndarray, "NMF"]:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import NMF
+
         vectorizer = TfidfVectorizer(max_features=max_features, min_df=2)
         tfidf = vectorizer.fit_transform(texts)
         
@@ -116,7 +129,9 @@ class FeatureExtractor:
         min_count: int = 2,
         workers: int = 4,
         **kwargs
-    ) -> Word2Vec:
+    ) -> "Word2Vec":
+        from gensim.models import Word2Vec
+
         self.word2vec_model = Word2Vec(
             sentences=tokenized_texts,
             vector_size=vector_size,
@@ -1,40 +1,237 @@
-import logging
+import os
 import sys
+import copy
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 from utils.config import config
 
+# text (human readable) or json (one object per line, for log shippers)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if config.DEBUG else "INFO").upper()
+# Records are handed to a background thread; callers never wait on console or disk I/O
+LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() == "true"
+# Records waiting for the writer thread; when full, new records are dropped (and counted)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Share of DEBUG records kept (high-volume lines such as per-URL fetches)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+# The request ID (propagated via this header) of the current request, "-" outside requests
+REQUEST_ID_HEADER = "X-Request-ID"
+# Log file of the command line scripts (the services log to stdout only)
+LOG_FILE = config.LOGS_DIR / "app.log"
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes of every LogRecord: anything else was passed with `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def set_request_id(request_id: Optional[str] = None):
+    """Binds a request ID (a new one if not given) to the current context; returns the reset token."""
+    return _request_id.set(request_id or uuid.uuid4().hex)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+class LazyFileHandler(logging.FileHandler):
+    """File handler that creates the log directory and file on the first record, not on import."""
+
+    def __init__(self, filename: Path, encoding: Optional[str] = None):
+        super().__init__(filename, encoding=encoding, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the request ID of the context that logged them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Keeps a `rate` share of the DEBUG records, and every record above DEBUG."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without ever blocking; drops them when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve what depends on the caller (arguments, exception) and keep the
+        # structured fields; formatting is left to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DropReporter(logging.Handler):
+    """Runs in the writer thread: reports the records dropped since the last report."""
+
+    def __init__(self, queue_handler: NonBlockingQueueHandler):
+        super().__init__()
+        self.queue_handler = queue_handler
+        self.reported = 0
+
+    def emit(self, record: logging.LogRecord):
+        dropped = self.queue_handler.dropped
+        if dropped > self.reported:
+            logger = logging.getLogger("allmand.logging")
+            # Straight to the writer handlers: this thread must not enqueue
+            warning = logger.makeRecord(
+                logger.name, logging.WARNING, __file__, 0,
+                f"Log queue full: dropped {dropped - self.reported} records", None, None,
+            )
+            warning.request_id = "-"
+            self.reported = dropped
+            for handler in _listener.handlers if _listener else ():
+                if handler is not self:
+                    handler.handle(warning)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _formatter(json_format: bool) -> logging.Formatter:
+    if json_format:
+        return JsonFormatter()
+    return logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+def configure_logging(
+    log_file: Optional[Path] = None,
+    level: str = LOG_LEVEL,
+    json_format: bool = LOG_FORMAT == "json",
+    use_queue: bool = LOG_QUEUE,
+    console: bool = True,
+):
+    """Installs the handlers on the root logger (once per process).
+
+    Called by the entry points (the services, the scripts), never on import:
+    a library importing `utils` leaves the logging setup of its host alone.
+    Every logger (`logging.getLogger(__name__)` in the services, the `allmand`
+    logger of utils, uvicorn) ends up here. With `use_queue` the calling thread
+    only enqueues the record; a listener thread formats and writes it, so a slow
+    console or disk never blocks the event loop.
+    """
+    global _listener
+    root = logging.getLogger()
+    if getattr(root, "_allmand_configured", False):
+        return
+    root._allmand_configured = True
+    root.setLevel(level)
+
+    formatter = _formatter(json_format)
+    handlers = []
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    if log_file:
+        handlers.append(LazyFileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if use_queue:
+        front = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _listener = logging.handlers.QueueListener(front.queue, *handlers, DropReporter(front), respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        front_handlers = [front]
+    else:
+        front_handlers = handlers
+
+    for handler in front_handlers:
+        # Filters run on the calling thread, where the request ID is bound
+        handler.addFilter(RequestIdFilter())
+        handler.addFilter(DebugSampler(LOG_DEBUG_SAMPLE_RATE))
+        root.addHandler(handler)
+
+    # uvicorn writes its own logs synchronously to stderr: route them through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+
+def stop_logging():
+    """Flushes the queued records (called at exit)."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
 
 def setup_logger(
     name: str = "allmand",
     log_file: Optional[Path] = None,
-    level: int = logging.INFO,
+    level: Optional[int] = None,
     console: bool = True,
 ) -> logging.Logger:
+    configure_logging(log_file=log_file, console=console)
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    
-    if logger.handlers:
-        return logger
-    
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    
-    if console:
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(level)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-    
-    if log_file:
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
-        file_handler.setLevel(level)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+    if level is not None:
+        logger.setLevel(level)
     return logger
 
 
-logger = setup_logger(log_file=config.get_log_file())
+# Configured (handlers, level) by the entry point through configure_logging
+logger = logging.getLogger("allmand")
@@ -2,19 +2,40 @@ import pickle
 import numpy as np
 from pathlib import Path
 from typing import Any, Dict, Tuple, Optional
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    classification_report, confusion_matrix
-)
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.ensemble import RandomForestClassifier
 from utils.logger import logger
 from utils.config import config
 
 
+# scikit-learn is imported on first use: only the selected estimator is loaded,
+# and load_model (plain pickle) doesn't need scikit-learn at import time.
+def _naive_bayes():
+    from sklearn.naive_bayes import MultinomialNB
+    return MultinomialNB()
+
+
+def _logistic_regression():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(max_iter=1000, random_state=42)
+
+
+def _svm():
+    from sklearn.svm import SVC
+    return SVC(random_state=42)
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=100, random_state=42)
+
+
+MODEL_FACTORIES = {
+    "naive_bayes": _naive_bayes,
+    "logistic_regression": _logistic_regression,
+    "svm": _svm,
+    "random_forest": _random_forest,
+}
+
+
 class ModelTrainer:
     
     def __init__(self, model_type: str = "logistic_regression"):
@@ -23,17 +44,10 @@ class ModelTrainer:
         self.best_params = None
     
     def _get_model(self, model_type: str):
-        models = {
-            "naive_bayes": MultinomialNB(),
-            "logistic_regression": LogisticRegression(max_iter=1000, random_state=42),
-            "svm": SVC(random_state=42),
-            "random_forest": RandomForestClassifier(n_estimators=100, random_state=42),
-        }
-        
-        if model_type not in models:
+        if model_type not in MODEL_FACTORIES:
             raise ValueError(f"Unknown model type: {model_type}")
         
-        return models[model_type]
+        return MODEL_FACTORIES[model_type]()
     
     def train(self, X_train: np.ndarray, y_train: np.ndarray) -> Any:
         logger.info(f"Training {self.model_type} model...")
@@ -56,6 +70,8 @@ class ModelTrainer:
         y_test: np.ndarray,
         average: str = "weighted"
     ) -> Dict[str, float]:
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+
         y_pred = self.predict(X_test)
         
         metrics = {
@@ -73,6 +89,8 @@ class ModelTrainer:
         X_test: np.ndarray,
         y_test: np.ndarray
     ) -> str:
+        from sklearn.metrics import classification_report
+
         y_pred = self.predict(X_test)
         report = classification_report(y_test, y_pred)
         return report
@@ -82,6 +100,8 @@ class ModelTrainer:
         X_test: np.ndarray,
         y_test: np.ndarray
     ) -> np.ndarray:
+        from sklearn.metrics import confusion_matrix
+
         y_pred = self.predict(X_test)
         cm = confusion_matrix(y_test, y_pred)
         return cm
@@ -93,6 +113,8 @@ class ModelTrainer:
         cv: int = 5,
         scoring: str = "accuracy"
     ) -> Dict[str, float]:
+        from sklearn.model_selection import cross_val_score
+
         logger.info(f"Performing {cv}-fold cross-validation...")
         scores = cross_val_score(self.model, X, y, cv=cv, scoring=scoring)
         
@@ -113,6 +135,8 @@ class ModelTrainer:
         cv: int = 5,
         scoring: str = "accuracy"
     ) -> Dict[str, Any]:
+        from sklearn.model_selection import GridSearchCV
+
         logger.info("Starting hyperparameter tuning...")
         
         grid_search = GridSearchCV(
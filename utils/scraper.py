@@ -3,6 +3,7 @@ from bs4 import BeautifulSoup
 from typing import List, Dict, Optional
 import time
 from pathlib import Path
+from urllib.parse import urljoin
 import json
 from utils.logger import logger
 from utils.config import config
@@ -48,8 +49,8 @@ class WebScraper:
             if href:
                 if href.startswith('http'):
                     links.append(href)
-                elif self.base_url:
-                    links.append(self.base_url.rstrip('/') + '/' + href.lstrip('/'))
+                elif self.base_url and not href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
+                    links.append(urljoin(self.base_url, href))
         return links
     
     def scrape_page(
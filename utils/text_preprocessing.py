@@ -1,21 +1,26 @@
 import re
 import pandas as pd
 from typing import List, Optional
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer, SnowballStemmer
+from utils.logger import logger
 
 
 class TextPreprocessor:
     
     def __init__(self, language: str = 'italian', use_lemmatization: bool = True):
+        # NLTK is imported here rather than at module level: importing this module
+        # (e.g. to unpickle or for --help) does not load it
+        from nltk.corpus import stopwords
+        from nltk.tokenize import word_tokenize
+        from nltk.stem import WordNetLemmatizer, SnowballStemmer
+
+        self._word_tokenize = word_tokenize
         self.language = language
         self.use_lemmatization = use_lemmatization
         
         try:
             self.stop_words = set(stopwords.words(language))
         except:
-            print(f"Lingua '{language}' non disponibile, uso 'english'")
+            logger.warning(f"Lingua '{language}' non disponibile, uso 'english'")
             self.stop_words = set(stopwords.words('english'))
         
         # WordNetLemmatizer is primarily for English. For other languages, we might prefer stemming.
@@ -30,7 +35,7 @@ class TextPreprocessor:
                 self.stemmer = SnowballStemmer(language)
                 self.use_lemmatization = False # Force stemming if not English
             except ValueError:
-                print(f"Stemmer per '{language}' non disponibile, uso 'english'")
+                logger.warning(f"Stemmer per '{language}' non disponibile, uso 'english'")
                 self.stemmer = SnowballStemmer("english")
     
     def clean_text(self, text: str) -> str:
@@ -53,7 +58,7 @@ class TextPreprocessor:
             return []
         
         # Pass language to word_tokenize to use the correct punkt model
-        tokens = word_tokenize(str(text), language=self.language)
+        tokens = self._word_tokenize(str(text), language=self.language)
         
         if remove_stopwords:
             tokens = [word for word in tokens if word.lower() not in self.stop_words]
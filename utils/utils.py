@@ -1,13 +1,14 @@
 import pickle
 import json
 from pathlib import Path
-from typing import Any, Dict, List
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
+from typing import TYPE_CHECKING, Any, Dict, List
 from utils.logger import logger
 
+# Plotting libraries are imported by the functions that use them, so callers
+# that only need save_object/load_object don't pay for matplotlib at import.
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def save_object(obj: Any, file_path: Path):
     file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -43,6 +44,8 @@ def plot_word_frequencies(
     figsize: tuple = (12, 6),
     save_path: Path = None
 ):
+    import matplotlib.pyplot as plt
+
     top_words = dict(sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:top_n])
     
     plt.figure(figsize=figsize)
@@ -68,6 +71,9 @@ def generate_wordcloud(
     background_color: str = 'white',
     save_path: Path = None
 ):
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
     wordcloud = WordCloud(
         width=width,
         height=height,
@@ -94,6 +100,9 @@ def plot_confusion_matrix(
     figsize: tuple = (8, 6),
     save_path: Path = None
 ):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.figure(figsize=figsize)
     sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
                 xticklabels=classes, yticklabels=classes)
@@ -110,11 +119,13 @@ def plot_confusion_matrix(
 
 
 def plot_class_distribution(
-    df: pd.DataFrame,
+    df: "pd.DataFrame",
     column: str,
     figsize: tuple = (10, 6),
     save_path: Path = None
 ):
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=figsize)
     df[column].value_counts().plot(kind='bar')
     plt.title('Class Distribution')
@@ -130,7 +141,7 @@ def plot_class_distribution(
     plt.show()
 
 
-def get_text_statistics(df: pd.DataFrame, text_column: str) -> Dict[str, float]:
+def get_text_statistics(df: "pd.DataFrame", text_column: str) -> Dict[str, float]:
     df_copy = df.copy()
     df_copy['text_length'] = df_copy[text_column].astype(str).str.len()
     df_copy['word_count'] = df_copy[text_column].astype(str).str.split().str.len()